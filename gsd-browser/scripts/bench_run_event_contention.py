@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Measure run event store throughput with concurrent writer and reader threads.
+
+``--writers`` threads each record events for their own session (as the CDP handlers of
+concurrent runs do) while ``--readers`` threads query random sessions the way the MCP tools and
+the dashboard do (newest 50, errors only or all types, plus counts). Both run for
+``--seconds`` and the script reports total writes per second and reader latency percentiles.
+
+By default writers record as fast as they can. ``--burst``/``--pause-ms`` make each writer
+record bursts of events separated by pauses instead, which is closer to CDP traffic and keeps
+the measurement about the store's locks rather than about CPU-bound threads sharing the GIL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from typing import Any
+
+from gsd_browser.run_event_store import RunEventStore, RunEventStoreConfig
+
+
+def _writer(
+    store: RunEventStore,
+    session_id: str,
+    stop: threading.Event,
+    out: list[int],
+    *,
+    burst: int,
+    pause_s: float,
+) -> None:
+    written = 0
+    while not stop.is_set():
+        if pause_s and written and written % burst == 0:
+            time.sleep(pause_s)
+        captured_at = time.time()
+        if written % 4 == 0:
+            store.record_console_event(
+                session_id,
+                captured_at=captured_at,
+                level="error" if written % 20 == 0 else "info",
+                message=f"[app] render cycle {written % 10} finished",
+            )
+        else:
+            store.record_network_event(
+                session_id,
+                captured_at=captured_at,
+                method="GET",
+                url=f"https://api.example.com/v1/items/{written % 40}",
+                status=500 if written % 25 == 0 else 200,
+                duration_ms=12.5 + written % 7,
+            )
+        written += 1
+    out.append(written)
+
+
+def _reader(
+    store: RunEventStore,
+    sessions: list[str],
+    stop: threading.Event,
+    seed: int,
+    out: list[float],
+) -> None:
+    rng = random.Random(seed)
+    timings: list[float] = []
+    while not stop.is_set():
+        session_id = rng.choice(sessions)
+        started = time.perf_counter()
+        if rng.random() < 0.5:
+            store.get_events(session_id=session_id, has_error=True, last_n=50)
+        else:
+            store.get_events(session_id=session_id, last_n=50)
+            store.get_counts(session_id)
+        timings.append(time.perf_counter() - started)
+    out.extend(timings)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[max(0, int(len(values) * q) - 1)] if values else 0.0
+
+
+def run(
+    *, writers: int, readers: int, seconds: float, burst: int = 1, pause_s: float = 0.0
+) -> dict[str, Any]:
+    store = RunEventStore(config=RunEventStoreConfig(max_sessions=max(writers, 1)))
+    sessions = [f"session-{index:03d}" for index in range(writers)]
+    stop = threading.Event()
+    written: list[int] = []
+    timings: list[float] = []
+    threads = [
+        threading.Thread(
+            target=_writer,
+            args=(store, session_id, stop, written),
+            kwargs={"burst": burst, "pause_s": pause_s},
+        )
+        for session_id in sessions
+    ]
+    threads += [
+        threading.Thread(target=_reader, args=(store, sessions, stop, seed, timings))
+        for seed in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    timings.sort()
+    return {
+        "writers": writers,
+        "readers": readers,
+        "pause_ms": pause_s * 1000.0,
+        "writes_per_s": round(sum(written) / seconds),
+        "reads_per_s": round(len(timings) / seconds),
+        "read_p50_ms": round(statistics.median(timings) * 1e3, 3) if timings else None,
+        "read_p99_ms": round(_percentile(timings, 0.99) * 1e3, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run event store lock contention.")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--burst", type=int, default=50, help="events per writer burst")
+    parser.add_argument("--pause-ms", type=float, default=0.0, help="pause between bursts")
+    args = parser.parse_args()
+    result = run(
+        writers=max(1, args.writers),
+        readers=max(0, args.readers),
+        seconds=max(0.1, args.seconds),
+        burst=max(1, args.burst),
+        pause_s=max(0.0, args.pause_ms) / 1000.0,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Measure run event store memory with every session filled to the configured caps.
+
+Compares the previous layout (one nested dict per event: payload, ``details`` and console
+``location``) with the current `RunEventStore` records. Event fields are decoded from JSON per
+event, so repeated strings arrive as distinct objects the way CDP payloads do.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from gsd_browser.run_event_store import RunEventStore, RunEventStoreConfig
+
+_METHODS = ("GET", "GET", "GET", "POST")
+_LEVELS = ("log", "info", "warning", "error")
+
+
+def _events(config: RunEventStoreConfig, session: int) -> list[tuple[str, str]]:
+    events: list[tuple[str, str]] = []
+    for index in range(config.max_network_events):
+        status = 500 if index % 25 == 0 else 200
+        fields = {
+            "captured_at": 1_700_000_000.0 + index * 0.01,
+            "method": _METHODS[index % len(_METHODS)],
+            "url": f"https://api.example.com/v1/items/{index % 40}?session={session % 5}",
+            "status": status,
+            "duration_ms": 12.5 + index % 7,
+        }
+        events.append(("network", json.dumps(fields)))
+    for index in range(config.max_console_events):
+        fields = {
+            "captured_at": 1_700_000_000.0 + index * 0.02,
+            "level": _LEVELS[index % len(_LEVELS)],
+            "message": f"[app] render cycle {index % 10} finished",
+            "location": {
+                "url": "https://app.example.com/static/js/main.4f2a9c.js",
+                "line": 1200 + index % 30,
+                "column": 17,
+            },
+        }
+        events.append(("console", json.dumps(fields)))
+    for index in range(config.max_agent_events):
+        fields = {
+            "captured_at": 1_700_000_000.0 + index,
+            "step": index,
+            "url": "https://app.example.com/dashboard",
+            "title": "Dashboard",
+            "summary": f"Clicked element {index % 12}",
+        }
+        events.append(("agent", json.dumps(fields)))
+    return events
+
+
+def _fill_legacy(config: RunEventStoreConfig, sessions: int) -> Any:
+    store: dict[str, dict[str, deque[dict[str, Any]]]] = {}
+    for session in range(sessions):
+        buckets = {
+            "agent": deque(maxlen=config.max_agent_events),
+            "console": deque(maxlen=config.max_console_events),
+            "network": deque(maxlen=config.max_network_events),
+        }
+        for kind, raw in _events(config, session):
+            fields = json.loads(raw)
+            if kind == "network":
+                details = {
+                    "method": fields["method"],
+                    "url": fields["url"],
+                    "status": fields["status"],
+                    "duration_ms": fields["duration_ms"],
+                }
+                summary = f"{fields['method']} {fields['url']}"
+                has_error = fields["status"] >= 400
+            elif kind == "console":
+                details = {"level": fields["level"], "location": dict(fields["location"])}
+                summary = fields["message"]
+                has_error = fields["level"] == "error"
+            else:
+                details = {"step": fields["step"], "url": fields["url"], "title": fields["title"]}
+                summary = fields["summary"]
+                has_error = False
+            buckets[kind].append(
+                {
+                    "event_type": kind,
+                    "timestamp": fields["captured_at"],
+                    "summary": summary,
+                    "has_error": has_error,
+                    "details": details,
+                }
+            )
+        store[f"session-{session:03d}"] = buckets
+    return store
+
+
+def _fill_current(config: RunEventStoreConfig, sessions: int) -> Any:
+    store = RunEventStore(config=config)
+    for session in range(sessions):
+        session_id = f"session-{session:03d}"
+        for kind, raw in _events(config, session):
+            fields = json.loads(raw)
+            captured_at = fields.pop("captured_at")
+            if kind == "network":
+                store.record_network_event(session_id, captured_at=captured_at, **fields)
+            elif kind == "console":
+                store.record_console_event(session_id, captured_at=captured_at, **fields)
+            else:
+                store.record_agent_event(session_id, captured_at=captured_at, **fields)
+    return store
+
+
+def _measure(fill: Callable[[RunEventStoreConfig, int], Any], config: RunEventStoreConfig) -> int:
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    store = fill(config, config.max_sessions)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run event store memory at the caps.")
+    parser.add_argument("--sessions", type=int, default=RunEventStoreConfig().max_sessions)
+    args = parser.parse_args()
+
+    config = RunEventStoreConfig(max_sessions=max(1, int(args.sessions)))
+    events = config.max_sessions * (
+        config.max_agent_events + config.max_console_events + config.max_network_events
+    )
+    legacy = _measure(_fill_legacy, config)
+    current = _measure(_fill_current, config)
+    report = {
+        "sessions": config.max_sessions,
+        "events": events,
+        "legacy_bytes": legacy,
+        "current_bytes": current,
+        "legacy_bytes_per_event": round(legacy / events, 1),
+        "current_bytes_per_event": round(current / events, 1),
+        "reduction_pct": round(100.0 * (legacy - current) / legacy, 1) if legacy else None,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Compare the in-memory and SQLite run event stores on insert throughput and query latency.
+
+``--events`` events are spread over ``--sessions`` sessions with caps high enough that nothing
+is evicted, then ``--queries`` filtered lookups (session, event type, error flag and time window,
+50 newest) are timed against each backend. The SQLite database is a file in a temp directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from gsd_browser.run_event_sqlite import SqliteRunEventStore
+from gsd_browser.run_event_store import BaseRunEventStore, RunEventStore, RunEventStoreConfig
+
+_LEVELS = ("log", "info", "warning", "error")
+
+
+def _fill(store: BaseRunEventStore, *, events: int, sessions: int) -> float:
+    started = time.perf_counter()
+    for index in range(events):
+        session_id = f"session-{index % sessions:04d}"
+        captured_at = 1_700_000_000.0 + index * 0.001
+        if index % 3 == 0:
+            store.record_console_event(
+                session_id,
+                captured_at=captured_at,
+                level=_LEVELS[index % len(_LEVELS)],
+                message=f"[app] render cycle {index % 10} finished",
+                location={"url": "https://app.example.com/static/js/main.js", "line": index % 300},
+            )
+        else:
+            store.record_network_event(
+                session_id,
+                captured_at=captured_at,
+                method="GET",
+                url=f"https://api.example.com/v1/items/{index % 40}",
+                status=500 if index % 25 == 0 else 200,
+                duration_ms=12.5 + index % 7,
+            )
+    store.flush()
+    return time.perf_counter() - started
+
+
+def _query(store: BaseRunEventStore, *, events: int, sessions: int, queries: int) -> list[float]:
+    rng = random.Random(7)
+    span = events * 0.001
+    timings: list[float] = []
+    for _ in range(queries):
+        kwargs: dict[str, Any] = {
+            "session_id": f"session-{rng.randrange(sessions):04d}",
+            "event_types": [rng.choice(("console", "network"))],
+            "has_error": True,
+            "from_timestamp": 1_700_000_000.0 + rng.random() * span,
+            "last_n": 50,
+        }
+        started = time.perf_counter()
+        store.get_events(**kwargs)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _run(name: str, store: BaseRunEventStore, args: argparse.Namespace) -> dict[str, Any]:
+    elapsed = _fill(store, events=args.events, sessions=args.sessions)
+    timings = sorted(
+        _query(store, events=args.events, sessions=args.sessions, queries=args.queries)
+    )
+    store.close()
+    return {
+        "backend": name,
+        "inserts_per_s": round(args.events / elapsed),
+        "query_p50_ms": round(statistics.median(timings) * 1e3, 3),
+        "query_p99_ms": round(timings[max(0, int(len(timings) * 0.99) - 1)] * 1e3, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory vs SQLite run event store.")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    args.events = max(1, int(args.events))
+    args.sessions = max(1, int(args.sessions))
+    args.queries = max(1, int(args.queries))
+
+    per_type = args.events // args.sessions + 1
+    config = RunEventStoreConfig(
+        max_sessions=args.sessions,
+        max_console_events=per_type,
+        max_network_events=per_type,
+    )
+    results = [_run("memory", RunEventStore(config=config), args)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteRunEventStore(config=config, path=Path(tmp) / "run_events.sqlite3")
+        results.append(_run("sqlite", store, args))
+    print(
+        json.dumps({"events": args.events, "sessions": args.sessions, "results": results}, indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Measure per-record memory of stored Screenshot metadata (no image bytes).
+
+Compares the previous representation (a frozen dataclass with a per-instance ``__dict__`` and a
+copied metadata dict, holding whatever string objects the producer passed in) with the current
+slotted ``Screenshot`` built through ``Screenshot.create``. Inputs are decoded from JSON per
+record, so repeated strings arrive as distinct objects the way CDP/tool payloads do.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from gsd_browser.screenshot_manager import Screenshot
+
+
+@dataclass(frozen=True)
+class _LegacyScreenshot:
+    id: str
+    timestamp: float
+    screenshot_type: str
+    source: str | None
+    session_id: str | None
+    has_error: bool
+    metadata: dict[str, Any]
+    image: Any
+    mime_type: str | None
+    url: str | None = None
+    step: int | None = None
+
+
+def _payloads(count: int, *, sessions: int) -> list[str]:
+    payloads = []
+    for index in range(count):
+        stream = index % 4 != 0
+        payloads.append(
+            json.dumps(
+                {
+                    "screenshot_type": "stream_sample" if stream else "agent_step",
+                    "source": None if stream else "browser_state_summary",
+                    "session_id": f"session-{index % sessions:04d}-{'x' * 24}",
+                    "mime_type": "image/jpeg" if stream else "image/png",
+                    "url": f"https://example.com/app/page/{index % 20}",
+                    "metadata": (
+                        {"seq": index, "latency_ms": 12.5, "streaming_mode": "cdp"}
+                        if stream
+                        else {
+                            "title": "Example Domain",
+                            "browser_errors": [],
+                            "source": "browser_state_summary",
+                        }
+                    ),
+                }
+            )
+        )
+    return payloads
+
+
+def _build_legacy(fields: dict[str, Any], index: int) -> Any:
+    return _LegacyScreenshot(
+        id=str(uuid.uuid4()),
+        timestamp=1_700_000_000.0 + index,
+        screenshot_type=fields["screenshot_type"],
+        source=fields["source"],
+        session_id=fields["session_id"],
+        has_error=False,
+        metadata=dict(fields["metadata"]),
+        image=None,
+        mime_type=fields["mime_type"],
+        url=fields["url"],
+        step=index,
+    )
+
+
+def _build_current(fields: dict[str, Any], index: int) -> Any:
+    return Screenshot.create(
+        id=str(uuid.uuid4()),
+        timestamp=1_700_000_000.0 + index,
+        screenshot_type=fields["screenshot_type"],
+        source=fields["source"],
+        session_id=fields["session_id"],
+        has_error=False,
+        metadata=fields["metadata"],
+        image=None,
+        mime_type=fields["mime_type"],
+        url=fields["url"],
+        step=index,
+    )
+
+
+def _measure(build: Callable[[dict[str, Any], int], Any], payloads: list[str]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    records = [build(json.loads(payload), index) for index, payload in enumerate(payloads)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_record = (current - baseline) / max(1, len(records))
+    del records
+    return per_record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-record memory of Screenshot records.")
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = _payloads(int(args.records), sessions=max(1, int(args.sessions)))
+    legacy = _measure(_build_legacy, payloads)
+    current = _measure(_build_current, payloads)
+    report = {
+        "records": len(payloads),
+        "legacy_bytes_per_record": round(legacy, 1),
+        "slotted_bytes_per_record": round(current, 1),
+        "reduction_pct": round(100.0 * (legacy - current) / legacy, 1) if legacy else None,
+    }
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
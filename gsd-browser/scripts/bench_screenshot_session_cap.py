@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Measure agent_step insert latency with many concurrent sessions hitting the caps.
+
+Each of ``--sessions`` threads records agent_step screenshots into its own session, so every
+insert past the warm-up trips the per-session cap and (once the store is full) the global
+count cap. The store is pre-filled to several sizes; with constant-time cap enforcement the
+per-insert latency stays flat as the store grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from gsd_browser.screenshot_manager import ScreenshotManager
+
+
+def _run(*, store_size: int, sessions: int, inserts: int, per_session_cap: int) -> dict:
+    manager = ScreenshotManager(
+        max_screenshots=store_size, max_agent_step_per_session=per_session_cap
+    )
+    # Pre-fill with other sessions' steps so the store is at capacity before timing starts.
+    for index in range(store_size):
+        manager.record_screenshot(
+            screenshot_type="agent_step",
+            image_bytes=index.to_bytes(4, "big"),
+            mime_type="image/png",
+            session_id=f"filler-{index // per_session_cap}",
+            step=index,
+        )
+
+    latencies: list[list[float]] = [[] for _ in range(sessions)]
+    barrier = threading.Barrier(sessions)
+
+    def _worker(slot: int) -> None:
+        session_id = f"session-{slot:02d}"
+        timings = latencies[slot]
+        barrier.wait()
+        for step in range(inserts):
+            payload = f"{session_id}:{step}".encode()
+            started = time.perf_counter()
+            manager.record_screenshot(
+                screenshot_type="agent_step",
+                image_bytes=payload,
+                mime_type="image/png",
+                session_id=session_id,
+                step=step,
+            )
+            timings.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=_worker, args=(slot,)) for slot in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    manager.close()
+
+    samples = sorted(value for timings in latencies for value in timings)
+    return {
+        "store_size": store_size,
+        "inserts": len(samples),
+        "inserts_per_s": round(len(samples) / elapsed),
+        "p50_us": round(statistics.median(samples) * 1e6, 1),
+        "p99_us": round(samples[int(len(samples) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="agent_step insert latency under cap pressure.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--inserts", type=int, default=400, help="inserts per session")
+    parser.add_argument("--per-session-cap", type=int, default=50)
+    parser.add_argument("--store-sizes", type=str, default="500,5000,50000")
+    args = parser.parse_args()
+
+    results = [
+        _run(
+            store_size=int(size),
+            sessions=max(1, int(args.sessions)),
+            inserts=max(1, int(args.inserts)),
+            per_session_cap=max(1, int(args.per_session_cap)),
+        )
+        for size in args.store_sizes.split(",")
+        if size.strip()
+    ]
+    print(json.dumps({"sessions": args.sessions, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
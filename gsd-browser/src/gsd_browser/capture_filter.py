@@ -0,0 +1,158 @@
+"""Capture-time filtering of network noise for web_eval_agent runs.
+
+Analytics/beacon traffic and repeated identical polling requests would otherwise fill the
+per-session network ring buffer and evict the requests triage needs. `NetworkCaptureFilter`
+decides, per finished request, whether it should be recorded as a run event or only counted
+(see `RunNetworkStats.record_collapsed`). Failed requests are never collapsed. Noise paths
+match whole segments anywhere in the URL path (`/collect` matches `/g/collect` and
+`/collect/v2`, not `/api/collections`). The same noise rules are used by failure ranking.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+NOISE_ERROR_SUBSTRINGS = (
+    "net::err_blocked_by_client",
+    "err_blocked_by_client",
+    "blocked_by_client",
+    "blocked by client",
+)
+
+NOISE_HOST_SUBSTRINGS = (
+    "doubleclick.net",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "googlesyndication.com",
+    "sentry.io",
+    "stats.g.doubleclick.net",
+)
+
+NOISE_PATH_SUBSTRINGS = (
+    "/collect",
+    "/analytics",
+    "/beacon",
+    "/cdn-cgi/beacon",
+    "/cdn-cgi/rum",
+    "/cdn-cgi/trace",
+    "/pixel",
+)
+
+DEFAULT_POLL_THRESHOLD = 5
+DEFAULT_MAX_TRACKED_REQUESTS = 1000
+
+# Reasons reported for collapsed requests.
+COLLAPSED_NOISE = "noise"
+COLLAPSED_POLL = "poll"
+
+
+def _host_and_path(url: str) -> tuple[str | None, str]:
+    try:
+        parsed = urlsplit(url)
+    except ValueError:
+        return None, ""
+    host = parsed.hostname
+    return (host.lower() if host else None), parsed.path or "/"
+
+
+def _path_has_segments(path: str, token: str) -> bool:
+    """True when the segments of `token` appear as a run of whole segments of `path`."""
+
+    return f"/{token.strip('/')}/" in path.rstrip("/") + "/"
+
+
+def is_noise_network(
+    *,
+    url: str | None,
+    error: str | None,
+    hosts: tuple[str, ...] = NOISE_HOST_SUBSTRINGS,
+    paths: tuple[str, ...] = NOISE_PATH_SUBSTRINGS,
+) -> bool:
+    error_value = (error or "").lower()
+    if any(token in error_value for token in NOISE_ERROR_SUBSTRINGS):
+        return True
+    host, path = _host_and_path((url or "").lower())
+    if any(_path_has_segments(path, token) for token in paths):
+        return True
+    return bool(host and any(token in host for token in hosts))
+
+
+def _parse_int(value: str | None, *, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
+
+def _parse_tokens(value: str | None) -> tuple[str, ...]:
+    return tuple(item.strip().lower() for item in (value or "").split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class CaptureFilterConfig:
+    # Collapse requests to noise hosts/paths into counters instead of run events.
+    collapse_noise: bool = True
+    noise_hosts: tuple[str, ...] = NOISE_HOST_SUBSTRINGS
+    noise_paths: tuple[str, ...] = NOISE_PATH_SUBSTRINGS
+    # Identical successful requests (method, URL without query, status) are recorded this many
+    # times and counted after that; 0 disables polling detection.
+    poll_threshold: int = DEFAULT_POLL_THRESHOLD
+    # Distinct requests tracked for polling detection (least recently seen are forgotten).
+    max_tracked_requests: int = DEFAULT_MAX_TRACKED_REQUESTS
+
+
+def load_capture_filter_config() -> CaptureFilterConfig:
+    """Read capture filter settings; extra noise hosts/paths are comma separated."""
+
+    defaults = CaptureFilterConfig()
+    return CaptureFilterConfig(
+        collapse_noise=(
+            os.environ.get("GSD_CAPTURE_COLLAPSE_NOISE", "").strip().lower()
+            not in {"0", "false", "no", "off"}
+        ),
+        noise_hosts=(
+            defaults.noise_hosts + _parse_tokens(os.environ.get("GSD_CAPTURE_NOISE_HOSTS"))
+        ),
+        noise_paths=(
+            defaults.noise_paths + _parse_tokens(os.environ.get("GSD_CAPTURE_NOISE_PATHS"))
+        ),
+        poll_threshold=max(
+            0,
+            _parse_int(
+                os.environ.get("GSD_CAPTURE_POLL_THRESHOLD"), default=defaults.poll_threshold
+            ),
+        ),
+    )
+
+
+class NetworkCaptureFilter:
+    """Classify finished requests as signal (None) or a collapsed reason."""
+
+    def __init__(self, config: CaptureFilterConfig | None = None) -> None:
+        self._config = config or CaptureFilterConfig()
+        self._seen: OrderedDict[tuple[str, str, str], int] = OrderedDict()
+
+    def classify(
+        self, *, method: str, url: str, status: int | None, error: str | None
+    ) -> str | None:
+        # Failures are always recorded: they are what triage and failure ranking look at.
+        if error is not None or (status is not None and status >= 400):
+            return None
+        config = self._config
+        if config.collapse_noise and is_noise_network(
+            url=url, error=error, hosts=config.noise_hosts, paths=config.noise_paths
+        ):
+            return COLLAPSED_NOISE
+        if config.poll_threshold <= 0:
+            return None
+        key = (method.upper(), url, str(status))
+        seen = self._seen.pop(key, 0) + 1
+        self._seen[key] = seen
+        if len(self._seen) > max(1, config.max_tracked_requests):
+            self._seen.popitem(last=False)
+        return COLLAPSED_POLL if seen > config.poll_threshold else None
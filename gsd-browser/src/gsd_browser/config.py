@@ -14,8 +14,10 @@ from .llm.env import LLMProvider, normalize_llm_provider
 from .streaming.env import (
     StreamingMode,
     StreamingQuality,
+    StreamingSampler,
     normalize_streaming_mode,
     normalize_streaming_quality,
+    normalize_streaming_sampler,
 )
 from .user_config import default_env_path
 
@@ -62,6 +64,7 @@ class Settings(BaseModel):
     json_logs: bool = Field(False, alias="GSD_JSON_LOGS")
     streaming_mode: StreamingMode = Field("cdp", alias="STREAMING_MODE")
     streaming_quality: StreamingQuality = Field("med", alias="STREAMING_QUALITY")
+    streaming_sampler: StreamingSampler = Field("interval", alias="STREAMING_SAMPLER")
 
     # Web evaluation timeouts
     # NOTE: All defaults are None - browser-use's internal defaults are used unless
@@ -195,11 +198,13 @@ def load_settings(
     )
     streaming_mode = normalize_streaming_mode(merged.get("STREAMING_MODE"))
     streaming_quality = normalize_streaming_quality(merged.get("STREAMING_QUALITY"))
+    streaming_sampler = normalize_streaming_sampler(merged.get("STREAMING_SAMPLER"))
     try:
         payload: dict[str, object] = {
             "GSD_LLM_PROVIDER": llm_provider,
             "STREAMING_MODE": streaming_mode,
             "STREAMING_QUALITY": streaming_quality,
+            "STREAMING_SAMPLER": streaming_sampler,
         }
         # Only include fallback provider if explicitly set in environment
         # (otherwise Pydantic Field default will be used)
@@ -11,7 +11,8 @@ from dataclasses import dataclass
 from typing import Any
 from urllib.parse import urlsplit, urlunsplit
 
-from .run_event_store import RunEventStore
+from .capture_filter import NOISE_ERROR_SUBSTRINGS, is_noise_network
+from .run_event_store import BaseRunEventStore
 
 
 def _truncate(text: str, *, max_len: int) -> str:
@@ -49,46 +50,6 @@ def _host(url: str | None) -> str | None:
     return host.lower() if host else None
 
 
-_NOISE_ERROR_SUBSTRINGS = (
-    "net::err_blocked_by_client",
-    "err_blocked_by_client",
-    "blocked_by_client",
-    "blocked by client",
-)
-
-_NOISE_HOST_SUBSTRINGS = (
-    "doubleclick.net",
-    "googletagmanager.com",
-    "google-analytics.com",
-    "googlesyndication.com",
-    "sentry.io",
-    "stats.g.doubleclick.net",
-)
-
-_NOISE_PATH_SUBSTRINGS = (
-    "/collect",
-    "/analytics",
-    "/beacon",
-    "/cdn-cgi/beacon",
-    "/cdn-cgi/rum",
-    "/cdn-cgi/trace",
-    "/pixel",
-)
-
-
-def _is_noise_network(*, url: str | None, error: str | None) -> bool:
-    url_value = (url or "").lower()
-    error_value = (error or "").lower()
-    if any(token in error_value for token in _NOISE_ERROR_SUBSTRINGS):
-        return True
-    if any(token in url_value for token in _NOISE_PATH_SUBSTRINGS):
-        return True
-    host = _host(url_value)
-    if host and any(token in host for token in _NOISE_HOST_SUBSTRINGS):
-        return True
-    return False
-
-
 @dataclass(frozen=True)
 class RankedFailure:
     score: int
@@ -137,7 +98,7 @@ def _nearest_step_context(
 
 def rank_failures_for_session(
     *,
-    run_events: RunEventStore | None,
+    run_events: BaseRunEventStore | None,
     session_id: str,
     base_url: str | None,
     history: Any | None = None,
@@ -151,14 +112,25 @@ def rank_failures_for_session(
 
     base_host = _host(base_url) if base_url else None
 
+    # Errors and the agent step timeline are fetched separately, so the error query is
+    # answered from the store's error index instead of scanning every event.
     events: list[dict[str, Any]] = []
+    agent_events: list[dict[str, Any]] = []
     if run_events is not None:
         get_events = getattr(run_events, "get_events", None)
         if callable(get_events):
             events = get_events(
                 session_id=session_id,
                 last_n=250,
-                event_types=["agent", "console", "network"],
+                event_types=["console", "network"],
+                from_timestamp=None,
+                has_error=True,
+                include_details=True,
+            )
+            agent_events = get_events(
+                session_id=session_id,
+                last_n=250,
+                event_types=["agent"],
                 from_timestamp=None,
                 has_error=None,
                 include_details=True,
@@ -174,7 +146,7 @@ def rank_failures_for_session(
             return None
 
     agent_timeline: list[tuple[float, int | None, str | None]] = []
-    for event in reversed(events):
+    for event in reversed(agent_events):
         if (event.get("event_type") or event.get("type")) != "agent":
             continue
         details = event.get("details") if isinstance(event.get("details"), dict) else {}
@@ -207,7 +179,7 @@ def rank_failures_for_session(
             score = 70
             if level in {"exception", "fatal"}:
                 score += 40
-            if any(token in summary_lower for token in _NOISE_ERROR_SUBSTRINGS):
+            if any(token in summary_lower for token in NOISE_ERROR_SUBSTRINGS):
                 score -= 80
             if summary and summary not in seen:
                 seen.add(summary)
@@ -243,7 +215,7 @@ def rank_failures_for_session(
             score += 25
         else:
             score -= 5
-        if _is_noise_network(url=url_safe, error=error):
+        if is_noise_network(url=url_safe, error=error):
             score -= 90
 
         status_part = f"{status}" if status is not None else ""
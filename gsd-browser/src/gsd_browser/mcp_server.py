@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import inspect
 import json
 import logging
 import os
+import re
 import time
 import traceback
 import uuid
@@ -21,11 +21,14 @@ from mcp.server.fastmcp import Context, FastMCP
 from mcp.types import ImageContent, TextContent
 
 from .browser_state import browser_state_path_for_id, capture_state_interactive
+from .capture_filter import load_capture_filter_config
 from .config import Settings, load_settings
 from .failure_ranking import rank_failures_for_session
 from .llm.browser_use import create_browser_use_llms
+from .network_stats import STATS_SORT_KEYS
+from .page_metrics import PageMetricsCollector, load_page_metrics_config, summarize_page_metrics
 from .run_event_capture import CDPRunEventCapture
-from .run_event_store import RunEventStore
+from .run_event_store import BaseRunEventStore, RunEventStore
 from .runtime import DEFAULT_DASHBOARD_HOST, DEFAULT_DASHBOARD_PORT, get_runtime
 from .streaming.cdp_input_dispatch import (
     CDPInputDispatcher,
@@ -42,6 +45,8 @@ os.environ.setdefault("BROWSER_USE_SETUP_LOGGING", "false")
 
 _WEB_EVAL_AGENT_MODES = {"compact", "dev"}
 _RUN_EVENT_TYPES = {"agent", "console", "network"}
+# Padded standard-alphabet base64 (what CDP and browser-use return for screenshots).
+_BASE64_IMAGE_RE = re.compile(r"[A-Za-z0-9+/]*={0,2}")
 
 _UNSET: object = object()
 # Task-local overrides used by higher-level MCP tools that wrap `web_eval_agent`.
@@ -150,7 +155,7 @@ def _select_web_eval_agent_mode(*, normalized_url: str, explicit: str | None) ->
 
 
 def _dev_run_event_excerpts(
-    run_events: RunEventStore | None,
+    run_events: BaseRunEventStore | None,
     *,
     session_id: str,
     base_url: str | None = None,
@@ -193,13 +198,53 @@ def _dev_run_event_excerpts(
         max_items=10,
     )
 
+    get_network_stats = getattr(run_events, "get_network_stats", None)
+    network_stats = (
+        get_network_stats(session_id, top_n=max_value, sort_by="p95_ms")
+        if callable(get_network_stats)
+        else None
+    )
+
     return {
         "console_errors": console_errors,
         "network_errors": network_errors,
         "errors_top": errors_top,
+        "network_stats": _compact_network_stats(network_stats),
+    }
+
+
+def _compact_network_stats(stats: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Keep only the headline numbers of `get_network_stats` for the dev payload."""
+
+    if not stats:
+        return None
+    fields = ("count", "errors", "p50_ms", "p95_ms", "p99_ms")
+    totals = ("bytes", "cache_hit_ratio", "max_ttfb_ms", "slowest_ttfb_endpoint")
+    return {
+        "totals": {key: stats["totals"].get(key) for key in (*fields, *totals)},
+        "slowest_endpoints": [
+            {"endpoint": row.get("endpoint"), **{key: row.get(key) for key in fields}}
+            for row in stats.get("endpoints") or []
+        ],
+        "collapsed_requests": stats.get("collapsed_requests", 0),
     }
 
 
+def _page_performance(
+    run_events: BaseRunEventStore | None, *, session_id: str, include_steps: bool
+) -> dict[str, Any] | None:
+    """Summarize the per-step page metrics of a session (with the steps themselves in dev)."""
+
+    get_page_metrics = getattr(run_events, "get_page_metrics", None)
+    if not callable(get_page_metrics):
+        return None
+    samples = get_page_metrics(session_id)
+    performance = summarize_page_metrics(samples)
+    if include_steps:
+        performance["steps"] = samples
+    return performance
+
+
 def _load_browser_use_classes() -> tuple[type[Any], type[Any]]:
     from browser_use import Agent, BrowserSession
 
@@ -386,16 +431,17 @@ def _dedupe(items: list[str]) -> list[str]:
     return unique
 
 
-def _decode_base64_image(data: str) -> bytes | None:
+def _normalize_base64_image(data: str) -> str | None:
+    """Strip a data-URL prefix; returns None for empty or invalid base64 (not decoded)."""
+
     if not data:
         return None
     payload = data.strip()
     if payload.startswith("data:") and "," in payload:
         payload = payload.split(",", 1)[1].strip()
-    try:
-        return base64.b64decode(payload)
-    except Exception:  # noqa: BLE001
+    if not payload or len(payload) % 4 or not _BASE64_IMAGE_RE.fullmatch(payload):
         return None
+    return payload
 
 
 def _browser_use_prompt_wrapper(*, base_url: str) -> str:
@@ -573,7 +619,7 @@ def _agent_output_summary(agent_output: Any) -> str | None:
 async def web_eval_agent(
     url: str,
     task: str,
-    ctx: Context,
+    ctx: Context[Any, Any, Any],
     headless_browser: bool = False,
     mode: str | None = None,
     budget_s: float | None = None,
@@ -773,9 +819,20 @@ async def web_eval_agent(
         except Exception:  # noqa: BLE001
             return 0
 
+    page_metrics_config = load_page_metrics_config()
+    page_metrics = (
+        PageMetricsCollector(timeout_s=page_metrics_config.timeout_s)
+        if page_metrics_config.enabled
+        else None
+    )
+
     try:
         Agent, BrowserSession = _load_browser_use_classes()
-        cdp_capture = CDPRunEventCapture(store=run_events, session_id=session_id)
+        cdp_capture = CDPRunEventCapture(
+            store=run_events,
+            session_id=session_id,
+            capture_filter=load_capture_filter_config(),
+        )
         history: Any | None = None
         browser_session: Any | None = None
 
@@ -933,15 +990,16 @@ async def web_eval_agent(
             last_browser_errors = browser_error_list
             last_has_error = has_error
 
-            image_bytes = (
-                _decode_base64_image(screenshot_base64)
+            image_base64 = (
+                _normalize_base64_image(screenshot_base64)
                 if isinstance(screenshot_base64, str)
                 else None
             )
+            image_bytes: bytes | None = None
             source = "browser_state_summary"
             mime_type = "image/png"
 
-            if not image_bytes:
+            if not image_base64:
                 (
                     fallback_bytes,
                     fallback_url,
@@ -966,6 +1024,7 @@ async def web_eval_agent(
             record(
                 screenshot_type="agent_step",
                 image_bytes=image_bytes,
+                image_base64=image_base64,
                 source=source,
                 mime_type=mime_type,
                 session_id=session_id,
@@ -1075,6 +1134,29 @@ async def web_eval_agent(
                     summary=summary,
                 )
 
+        async def record_step_page_metrics() -> None:
+            get_or_create_cdp_session = getattr(browser_session, "get_or_create_cdp_session", None)
+            record_page_metrics = getattr(run_events, "record_page_metrics", None)
+            if page_metrics is None or not callable(get_or_create_cdp_session):
+                return
+            if not callable(record_page_metrics):
+                return
+            cdp_session = get_or_create_cdp_session()
+            if inspect.isawaitable(cdp_session):
+                cdp_session = await cdp_session
+            metrics = await page_metrics.collect(
+                cdp_client=getattr(cdp_session, "cdp_client", None),
+                cdp_session_id=getattr(cdp_session, "session_id", None),
+            )
+            if metrics:
+                record_page_metrics(
+                    session_id,
+                    captured_at=datetime.now(UTC).timestamp(),
+                    step=last_step_observed,
+                    url=_public_url(last_page_url),
+                    metrics=metrics,
+                )
+
         async def on_new_step(*args: Any, **kwargs: Any) -> None:
             try:
                 await record_step_screenshot(*args, **kwargs)
@@ -1084,6 +1166,13 @@ async def web_eval_agent(
                 record_step_event(*args, **kwargs)
             except Exception:  # noqa: BLE001
                 logger.debug("Failed to record agent step event", exc_info=True)
+            if page_metrics is not None:
+                try:
+                    await asyncio.wait_for(
+                        record_step_page_metrics(), timeout=page_metrics_config.timeout_s
+                    )
+                except Exception:  # noqa: BLE001
+                    logger.debug("Failed to record step page metrics", exc_info=True)
 
         # Let browser-use handle model-specific timeouts (90s for Claude, 60s default)
         llms = create_browser_use_llms(settings)
@@ -1208,6 +1297,19 @@ async def web_eval_agent(
                 if callable(note_detached):
                     note_detached(error=streaming_disabled_reason)
 
+        async def enable_capture_auto_attach() -> None:
+            """Follow the agent page's iframes, workers and popups (flatten auto-attach)."""
+
+            get_or_create_cdp_session = getattr(browser_session, "get_or_create_cdp_session", None)
+            if not callable(get_or_create_cdp_session):
+                return
+            cdp_session = get_or_create_cdp_session()
+            if inspect.isawaitable(cdp_session):
+                cdp_session = await cdp_session
+            cdp_session_id = getattr(cdp_session, "session_id", None)
+            if isinstance(cdp_session_id, str) and cdp_session_id:
+                await cdp_capture.enable_auto_attach(cdp_session_id)
+
         async def attach_cdp_when_ready() -> None:
             nonlocal cdp_attached
             while True:
@@ -1219,6 +1321,11 @@ async def web_eval_agent(
                         cdp_attached = True
                     except Exception:  # noqa: BLE001
                         logger.debug("Failed to attach CDP event capture", exc_info=True)
+                        return
+                    try:
+                        await asyncio.wait_for(enable_capture_auto_attach(), timeout=5.0)
+                    except Exception:  # noqa: BLE001
+                        logger.debug("Failed to enable CDP target auto-attach", exc_info=True)
                     return
                 await asyncio.sleep(0.05)
 
@@ -1497,9 +1604,11 @@ async def web_eval_agent(
                     except Exception:  # noqa: BLE001
                         logger.debug("Failed to stop streaming", exc_info=True)
 
+            # Stop the capture flusher even when the CDP client is already gone.
+            cdp_capture.close()
             if cdp_attached:
                 try:
-                    cdp_client = getattr(browser_session, "cdp_client", None)
+                    cdp_client = _get_cdp_client_safe(browser_session)
                     if cdp_client is not None:
                         cdp_capture.detach(cdp_client)
                 except Exception:  # noqa: BLE001
@@ -1539,6 +1648,9 @@ async def web_eval_agent(
             warnings.append(
                 _truncate(f"streaming_disabled={streaming_disabled_reason}", max_len=400)
             )
+        capture_overflow = cdp_capture.stats()["dropped"]
+        if capture_overflow:
+            warnings.append(f"run_events_overflow={capture_overflow}")
         if final_notes is not None:
             warnings.append(_truncate(f"final_notes={final_notes}", max_len=400))
         warnings = _dedupe(warnings)[:20]
@@ -1635,6 +1747,7 @@ async def web_eval_agent(
                     "Use get_run_events(session_id="
                     f"'{session_id}', event_types=['console','network'], has_error=true, last_n=50)"
                 ),
+                f"Use get_run_stats(session_id='{session_id}') for request latency percentiles",
                 f"Open dashboard: http://{DEFAULT_DASHBOARD_HOST}:{DEFAULT_DASHBOARD_PORT}",
             ],
         }
@@ -1646,6 +1759,10 @@ async def web_eval_agent(
                 history=history,
                 max_per_type=5,
             )
+        if page_metrics is not None:
+            payload["page_performance"] = _page_performance(
+                run_events, session_id=session_id, include_steps=selected_mode == "dev"
+            )
 
         logger.info(
             "web_eval_agent completed",
@@ -1726,6 +1843,10 @@ async def web_eval_agent(
                 f"Open dashboard: http://{DEFAULT_DASHBOARD_HOST}:{DEFAULT_DASHBOARD_PORT}",
             ],
         }
+        if page_metrics is not None:
+            payload["page_performance"] = _page_performance(
+                run_events, session_id=session_id, include_steps=selected_mode == "dev"
+            )
         return [TextContent(type="text", text=json.dumps(payload, ensure_ascii=False))]
     except asyncio.CancelledError:
         duration_s = max(0.0, datetime.now(UTC).timestamp() - started)
@@ -1920,7 +2041,7 @@ def _retag_web_eval_payload(
 async def web_task_agent(
     url: str,
     task: str,
-    ctx: Context,
+    ctx: Context[Any, Any, Any],
     headless_browser: bool = False,
     mode: str | None = None,
     budget_s: float | None = None,
@@ -1966,7 +2087,7 @@ async def web_task_agent(
 async def web_task_agent_github(
     url: str,
     task: str,
-    ctx: Context,
+    ctx: Context[Any, Any, Any],
     headless_browser: bool = False,
     mode: str | None = None,
     budget_s: float | None = None,
@@ -2011,12 +2132,15 @@ async def get_run_events(
     from_timestamp: Any | None = None,
     has_error: bool | None = None,
     include_details: bool = False,
-    ctx: Context | None = None,
+    since_seq: int | None = None,
+    ctx: Context[Any, Any, Any] | None = None,
 ) -> list[TextContent]:
     """Retrieve stored run events for web_eval_agent sessions as a JSON payload.
 
     This tool is designed to keep web_eval_agent responses compact while still allowing
-    clients to fetch detailed console/network/agent events on demand.
+    clients to fetch detailed console/network/agent events on demand. To tail a running
+    session, pass the previous response's `next_seq` as `since_seq`: only newer events are
+    returned, oldest first. `dropped` counts events evicted by the per-session caps.
 
     Args:
         session_id: Filter to a single session_id (optional).
@@ -2025,6 +2149,7 @@ async def get_run_events(
         from_timestamp: Only include events after this timestamp (epoch seconds or ISO-8601).
         has_error: Filter for events marked as errors (optional).
         include_details: Whether to include event details payloads (default false).
+        since_seq: Only return events recorded after this sequence number, oldest first.
 
     Returns:
         list[TextContent]: A single JSON payload encoded as text.
@@ -2034,6 +2159,7 @@ async def get_run_events(
     run_events = getattr(runtime, "run_events", None)
 
     last_n_value = min(max(int(last_n), 0), 200)
+    since_seq_value = max(int(since_seq), 0) if since_seq is not None else None
 
     normalized_types: list[str] | None = None
     error: str | None = None
@@ -2061,9 +2187,17 @@ async def get_run_events(
     if error is None and from_timestamp is not None and parsed_from_timestamp is None:
         error = "from_timestamp must be epoch seconds or ISO-8601 timestamp."
 
+    load_session = getattr(run_events, "load_session", None)
+    if error is None and session_id and callable(load_session):
+        # Replaying a journaled session reads and parses files; keep that off the event loop.
+        await asyncio.to_thread(load_session, session_id)
+
     get_events = getattr(run_events, "get_events", None) if run_events is not None else None
     events: list[dict[str, Any]]
     if error is None and callable(get_events):
+        query: dict[str, Any] = {}
+        if since_seq_value is not None:
+            query["since_seq"] = since_seq_value
         events = get_events(
             session_id=session_id,
             last_n=last_n_value,
@@ -2071,10 +2205,16 @@ async def get_run_events(
             from_timestamp=parsed_from_timestamp,
             has_error=has_error,
             include_details=bool(include_details),
+            **query,
         )
     else:
         events = []
 
+    seqs = [event["seq"] for event in events if isinstance(event.get("seq"), int)]
+    next_seq = max(seqs, default=since_seq_value or 0)
+    get_dropped = getattr(run_events, "get_dropped", None) if run_events is not None else None
+    dropped = get_dropped(session_id) if error is None and callable(get_dropped) else None
+
     counts: dict[str, int] = {"agent": 0, "console": 0, "network": 0, "total": len(events)}
     timestamps: list[float] = []
     for event in events:
@@ -2091,6 +2231,8 @@ async def get_run_events(
         "version": "gsd.get_run_events.v1",
         "session_id": session_id,
         "events": events,
+        "next_seq": next_seq,
+        "dropped": dropped,
         "stats": {
             "counts": counts,
             "oldest_timestamp": min(timestamps) if timestamps else None,
@@ -2102,11 +2244,60 @@ async def get_run_events(
     return [TextContent(type="text", text=json.dumps(payload, ensure_ascii=False))]
 
 
+@mcp.tool(name="get_run_stats")
+async def get_run_stats(
+    session_id: str,
+    top_n: int = 10,
+    sort_by: str = "p95_ms",
+    ctx: Context[Any, Any, Any] | None = None,
+) -> list[TextContent]:
+    """Return network performance aggregates for a web_eval_agent session as JSON.
+
+    Request counts, error rates, p50/p95/p99 `duration_ms`, transferred bytes, cache hits and
+    the slowest time to first byte are kept incrementally for the whole run (not just the
+    retained run events), in total, per host and per endpoint. `collapsed` counts the noise
+    and repeated polling requests that were not recorded as run events.
+
+    Args:
+        session_id: Session to report on (from the web_eval_agent response).
+        top_n: Number of hosts and endpoints to list (default 10, max 50).
+        sort_by: One of "p95_ms" (default), "p99_ms", "p50_ms", "count", "errors", "error_rate",
+            "bytes", "max_ttfb_ms".
+
+    Returns:
+        list[TextContent]: A single JSON payload encoded as text.
+    """
+    _ = ctx
+    runtime = get_runtime()
+    run_events = getattr(runtime, "run_events", None)
+
+    top_n_value = min(max(int(top_n), 0), 50)
+    sort_key = str(sort_by or "").strip().lower()
+    error: str | None = None
+    stats: dict[str, Any] | None = None
+    if sort_key not in STATS_SORT_KEYS:
+        error = f"Invalid sort_by={sort_key!r}. Expected one of {list(STATS_SORT_KEYS)}."
+    else:
+        get_network_stats = getattr(run_events, "get_network_stats", None)
+        if callable(get_network_stats):
+            stats = get_network_stats(session_id, top_n=top_n_value, sort_by=sort_key)
+        if stats is None:
+            error = f"No network stats recorded for session_id={session_id!r}."
+
+    payload = {
+        "version": "gsd.get_run_stats.v1",
+        "session_id": session_id,
+        "network": stats,
+        "error": error,
+    }
+    return [TextContent(type="text", text=json.dumps(payload, ensure_ascii=False))]
+
+
 @mcp.tool(name="setup_browser_state")
 async def setup_browser_state(
     url: str | None = None,
     state_id: str | None = None,
-    ctx: Context | None = None,
+    ctx: Context[Any, Any, Any] | None = None,
 ) -> list[TextContent]:
     """Sets up and saves browser state for future use.
 
@@ -2188,7 +2379,8 @@ async def get_screenshots(
     from_timestamp: float | None = None,
     has_error: bool | None = None,
     include_images: bool = True,
-    ctx: Context | None = None,
+    since_seq: int | None = None,
+    ctx: Context[Any, Any, Any] | None = None,
 ) -> list[TextContent | ImageContent]:
     """Retrieve screenshots from evaluation sessions.
 
@@ -2204,6 +2396,8 @@ async def get_screenshots(
         from_timestamp: Only get screenshots after this time
         has_error: Filter for error screenshots only
         include_images: If False, return metadata only
+        since_seq: Cursor; return only screenshots stored after this sequence number (oldest
+            first, up to last_n). Start with 0 and pass back the returned next_seq.
 
     Returns:
         Screenshot data or metadata with debugging information
@@ -2212,14 +2406,28 @@ async def get_screenshots(
     runtime = get_runtime()
     last_n = min(max(last_n, 0), 20)
 
-    screenshots = runtime.screenshots.get_screenshots(
-        last_n=last_n,
-        session_id=session_id,
-        screenshot_type=screenshot_type,
-        from_timestamp=from_timestamp,
-        has_error=has_error,
-        include_images=include_images,
-    )
+    cursor_text = ""
+    if since_seq is not None:
+        page = runtime.screenshots.get_screenshots_since(
+            since_seq,
+            limit=last_n,
+            session_id=session_id,
+            screenshot_type=screenshot_type,
+            from_timestamp=from_timestamp,
+            has_error=has_error,
+            include_images=include_images,
+        )
+        screenshots = page["screenshots"]
+        cursor_text = f", next_seq: {page['next_seq']}, has_more: {page['has_more']}"
+    else:
+        screenshots = runtime.screenshots.get_screenshots(
+            last_n=last_n,
+            session_id=session_id,
+            screenshot_type=screenshot_type,
+            from_timestamp=from_timestamp,
+            has_error=has_error,
+            include_images=include_images,
+        )
     stats = runtime.screenshots.get_stats()
 
     response: list[TextContent | ImageContent] = [
@@ -2227,7 +2435,8 @@ async def get_screenshots(
             type="text",
             text=(
                 f"Retrieved {len(screenshots)} screenshots from storage "
-                f"(Total stored: {stats['total_screenshots']}, Sampling: {stats['sampling_rate']})"
+                f"(Total stored: {stats['total_screenshots']}, Sampling: {stats['sampling_rate']}"
+                f"{cursor_text})"
             ),
         )
     ]
@@ -2249,7 +2458,7 @@ async def get_screenshots(
     if screenshots:
         lines: list[str] = []
         for shot in screenshots:
-            prefix = f"[{shot.get('type', 'unknown')}] "
+            prefix = f"#{shot.get('seq')} [{shot.get('type', 'unknown')}] "
             step = shot.get("step")
             if step is not None:
                 prefix += f"Step {step} | "
@@ -23,6 +23,7 @@ KNOWN_MCP_TOOLS: tuple[str, ...] = (
     "web_task_agent",
     "web_task_agent_github",
     "get_run_events",
+    "get_run_stats",
     "setup_browser_state",
     "get_screenshots",
 )
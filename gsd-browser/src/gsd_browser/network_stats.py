@@ -0,0 +1,325 @@
+"""Incrementally maintained network performance aggregates for a run.
+
+`RunNetworkStats.record` is called once per finished or failed request. It updates request
+and error counts, transferred bytes, cache hits, the slowest time to first byte and a
+`QuantileSketch` of `duration_ms` for the whole run, for the request's host and for its
+endpoint (method, host and path). Memory is fixed: sketches hold at most
+`max_buckets` buckets, and at most `max_hosts` / `max_endpoints` keys are tracked. Requests
+for further keys are folded into an `(other)` entry.
+
+Requests the capture filter collapses (noise and repeated polling) are still aggregated here,
+and are also counted per (reason, method, host, path) by `record_collapsed`, since they are
+not recorded as run events.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+from urllib.parse import urlsplit
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 512
+DEFAULT_MAX_HOSTS = 200
+DEFAULT_MAX_ENDPOINTS = 500
+OTHER_KEY = "(other)"
+STATS_SORT_KEYS = (
+    "count",
+    "errors",
+    "error_rate",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "bytes",
+    "max_ttfb_ms",
+)
+
+# Durations at or below this (ms) are counted in the sketch's zero bucket.
+_MIN_VALUE = 1e-3
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch style) with bounded memory.
+
+    A value is counted in bucket `ceil(log_gamma(value))`, so every reported quantile is
+    within `relative_accuracy` of a value that was recorded. When more than `max_buckets`
+    buckets are in use, the lowest buckets are merged, which only costs accuracy at the
+    low end; the tail quantiles triage cares about stay accurate.
+    """
+
+    __slots__ = ("_gamma", "_log_gamma", "_max_buckets", "_buckets", "_zero", "count", "min", "max")
+
+    def __init__(
+        self,
+        *,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+    ) -> None:
+        accuracy = min(max(float(relative_accuracy), 1e-4), 0.5)
+        self._gamma = (1.0 + accuracy) / (1.0 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._max_buckets = max(2, int(max_buckets))
+        self._buckets: dict[int, int] = {}
+        self._zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= _MIN_VALUE:
+            self._zero += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if len(self._buckets) > self._max_buckets:
+            self._collapse_lowest()
+
+    def _collapse_lowest(self) -> None:
+        lowest, second = sorted(self._buckets)[:2]
+        self._buckets[second] += self._buckets.pop(lowest)
+
+    def quantile(self, q: float) -> float | None:
+        """Nearest-rank quantile: the value at rank ceil(q * count), within relative accuracy."""
+
+        if self.count <= 0:
+            return None
+        if q <= 0.0:
+            return self.min
+        if q >= 1.0:
+            return self.max
+        rank = max(0, math.ceil(q * self.count) - 1)
+        seen = self._zero
+        if rank < seen:
+            return self.min
+        value = self.max
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                value = 2.0 * self._gamma**index / (self._gamma + 1.0)
+                break
+        return min(max(value, self.min), self.max)
+
+
+@dataclass
+class _Aggregate:
+    sketch: QuantileSketch
+    count: int = 0
+    errors: int = 0
+    # Requests without a measured duration (counted, but not in the sketch).
+    untimed: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+    # Encoded (on the wire) bytes, including headers.
+    transfer_bytes: int = 0
+    cache_hits: int = 0
+    max_ttfb_ms: float | None = None
+
+    def add(
+        self,
+        *,
+        duration_ms: float | None,
+        status: int | None,
+        failed: bool,
+        transfer_bytes: int | None = None,
+        from_cache: bool = False,
+        ttfb_ms: float | None = None,
+    ) -> None:
+        self.count += 1
+        if failed:
+            self.errors += 1
+        if duration_ms is None:
+            self.untimed += 1
+        else:
+            self.sketch.add(duration_ms)
+        status_class = f"{status // 100}xx" if status is not None else "none"
+        self.statuses[status_class] = self.statuses.get(status_class, 0) + 1
+        if transfer_bytes:
+            self.transfer_bytes += transfer_bytes
+        if from_cache:
+            self.cache_hits += 1
+        if ttfb_ms is not None and (self.max_ttfb_ms is None or ttfb_ms > self.max_ttfb_ms):
+            self.max_ttfb_ms = ttfb_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        def _ms(q: float) -> float | None:
+            value = self.sketch.quantile(q)
+            return round(value, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "p50_ms": _ms(0.5),
+            "p95_ms": _ms(0.95),
+            "p99_ms": _ms(0.99),
+            "max_ms": round(self.sketch.max, 1) if self.sketch.count else None,
+            "untimed": self.untimed,
+            "statuses": dict(sorted(self.statuses.items())),
+            "bytes": self.transfer_bytes,
+            "cache_hits": self.cache_hits,
+            "cache_hit_ratio": round(self.cache_hits / self.count, 4) if self.count else 0.0,
+            "max_ttfb_ms": round(self.max_ttfb_ms, 1) if self.max_ttfb_ms is not None else None,
+        }
+
+
+@dataclass
+class _Collapsed:
+    count: int = 0
+    errors: int = 0
+    total_duration_ms: float = 0.0
+
+
+def _split_url(url: str) -> tuple[str, str]:
+    try:
+        parsed = urlsplit(url)
+    except ValueError:
+        return "", url
+    if not parsed.netloc:
+        return parsed.scheme or "", parsed.path or url
+    return parsed.netloc.lower(), parsed.path or "/"
+
+
+class RunNetworkStats:
+    """Per-run request aggregates: totals, per host and per endpoint."""
+
+    def __init__(
+        self,
+        *,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+        max_hosts: int = DEFAULT_MAX_HOSTS,
+        max_endpoints: int = DEFAULT_MAX_ENDPOINTS,
+    ) -> None:
+        self._relative_accuracy = relative_accuracy
+        self._max_buckets = max_buckets
+        self._max_hosts = max(1, int(max_hosts))
+        self._max_endpoints = max(1, int(max_endpoints))
+        self._lock = Lock()
+        self._total = self._new_aggregate()
+        self._hosts: dict[str, _Aggregate] = {}
+        self._endpoints: dict[str, _Aggregate] = {}
+        self._collapsed: dict[tuple[str, str, str, str], _Collapsed] = {}
+        # Endpoint of the request with the highest time to first byte so far.
+        self._slowest_ttfb_endpoint: str | None = None
+
+    def _new_aggregate(self) -> _Aggregate:
+        return _Aggregate(
+            sketch=QuantileSketch(
+                relative_accuracy=self._relative_accuracy, max_buckets=self._max_buckets
+            )
+        )
+
+    def _aggregate_locked(self, table: dict[str, _Aggregate], key: str, limit: int) -> _Aggregate:
+        aggregate = table.get(key)
+        if aggregate is None:
+            if len(table) >= limit and key != OTHER_KEY:
+                return self._aggregate_locked(table, OTHER_KEY, limit)
+            aggregate = self._new_aggregate()
+            table[key] = aggregate
+        return aggregate
+
+    def record(
+        self,
+        *,
+        method: str,
+        url: str,
+        status: int | None = None,
+        duration_ms: float | None = None,
+        failed: bool = False,
+        transfer_bytes: int | None = None,
+        from_cache: bool = False,
+        ttfb_ms: float | None = None,
+    ) -> None:
+        host, path = _split_url(url)
+        endpoint = f"{method.upper()} {host}{path}".strip()
+        is_error = bool(failed) or (status is not None and status >= 400)
+        with self._lock:
+            slowest = self._total.max_ttfb_ms
+            if ttfb_ms is not None and (slowest is None or ttfb_ms > slowest):
+                self._slowest_ttfb_endpoint = endpoint
+            for aggregate in (
+                self._total,
+                self._aggregate_locked(self._hosts, host or OTHER_KEY, self._max_hosts),
+                self._aggregate_locked(self._endpoints, endpoint, self._max_endpoints),
+            ):
+                aggregate.add(
+                    duration_ms=duration_ms,
+                    status=status,
+                    failed=is_error,
+                    transfer_bytes=transfer_bytes,
+                    from_cache=from_cache,
+                    ttfb_ms=ttfb_ms,
+                )
+
+    def record_collapsed(
+        self,
+        *,
+        reason: str,
+        method: str,
+        url: str,
+        duration_ms: float | None = None,
+        failed: bool = False,
+    ) -> None:
+        """Count a request that was not recorded as a run event."""
+
+        host, path = _split_url(url)
+        key = (reason, method.upper(), host, path)
+        with self._lock:
+            counter = self._collapsed.get(key)
+            if counter is None:
+                if len(self._collapsed) >= self._max_endpoints:
+                    key = (reason, "", OTHER_KEY, "")
+                counter = self._collapsed.setdefault(key, _Collapsed())
+            counter.count += 1
+            if failed:
+                counter.errors += 1
+            if duration_ms is not None:
+                counter.total_duration_ms += float(duration_ms)
+
+    def snapshot(self, *, top_n: int = 10, sort_by: str = "p95_ms") -> dict[str, Any]:
+        """Return totals plus the `top_n` hosts and endpoints, highest `sort_by` first."""
+
+        key = sort_by if sort_by in STATS_SORT_KEYS else "p95_ms"
+        limit = max(0, int(top_n))
+        with self._lock:
+            totals = self._total.to_dict()
+            totals["slowest_ttfb_endpoint"] = self._slowest_ttfb_endpoint
+            hosts = [{"host": name, **item.to_dict()} for name, item in self._hosts.items()]
+            endpoints = [
+                {"endpoint": name, **item.to_dict()} for name, item in self._endpoints.items()
+            ]
+            collapsed: list[dict[str, Any]] = [
+                {
+                    "reason": reason,
+                    "method": method,
+                    "host": host,
+                    "path": path,
+                    "count": item.count,
+                    "errors": item.errors,
+                    "total_duration_ms": round(item.total_duration_ms, 1),
+                }
+                for (reason, method, host, path), item in self._collapsed.items()
+            ]
+        collapsed.sort(key=lambda row: row["count"], reverse=True)
+
+        def _top(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+            rows.sort(key=lambda row: (row[key] is not None, row[key] or 0, row["count"]))
+            return rows[::-1][:limit]
+
+        return {
+            "totals": totals,
+            "sort_by": key,
+            "hosts_tracked": len(hosts),
+            "endpoints_tracked": len(endpoints),
+            "hosts": _top(hosts),
+            "endpoints": _top(endpoints),
+            "collapsed_requests": sum(row["count"] for row in collapsed),
+            "collapsed": collapsed[:limit],
+        }
@@ -0,0 +1,191 @@
+"""Opt-in per-step page performance sampling for web_eval_agent runs.
+
+At each agent step `PageMetricsCollector.collect` reads a few CDP `Performance.getMetrics`
+counters and the page's paint/navigation timing. FCP, LCP, CLS and long tasks come from
+PerformanceObservers that a small script installs once per document (the first evaluation in
+a document installs them with `buffered: true`, later ones only read the totals). Values are
+milliseconds relative to the document's navigation start unless the key says otherwise.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from .run_event_capture import cdp_call
+
+logger = logging.getLogger("gsd_browser.page_metrics")
+
+DEFAULT_PAGE_METRICS_TIMEOUT_S = 2.0
+
+# CDP Performance.getMetrics name -> (sample key, scale). Durations are reported in seconds.
+_PERFORMANCE_METRICS: dict[str, tuple[str, float]] = {
+    "JSHeapUsedSize": ("js_heap_used_bytes", 1.0),
+    "Nodes": ("dom_nodes", 1.0),
+    "LayoutCount": ("layouts", 1.0),
+    "RecalcStyleCount": ("style_recalcs", 1.0),
+    "ScriptDuration": ("script_ms", 1000.0),
+    "TaskDuration": ("task_ms", 1000.0),
+}
+
+# Keys summarized as "worst" (highest) across the steps of a run.
+PAGE_METRICS_SUMMARY_KEYS = (
+    "fcp_ms",
+    "lcp_ms",
+    "cls",
+    "long_tasks",
+    "long_task_ms",
+    "ttfb_ms",
+    "load_ms",
+    "js_heap_used_bytes",
+    "dom_nodes",
+)
+
+WEB_VITALS_SCRIPT = """(() => {
+  let s = window.__gsdVitals;
+  if (!s) {
+    s = {fcp: null, lcp: null, cls: 0, longTasks: 0, longTaskMs: 0};
+    const observe = (type, onEntry) => {
+      try {
+        new PerformanceObserver((list) => list.getEntries().forEach(onEntry))
+          .observe({type, buffered: true});
+      } catch (e) {}
+    };
+    observe('paint', (e) => { if (e.name === 'first-contentful-paint') s.fcp = e.startTime; });
+    observe('largest-contentful-paint', (e) => { s.lcp = e.startTime; });
+    observe('layout-shift', (e) => { if (!e.hadRecentInput) s.cls += e.value; });
+    observe('longtask', (e) => { s.longTasks += 1; s.longTaskMs += e.duration; });
+    Object.defineProperty(window, '__gsdVitals', {value: s});
+  }
+  const nav = performance.getEntriesByType('navigation')[0];
+  return {
+    fcp_ms: s.fcp,
+    lcp_ms: s.lcp,
+    cls: s.cls,
+    long_tasks: s.longTasks,
+    long_task_ms: s.longTaskMs,
+    ttfb_ms: nav ? nav.responseStart : null,
+    dom_content_loaded_ms: nav && nav.domContentLoadedEventEnd || null,
+    load_ms: nav && nav.loadEventEnd || null,
+  };
+})()"""
+
+
+@dataclass(frozen=True)
+class PageMetricsConfig:
+    # Off by default: sampling adds two CDP round trips to every agent step.
+    enabled: bool = False
+    timeout_s: float = DEFAULT_PAGE_METRICS_TIMEOUT_S
+
+
+def load_page_metrics_config() -> PageMetricsConfig:
+    """Read the per-step page metrics switch and timeout from the environment."""
+
+    defaults = PageMetricsConfig()
+    timeout_ms = (os.environ.get("GSD_PAGE_METRICS_TIMEOUT_MS") or "").strip()
+    try:
+        timeout_s = int(timeout_ms) / 1000.0 if timeout_ms else defaults.timeout_s
+    except ValueError:
+        timeout_s = defaults.timeout_s
+    return PageMetricsConfig(
+        enabled=os.environ.get("GSD_PAGE_METRICS", "").strip().lower()
+        in {"1", "true", "yes", "on"},
+        timeout_s=max(0.1, timeout_s),
+    )
+
+
+def _round(value: Any) -> float | int | None:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value if isinstance(value, int) else round(float(value), 3 if abs(value) < 1 else 1)
+
+
+def _performance_sample(result: Any) -> dict[str, Any]:
+    metrics = result.get("metrics") if isinstance(result, dict) else None
+    sample: dict[str, Any] = {}
+    for item in metrics if isinstance(metrics, list) else []:
+        if not isinstance(item, dict) or item.get("name") not in _PERFORMANCE_METRICS:
+            continue
+        key, scale = _PERFORMANCE_METRICS[item["name"]]
+        value = item.get("value")
+        if isinstance(value, (int, float)):
+            sample[key] = int(value) if scale == 1.0 else round(float(value) * scale, 1)
+    return sample
+
+
+def _vitals_sample(result: Any) -> dict[str, Any]:
+    remote = result.get("result") if isinstance(result, dict) else None
+    value = remote.get("value") if isinstance(remote, dict) else None
+    if not isinstance(value, dict):
+        return {}
+    sample: dict[str, Any] = {}
+    for key, raw in value.items():
+        rounded = _round(raw)
+        if rounded is not None:
+            sample[str(key)] = rounded
+    return sample
+
+
+class PageMetricsCollector:
+    """Sample page performance for the agent's current CDP session, bounded by a timeout."""
+
+    def __init__(self, *, timeout_s: float = DEFAULT_PAGE_METRICS_TIMEOUT_S) -> None:
+        self._timeout_s = max(0.1, float(timeout_s))
+        # CDP sessions with the Performance domain enabled (one per attached target).
+        self._enabled: set[str] = set()
+
+    async def collect(self, *, cdp_client: Any, cdp_session_id: str | None) -> dict[str, Any]:
+        """Return a flat sample (empty when nothing could be read)."""
+
+        if cdp_client is None or not cdp_session_id:
+            return {}
+        try:
+            return await asyncio.wait_for(
+                self._collect(cdp_client=cdp_client, cdp_session_id=cdp_session_id),
+                timeout=self._timeout_s,
+            )
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to collect page metrics", exc_info=True)
+            return {}
+
+    async def _collect(self, *, cdp_client: Any, cdp_session_id: str) -> dict[str, Any]:
+        if cdp_session_id not in self._enabled:
+            await cdp_call(
+                cdp_client=cdp_client,
+                cdp_session_id=cdp_session_id,
+                method="Performance.enable",
+                params={},
+            )
+            self._enabled.add(cdp_session_id)
+        metrics, vitals = await asyncio.gather(
+            cdp_call(
+                cdp_client=cdp_client,
+                cdp_session_id=cdp_session_id,
+                method="Performance.getMetrics",
+                params={},
+            ),
+            cdp_call(
+                cdp_client=cdp_client,
+                cdp_session_id=cdp_session_id,
+                method="Runtime.evaluate",
+                params={"expression": WEB_VITALS_SCRIPT, "returnByValue": True},
+            ),
+        )
+        return {**_vitals_sample(vitals), **_performance_sample(metrics)}
+
+
+def summarize_page_metrics(samples: list[dict[str, Any]]) -> dict[str, Any]:
+    """Worst (highest) value of each headline metric across steps, and the step it was seen."""
+
+    worst: dict[str, Any] = {}
+    worst_step: dict[str, Any] = {}
+    for sample in samples:
+        for key in PAGE_METRICS_SUMMARY_KEYS:
+            value = sample.get(key)
+            if isinstance(value, (int, float)) and (key not in worst or value > worst[key]):
+                worst[key] = value
+                worst_step[key] = sample.get("step")
+    return {"samples": len(samples), "worst": worst, "worst_step": worst_step}
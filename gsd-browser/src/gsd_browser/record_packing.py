@@ -0,0 +1,96 @@
+"""Compact field storage for long-lived, repetitive records (screenshots, run events).
+
+A mapping is stored as a flat tuple `(keys, *values)`. Key tuples are shared between records
+with the same key set (bounded so arbitrary keys cannot grow the cache without limit), short
+string values are shared through a bounded intern table so repeats cost one pointer, and
+nested mappings are packed recursively. Callers with high-cardinality values (URLs, messages)
+pass `intern_fields` to share only the values of known low-cardinality keys.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Collection
+from typing import Any
+
+MAX_KEY_SETS = 1024
+MAX_INTERNED_VALUES = 8192
+MAX_INTERNED_VALUE_LENGTH = 64
+
+_KEY_SETS: dict[tuple[Any, ...], tuple[Any, ...]] = {}
+_VALUES: dict[str, str] = {}
+
+
+class PackedFields(tuple[Any, ...]):
+    """A packed mapping; the subclass marks nested values that need unpacking."""
+
+    __slots__ = ()
+
+
+def intern_str(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_value(value: str) -> str:
+    """Share `value` through the bounded value table; once it is full, new values are kept."""
+
+    shared = _VALUES.get(value)
+    if shared is None:
+        if len(_VALUES) >= MAX_INTERNED_VALUES:
+            return value
+        shared = _VALUES.setdefault(value, value)
+    return shared
+
+
+def _pack_value(
+    value: Any, intern_limit: int, intern_fields: Collection[str] | None, shared: bool
+) -> Any:
+    if type(value) is str:
+        return intern_value(value) if shared and len(value) <= intern_limit else value
+    if type(value) is dict:
+        return pack_fields(value, intern_limit=intern_limit, intern_fields=intern_fields) or {}
+    return value
+
+
+def pack_fields(
+    mapping: dict[str, Any] | None,
+    *,
+    intern_limit: int = MAX_INTERNED_VALUE_LENGTH,
+    intern_fields: Collection[str] | None = None,
+) -> PackedFields | None:
+    """Pack `mapping`, sharing string values up to `intern_limit` chars.
+
+    With `intern_fields`, only the values of those keys (at any nesting level) are shared.
+    """
+
+    if not mapping:
+        return None
+    keys = tuple(intern_str(key) for key in mapping)
+    shared_keys = _KEY_SETS.get(keys)
+    if shared_keys is None:
+        shared_keys = keys
+        if len(_KEY_SETS) < MAX_KEY_SETS:
+            _KEY_SETS[keys] = keys
+    return PackedFields(
+        (
+            shared_keys,
+            *(
+                _pack_value(
+                    value,
+                    intern_limit,
+                    intern_fields,
+                    intern_fields is None or key in intern_fields,
+                )
+                for key, value in mapping.items()
+            ),
+        )
+    )
+
+
+def unpack_fields(packed: tuple[Any, ...] | None) -> dict[str, Any]:
+    if packed is None:
+        return {}
+    return {
+        key: unpack_fields(value) if type(value) is PackedFields else value
+        for key, value in zip(packed[0], packed[1:], strict=True)
+    }
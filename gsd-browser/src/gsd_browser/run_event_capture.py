@@ -1,16 +1,45 @@
-"""Event capture helpers for populating the RunEventStore during web_eval_agent runs."""
+"""Event capture helpers for populating the RunEventStore during web_eval_agent runs.
+
+CDP handlers run in the websocket dispatch path that browser-use also relies on for agent
+actions, so they only correlate requests and queue raw event tuples. A background task on the
+same loop turns the queue into run events in bounded batches, once per tick. Noise and
+repeated polling requests are counted in the session's network stats instead of being
+recorded as run events (see `capture_filter`).
+
+With `enable_auto_attach`, related targets (out-of-process iframes, workers, popups) are
+attached in flatten mode, so their events arrive on the same client tagged with their own CDP
+session id; they are recorded for the same run session with the target type in `details`.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import inspect
-from collections import OrderedDict
+import logging
+from collections import OrderedDict, deque
 from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any
 from urllib.parse import urlsplit, urlunsplit
 
-from .run_event_store import RunEventStore
+from .capture_filter import CaptureFilterConfig, NetworkCaptureFilter
+from .network_stats import RunNetworkStats
+from .run_event_store import BaseRunEventStore
+
+logger = logging.getLogger("gsd_browser.run_events")
+
+DEFAULT_CAPTURE_FLUSH_INTERVAL_S = 0.05
+DEFAULT_CAPTURE_MAX_BATCH = 250
+DEFAULT_CAPTURE_MAX_BUFFERED = 5000
+DEFAULT_CAPTURE_MAX_TARGETS = 50
+DEFAULT_CAPTURE_MAX_PENDING_PER_TARGET = 200
+
+# Child targets wait for us to enable Runtime/Network before they run, so their first
+# requests and console messages are not missed.
+_AUTO_ATTACH_PARAMS = {"autoAttach": True, "waitForDebuggerOnStart": True, "flatten": True}
+# Target types whose own related targets (nested iframes, their workers) are auto-attached.
+_AUTO_ATTACH_TARGET_TYPES = frozenset({"page", "iframe"})
 
 
 def _now_ts() -> float:
@@ -78,6 +107,60 @@ def _extract_stack_location(stack: dict[str, Any] | None) -> dict[str, Any] | No
     return location or None
 
 
+def _timing_span(timing: dict[str, Any], start_key: str, end_key: str) -> float | None:
+    start, end = timing.get(start_key), timing.get(end_key)
+    if not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+        return None
+    # CDP reports -1 for phases that did not happen (e.g. a reused connection).
+    if start < 0 or end < start:
+        return None
+    return round(float(end) - float(start), 1)
+
+
+def _timing_phases(timing: Any) -> dict[str, float] | None:
+    """Phase durations (ms) from a CDP `Network.ResourceTiming`; phases that did not run are
+    left out. `connect_ms` includes the TLS handshake, which is also reported as `tls_ms`."""
+
+    if not isinstance(timing, dict):
+        return None
+    phases = {
+        "dns_ms": _timing_span(timing, "dnsStart", "dnsEnd"),
+        "connect_ms": _timing_span(timing, "connectStart", "connectEnd"),
+        "tls_ms": _timing_span(timing, "sslStart", "sslEnd"),
+        "ttfb_ms": _timing_span(timing, "sendEnd", "receiveHeadersEnd"),
+    }
+    return {key: value for key, value in phases.items() if value is not None} or None
+
+
+def _response_cache(response: dict[str, Any]) -> str | None:
+    if response.get("fromDiskCache"):
+        return "disk"
+    if response.get("fromPrefetchCache"):
+        return "prefetch"
+    return None
+
+
+async def cdp_call(
+    *, cdp_client: Any, cdp_session_id: str, method: str, params: dict[str, Any]
+) -> Any:
+    """Send a CDP command through a cdp_use-style client and return its result."""
+
+    send_obj = getattr(cdp_client, "send", None)
+    if send_obj is None:
+        raise RuntimeError("cdp_client_missing_send")
+
+    domain, _, command = method.partition(".")
+    typed_domain = getattr(send_obj, domain, None)
+    typed_method = getattr(typed_domain, command, None) if typed_domain is not None else None
+    if callable(typed_method):
+        result = typed_method(params=params or None, session_id=cdp_session_id)
+    elif callable(send_obj):
+        result = send_obj(method, params, session_id=cdp_session_id)
+    else:
+        raise RuntimeError(f"cdp_client_missing_send_surface:{method}")
+    return await result if inspect.isawaitable(result) else result
+
+
 Handler = Callable[[Any, str | None], Any]
 
 
@@ -85,6 +168,7 @@ Handler = Callable[[Any, str | None], Any]
 class _RegisteredHandler:
     method: str
     previous: Handler | None
+    installed: Handler
 
 
 class CDPRunEventCapture:
@@ -94,20 +178,70 @@ class CDPRunEventCapture:
     - cdp_use's EventRegistry supports a single handler per method; this class wraps any
       existing handler so we don't clobber upstream logic.
     - We intentionally avoid capturing response bodies.
+    - Requests matched by `capture_filter` (noise hosts/paths, repeated identical polls) are
+      counted with `RunNetworkStats.record_collapsed` rather than recorded as run events.
+    - When attached from a running event loop, events are queued (at most `max_buffered`; the
+      oldest are dropped and counted beyond that) and recorded `max_batch` at a time every
+      `flush_interval_s`. Without a running loop they are recorded as they arrive.
+    - In-flight requests are tracked per CDP session: `max_pending_requests` for the page,
+      `max_pending_per_target` for each of at most `max_targets` attached child targets.
+      A target's state is dropped when it detaches.
     """
 
     def __init__(
-        self, *, store: RunEventStore, session_id: str, max_pending_requests: int = 2000
+        self,
+        *,
+        store: BaseRunEventStore,
+        session_id: str,
+        max_pending_requests: int = 2000,
+        flush_interval_s: float = DEFAULT_CAPTURE_FLUSH_INTERVAL_S,
+        max_batch: int = DEFAULT_CAPTURE_MAX_BATCH,
+        max_buffered: int = DEFAULT_CAPTURE_MAX_BUFFERED,
+        capture_filter: CaptureFilterConfig | None = None,
+        max_targets: int = DEFAULT_CAPTURE_MAX_TARGETS,
+        max_pending_per_target: int = DEFAULT_CAPTURE_MAX_PENDING_PER_TARGET,
     ) -> None:
         self._store = store
         self._session_id = session_id
         self._register_router: _CDPClientRouter | None = None
         self._register_mode = False
         self._registered: list[_RegisteredHandler] = []
-        self._pending_requests: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # In-flight requests per CDP session id (None: events without a session id).
+        self._pending: dict[str | None, OrderedDict[str, dict[str, Any]]] = {}
         self._max_pending_requests = max(0, max_pending_requests)
+        self._max_pending_per_target = max(0, max_pending_per_target)
+        self._cdp_client: Any = None
+        # Page session auto-attach was enabled on, and attached child targets (session id ->
+        # target type).
+        self._root_session_id: str | None = None
+        self._targets: OrderedDict[str, str] = OrderedDict()
+        self._max_targets = max(0, int(max_targets))
+        self._target_tasks: set[asyncio.Task[None]] = set()
+        # Whether our Target.attachedToTarget handler is installed (it resumes child targets
+        # that wait for the debugger).
+        self._follows_targets = False
+        # Per-host/endpoint counts and duration quantiles, updated as requests complete.
+        network_stats = getattr(store, "network_stats", None)
+        self._network_stats: RunNetworkStats | None = (
+            network_stats(session_id) if callable(network_stats) else None
+        )
+        # Collapsed requests are only counted there, so filtering needs network stats.
+        self._filter: NetworkCaptureFilter | None = (
+            NetworkCaptureFilter(capture_filter) if self._network_stats is not None else None
+        )
+        self._flush_interval_s = max(0.0, float(flush_interval_s))
+        self._max_batch = max(1, int(max_batch))
+        self._max_buffered = max(1, int(max_buffered))
+        # Raw (kind, captured_at, *payload) tuples waiting for the flusher.
+        self._buffer: deque[tuple[Any, ...]] = deque()
+        self._flusher: asyncio.Task[None] | None = None
+        self._recorded = 0
+        self._overflow = 0
+        self._batches = 0
 
     def attach(self, cdp_client: Any) -> None:
+        self._cdp_client = cdp_client
+        self._start_flusher()
         if self._try_attach_via_register(cdp_client):
             return
 
@@ -120,29 +254,155 @@ class CDPRunEventCapture:
         self._wrap_handler(handlers, "Runtime.exceptionThrown", self._on_exception_thrown)
         self._wrap_handler(handlers, "Network.requestWillBeSent", self._on_request_will_be_sent)
         self._wrap_handler(handlers, "Network.responseReceived", self._on_response_received)
+        self._wrap_handler(
+            handlers, "Network.requestServedFromCache", self._on_request_served_from_cache
+        )
         self._wrap_handler(handlers, "Network.loadingFinished", self._on_loading_finished)
         self._wrap_handler(handlers, "Network.loadingFailed", self._on_loading_failed)
+        self._wrap_target_handlers(handlers)
+
+    async def enable_auto_attach(self, cdp_session_id: str) -> bool:
+        """Auto-attach (flatten mode) the iframes, workers and popups of a page session."""
+
+        if self._cdp_client is None or not cdp_session_id:
+            return False
+        params = dict(_AUTO_ATTACH_PARAMS)
+        if not self._follows_targets:
+            # Nothing would resume targets paused on start.
+            params["waitForDebuggerOnStart"] = False
+        try:
+            await cdp_call(
+                cdp_client=self._cdp_client,
+                cdp_session_id=cdp_session_id,
+                method="Target.setAutoAttach",
+                params=params,
+            )
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to enable target auto-attach", exc_info=True)
+            return False
+        self._root_session_id = cdp_session_id
+        # The page may have been seen attaching (e.g. as a browser-level target) before.
+        self._targets.pop(cdp_session_id, None)
+        return True
+
+    def targets(self) -> dict[str, str]:
+        """Attached child targets: CDP session id -> target type."""
+
+        return dict(self._targets)
+
+    def _reset_targets(self) -> None:
+        for task in self._target_tasks:
+            task.cancel()
+        self._target_tasks.clear()
+        self._targets.clear()
+        self._pending.clear()
+        self._root_session_id = None
+        self._cdp_client = None
 
     def detach(self, cdp_client: Any) -> None:
+        self.close()
         if self._register_mode and self._register_router is not None:
             if self._register_router.active_capture is self:
                 self._register_router.active_capture = None
             self._register_router = None
             self._register_mode = False
-            self._pending_requests.clear()
-            return
 
         registry = getattr(cdp_client, "_event_registry", None)
         handlers = getattr(registry, "_handlers", None) if registry else None
-        if not isinstance(handlers, dict):
+        if isinstance(handlers, dict):
+            for entry in reversed(self._registered):
+                # Leave handlers registered after ours alone.
+                if handlers.get(entry.method) is not entry.installed:
+                    continue
+                if entry.previous is None:
+                    handlers.pop(entry.method, None)
+                else:
+                    handlers[entry.method] = entry.previous
+        self._registered.clear()
+        self._follows_targets = False
+        self._reset_targets()
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
             return
-        for entry in reversed(self._registered):
-            if entry.previous is None:
-                handlers.pop(entry.method, None)
+        self._flusher = loop.create_task(self._flush_loop())
+
+    def close(self) -> None:
+        """Stop the background flusher and record whatever is still queued.
+
+        Does not need the CDP client, so it can run when `detach` cannot; events arriving
+        afterwards are recorded as they come. Safe to call more than once.
+        """
+
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+        self.flush()
+        if flusher is not None and self._overflow:
+            logger.warning(
+                "Run event capture for %s dropped %d events (queue full)",
+                self._session_id,
+                self._overflow,
+            )
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval_s)
+            # Bounded batches, yielding between them so agent work is never held up by a
+            # backlog from a heavy page.
+            while self._buffer:
+                self._drain(self._max_batch)
+                await asyncio.sleep(0)
+
+    def flush(self) -> int:
+        """Record every queued event now; returns how many were recorded."""
+
+        recorded = 0
+        while self._buffer:
+            recorded += self._drain(len(self._buffer))
+        return recorded
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self._buffer),
+            "recorded": self._recorded,
+            "dropped": self._overflow,
+            "batches": self._batches,
+        }
+
+    def _push(self, item: tuple[Any, ...]) -> None:
+        if self._flusher is None:
+            self._record(item)
+            return
+        if len(self._buffer) >= self._max_buffered:
+            self._buffer.popleft()
+            self._overflow += 1
+        self._buffer.append(item)
+
+    def _drain(self, max_items: int) -> int:
+        count = min(max_items, len(self._buffer))
+        for _ in range(count):
+            self._record(self._buffer.popleft())
+        self._batches += 1
+        return count
+
+    def _record(self, item: tuple[Any, ...]) -> None:
+        kind, captured_at, *payload = item
+        try:
+            if kind == "console":
+                self._record_console(captured_at, *payload)
+            elif kind == "exception":
+                self._record_exception(captured_at, *payload)
             else:
-                handlers[entry.method] = entry.previous
-        self._registered.clear()
-        self._pending_requests.clear()
+                self._record_network(captured_at, *payload)
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to record %s run event", kind, exc_info=True)
+            return
+        self._recorded += 1
 
     def _wrap_handler(self, handlers: dict[str, Handler], method: str, ours: Handler) -> None:
         previous = handlers.get(method)
@@ -160,7 +420,15 @@ class CDPRunEventCapture:
                 ours(params, cdp_session_id)
 
         handlers[method] = wrapper
-        self._registered.append(_RegisteredHandler(method=method, previous=previous))
+        self._registered.append(
+            _RegisteredHandler(method=method, previous=previous, installed=wrapper)
+        )
+
+    def _wrap_target_handlers(self, handlers: dict[str, Handler]) -> None:
+        # browser-use's SessionManager tracks targets with its own handlers for these events.
+        self._wrap_handler(handlers, "Target.attachedToTarget", self._on_attached_to_target)
+        self._wrap_handler(handlers, "Target.detachedFromTarget", self._on_detached_from_target)
+        self._follows_targets = True
 
     def _try_attach_via_register(self, cdp_client: Any) -> bool:
         register = getattr(cdp_client, "register", None)
@@ -183,7 +451,10 @@ class CDPRunEventCapture:
             getattr(network, "loadingFinished", None) if network is not None else None
         )
         register_failed = getattr(network, "loadingFailed", None) if network is not None else None
-
+        # Optional: memory cache hits are only reported through this event.
+        register_cached = (
+            getattr(network, "requestServedFromCache", None) if network is not None else None
+        )
         if not all(
             callable(fn)
             for fn in (
@@ -207,6 +478,14 @@ class CDPRunEventCapture:
         self._register_router = router
         self._register_mode = True
 
+        # The register API replaces the handler for an event, so Target events are chained to
+        # the current handlers in the registry instead (per capture, restored on detach).
+        # Auto-attached targets are only followed when the registry is reachable.
+        registry = getattr(cdp_client, "_event_registry", None)
+        handlers = getattr(registry, "_handlers", None) if registry else None
+        if isinstance(handlers, dict):
+            self._wrap_target_handlers(handlers)
+
         if router.registered:
             return True
 
@@ -236,6 +515,14 @@ class CDPRunEventCapture:
                 return
             capture._on_response_received(event if isinstance(event, dict) else {}, cdp_session_id)
 
+        def _handle_cached(event: Any, cdp_session_id: str | None = None) -> None:
+            capture = router.active_capture
+            if capture is None:
+                return
+            capture._on_request_served_from_cache(
+                event if isinstance(event, dict) else {}, cdp_session_id
+            )
+
         def _handle_finished(event: Any, cdp_session_id: str | None = None) -> None:
             capture = router.active_capture
             if capture is None:
@@ -254,11 +541,95 @@ class CDPRunEventCapture:
         register_response(_handle_response)
         register_finished(_handle_finished)
         register_failed(_handle_failed)
+        if callable(register_cached):
+            register_cached(_handle_cached)
 
         router.registered = True
         return True
 
-    def _on_console_api_called(self, event: dict[str, Any], _: str | None) -> None:
+    def _on_attached_to_target(self, event: dict[str, Any], parent: str | None) -> None:
+        cdp_session_id = event.get("sessionId")
+        target_info = event.get("targetInfo")
+        info: dict[str, Any] = target_info if isinstance(target_info, dict) else {}
+        if not cdp_session_id or cdp_session_id == self._root_session_id:
+            return
+        # Only targets attached through our own setAutoAttach wait for us; others (e.g. pages
+        # browser-use attaches itself) are resumed by whoever attached them.
+        ours = parent is not None and (parent == self._root_session_id or parent in self._targets)
+        resume = ours and bool(event.get("waitingForDebugger"))
+        if cdp_session_id not in self._targets and len(self._targets) >= self._max_targets:
+            if resume:
+                self._spawn(self._setup_target(cdp_session_id, None, resume=True))
+            return
+        target_type = str(info.get("type") or "other")
+        self._targets[cdp_session_id] = target_type
+        self._spawn(self._setup_target(cdp_session_id, target_type, resume=resume))
+
+    def _on_detached_from_target(self, event: dict[str, Any], _: str | None) -> None:
+        cdp_session_id = event.get("sessionId")
+        if not cdp_session_id:
+            return
+        self._targets.pop(cdp_session_id, None)
+        # Requests still in flight when a target closes are never finished; drop them.
+        self._pending.pop(cdp_session_id, None)
+
+    def _spawn(self, coro: Any) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._target_tasks.add(task)
+        task.add_done_callback(self._target_tasks.discard)
+
+    async def _setup_target(
+        self, cdp_session_id: str, target_type: str | None, *, resume: bool
+    ) -> None:
+        methods: list[tuple[str, dict[str, Any]]] = []
+        if target_type is not None:
+            methods = [("Runtime.enable", {}), ("Network.enable", {})]
+            if target_type in _AUTO_ATTACH_TARGET_TYPES:
+                methods.append(("Target.setAutoAttach", dict(_AUTO_ATTACH_PARAMS)))
+        if resume:
+            methods.append(("Runtime.runIfWaitingForDebugger", {}))
+        for method, params in methods:
+            try:
+                await cdp_call(
+                    cdp_client=self._cdp_client,
+                    cdp_session_id=cdp_session_id,
+                    method=method,
+                    params=params,
+                )
+            except Exception:  # noqa: BLE001
+                # Workers do not support every domain; the target must still be resumed.
+                logger.debug("%s failed for target %s", method, cdp_session_id, exc_info=True)
+
+    def _target_type(self, cdp_session_id: str | None) -> str | None:
+        return self._targets.get(cdp_session_id) if cdp_session_id else None
+
+    def _pending_for(self, cdp_session_id: str | None) -> OrderedDict[str, dict[str, Any]] | None:
+        pending = self._pending.get(cdp_session_id)
+        if pending is not None:
+            return pending
+        tracked = (
+            cdp_session_id is None
+            or cdp_session_id == self._root_session_id
+            or cdp_session_id in self._targets
+        )
+        # Sessions we have not seen attach (e.g. the agent's page before auto-attach is
+        # enabled) are accepted up to the target cap.
+        if not tracked and len(self._pending) >= self._max_targets:
+            return None
+        pending = OrderedDict()
+        self._pending[cdp_session_id] = pending
+        return pending
+
+    def _on_console_api_called(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
+        self._push(("console", _now_ts(), event, self._target_type(cdp_session_id)))
+
+    def _record_console(
+        self, captured_at: float, event: dict[str, Any], target: str | None = None
+    ) -> None:
         level = str(event.get("type") or "log")
         message = _format_console_args(
             event.get("args") if isinstance(event.get("args"), list) else None
@@ -268,16 +639,21 @@ class CDPRunEventCapture:
         )
         self._store.record_console_event(
             self._session_id,
-            captured_at=_now_ts(),
+            captured_at=captured_at,
             level=level,
             message=message,
             location=location,
+            target=target,
         )
 
-    def _on_exception_thrown(self, event: dict[str, Any], _: str | None) -> None:
-        details = (
-            event.get("exceptionDetails") if isinstance(event.get("exceptionDetails"), dict) else {}
-        )
+    def _on_exception_thrown(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
+        self._push(("exception", _now_ts(), event, self._target_type(cdp_session_id)))
+
+    def _record_exception(
+        self, captured_at: float, event: dict[str, Any], target: str | None = None
+    ) -> None:
+        exception_details = event.get("exceptionDetails")
+        details: dict[str, Any] = exception_details if isinstance(exception_details, dict) else {}
         message = str(details.get("text") or "Unhandled exception")
         exception = details.get("exception") if isinstance(details.get("exception"), dict) else None
         if exception:
@@ -297,82 +673,146 @@ class CDPRunEventCapture:
                 location["column"] = int(details["columnNumber"]) + 1
             except Exception:  # noqa: BLE001
                 pass
+        stack_trace = details.get("stackTrace")
         stack_location = _extract_stack_location(
-            details.get("stackTrace") if isinstance(details.get("stackTrace"), dict) else None
+            stack_trace if isinstance(stack_trace, dict) else None
         )
         if stack_location:
             location.update(stack_location)
 
         self._store.record_console_event(
             self._session_id,
-            captured_at=_now_ts(),
+            captured_at=captured_at,
             level="exception",
             message=message,
             location=location or None,
+            target=target,
         )
 
-    def _on_request_will_be_sent(self, event: dict[str, Any], _: str | None) -> None:
+    def _on_request_will_be_sent(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
         request_id = event.get("requestId")
         request = event.get("request") if isinstance(event.get("request"), dict) else None
         if not request_id or not request:
             return
+        pending = self._pending_for(cdp_session_id)
+        if pending is None:
+            return
         url = str(request.get("url") or "")
         method = str(request.get("method") or "")
         start_ts = event.get("timestamp")
         entry = {"method": method, "url": _safe_url(url), "start_ts": start_ts}
+        target_type = self._target_type(cdp_session_id)
+        if target_type is not None:
+            entry["target"] = target_type
+
+        if request_id in pending:
+            pending.move_to_end(request_id)
+        pending[request_id] = entry
+        limit = (
+            self._max_pending_per_target if target_type is not None else self._max_pending_requests
+        )
+        if limit and len(pending) > limit:
+            pending.popitem(last=False)
 
-        if request_id in self._pending_requests:
-            self._pending_requests.move_to_end(request_id)
-        self._pending_requests[request_id] = entry
-        if self._max_pending_requests and len(self._pending_requests) > self._max_pending_requests:
-            self._pending_requests.popitem(last=False)
-
-    def _on_response_received(self, event: dict[str, Any], _: str | None) -> None:
+    def _on_response_received(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
         request_id = event.get("requestId")
         response = event.get("response") if isinstance(event.get("response"), dict) else None
-        if not request_id or request_id not in self._pending_requests or not response:
+        pending = self._pending.get(cdp_session_id)
+        if not request_id or pending is None or request_id not in pending or not response:
             return
-        entry = self._pending_requests[request_id]
+        entry = pending[request_id]
         entry["status"] = response.get("status")
         entry["response_ts"] = event.get("timestamp")
-        self._pending_requests.move_to_end(request_id)
+        # Timing, protocol and cache flags only; headers and bodies are never kept.
+        entry["timing"] = response.get("timing")
+        entry["protocol"] = response.get("protocol")
+        cache = _response_cache(response)
+        if cache is not None:
+            entry["cache"] = cache
+        pending.move_to_end(request_id)
+
+    def _on_request_served_from_cache(
+        self, event: dict[str, Any], cdp_session_id: str | None
+    ) -> None:
+        pending = self._pending.get(cdp_session_id)
+        request_id = event.get("requestId")
+        entry = pending.get(request_id) if pending is not None and request_id else None
+        if entry is not None:
+            entry["cache"] = "memory"
 
-    def _on_loading_finished(self, event: dict[str, Any], _: str | None) -> None:
+    def _pop_pending(self, event: dict[str, Any], cdp_session_id: str | None) -> Any:
+        pending = self._pending.get(cdp_session_id)
         request_id = event.get("requestId")
-        if not request_id or request_id not in self._pending_requests:
+        if pending is None or not request_id:
+            return None
+        return pending.pop(request_id, None)
+
+    def _on_loading_finished(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
+        entry = self._pop_pending(event, cdp_session_id)
+        if entry is None:
             return
-        entry = self._pending_requests.pop(request_id)
-        end_ts = event.get("timestamp")
-        duration_ms = None
-        if isinstance(entry.get("start_ts"), (int, float)) and isinstance(end_ts, (int, float)):
-            duration_ms = max(0.0, (float(end_ts) - float(entry["start_ts"])) * 1000.0)
-        self._store.record_network_event(
-            self._session_id,
-            captured_at=_now_ts(),
-            method=str(entry.get("method") or ""),
-            url=str(entry.get("url") or ""),
-            status=int(entry["status"]) if isinstance(entry.get("status"), (int, float)) else None,
-            duration_ms=duration_ms,
-        )
+        entry["bytes"] = event.get("encodedDataLength")
+        self._push(("network", _now_ts(), entry, event.get("timestamp"), None))
 
-    def _on_loading_failed(self, event: dict[str, Any], _: str | None) -> None:
-        request_id = event.get("requestId")
-        if not request_id or request_id not in self._pending_requests:
+    def _on_loading_failed(self, event: dict[str, Any], cdp_session_id: str | None) -> None:
+        entry = self._pop_pending(event, cdp_session_id)
+        if entry is None:
             return
-        entry = self._pending_requests.pop(request_id)
-        end_ts = event.get("timestamp")
+        error_text = event.get("errorText") or event.get("blockedReason") or "failed"
+        self._push(("network", _now_ts(), entry, event.get("timestamp"), str(error_text)))
+
+    def _record_network(
+        self, captured_at: float, entry: dict[str, Any], end_ts: Any, error: str | None
+    ) -> None:
         duration_ms = None
         if isinstance(entry.get("start_ts"), (int, float)) and isinstance(end_ts, (int, float)):
             duration_ms = max(0.0, (float(end_ts) - float(entry["start_ts"])) * 1000.0)
-        error_text = event.get("errorText") or event.get("blockedReason") or "failed"
+        method = str(entry.get("method") or "")
+        url = str(entry.get("url") or "")
+        status = int(entry["status"]) if isinstance(entry.get("status"), (int, float)) else None
+        transfer_bytes = (
+            int(entry["bytes"]) if isinstance(entry.get("bytes"), (int, float)) else None
+        )
+        protocol = entry.get("protocol")
+        cache = entry.get("cache")
+        phases = _timing_phases(entry.get("timing"))
+        if self._network_stats is not None:
+            self._network_stats.record(
+                method=method,
+                url=url,
+                status=status,
+                duration_ms=duration_ms,
+                failed=error is not None,
+                transfer_bytes=transfer_bytes,
+                from_cache=cache is not None,
+                ttfb_ms=phases.get("ttfb_ms") if phases else None,
+            )
+        reason = (
+            self._filter.classify(method=method, url=url, status=status, error=error)
+            if self._filter is not None
+            else None
+        )
+        if reason is not None and self._network_stats is not None:
+            self._network_stats.record_collapsed(
+                reason=reason,
+                method=method,
+                url=url,
+                duration_ms=duration_ms,
+            )
+            return
         self._store.record_network_event(
             self._session_id,
-            captured_at=_now_ts(),
-            method=str(entry.get("method") or ""),
-            url=str(entry.get("url") or ""),
-            status=int(entry["status"]) if isinstance(entry.get("status"), (int, float)) else None,
+            captured_at=captured_at,
+            method=method,
+            url=url,
+            status=status,
             duration_ms=duration_ms,
-            error=str(error_text),
+            error=error,
+            protocol=str(protocol) if protocol else None,
+            transfer_bytes=transfer_bytes,
+            cache=cache,
+            timing=phases,
+            target=entry.get("target"),
         )
 
 
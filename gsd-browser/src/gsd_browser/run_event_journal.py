@@ -0,0 +1,393 @@
+"""Write-behind journal that lets run events survive MCP server restarts.
+
+`RunEventJournal.append` only queues an event. A background thread writes the queue in
+batches as JSON lines to segment files (`events-00000001.jsonl`, ...), fsyncs at most every
+`fsync_interval_s` and starts a new segment once the current one reaches `max_segment_bytes`.
+A restarted process keeps appending to the newest segment while it has room. Old segments are
+deleted once all segments together exceed `max_bytes` or a segment is older than `max_age_s`.
+
+Next to each segment, a sidecar file (`events-00000001.sessions`) lists the session ids that
+segment holds, one per line. The writer appends a session id to the sidecar before that
+session's first event in the segment. Reading is lazy: nothing is read on startup, the first
+`read_session` loads the sidecars (segments without one, e.g. from an older version, are
+scanned once and get one written), and a lookup parses only the matching lines of the
+segments that hold the requested session. `read_session` does blocking file IO; async
+callers should run it in a worker thread (see `RunEventStore.load_session`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from typing import Any, BinaryIO
+
+logger = logging.getLogger("gsd_browser.run_events")
+
+DEFAULT_JOURNAL_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_JOURNAL_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_JOURNAL_MAX_AGE_S = 7 * 24 * 3600.0
+DEFAULT_JOURNAL_FSYNC_INTERVAL_S = 1.0
+DEFAULT_JOURNAL_FLUSH_INTERVAL_S = 0.25
+
+_SEGMENT_GLOB = "events-*.jsonl"
+_SIDECAR_SUFFIX = ".sessions"
+
+
+def _segment_number(path: Path) -> int:
+    try:
+        return int(path.stem.rpartition("-")[2])
+    except ValueError:
+        return 0
+
+
+def _sidecar(path: Path) -> Path:
+    return path.with_suffix(_SIDECAR_SUFFIX)
+
+
+def _record_prefix(session_id: str) -> bytes:
+    # Records are written with session_id as their first key (see _write_batch).
+    return b'{"session_id":' + json.dumps(session_id, ensure_ascii=False).encode("utf-8") + b","
+
+
+class RunEventJournal:
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        max_segment_bytes: int = DEFAULT_JOURNAL_SEGMENT_BYTES,
+        max_bytes: int = DEFAULT_JOURNAL_MAX_BYTES,
+        max_age_s: float = DEFAULT_JOURNAL_MAX_AGE_S,
+        fsync_interval_s: float = DEFAULT_JOURNAL_FSYNC_INTERVAL_S,
+        flush_interval_s: float = DEFAULT_JOURNAL_FLUSH_INTERVAL_S,
+        batch_size: int = 512,
+        max_pending: int = 50_000,
+    ) -> None:
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._max_segment_bytes = max(1, int(max_segment_bytes))
+        self._max_bytes = max(1, int(max_bytes))
+        self._max_age_s = max(0.0, float(max_age_s))
+        self._fsync_interval_s = max(0.0, float(fsync_interval_s))
+        self._flush_interval_s = max(0.001, float(flush_interval_s))
+        self._batch_size = max(1, int(batch_size))
+        self._max_pending = max(1, int(max_pending))
+
+        # Segments oldest first; shared between the writer and readers under _index_lock.
+        self._segments: list[Path] = sorted(self.directory.glob(_SEGMENT_GLOB), key=_segment_number)
+        self._next_segment = _segment_number(self._segments[-1]) + 1 if self._segments else 1
+        self._file: BinaryIO | None = None
+        self._file_bytes = 0
+        self._sidecar_file: BinaryIO | None = None
+        # Sessions already listed in the current segment's sidecar (writer thread only).
+        self._file_sessions: set[str] = set()
+        self._last_fsync = time.monotonic()
+
+        self._cond = Condition()
+        self._pending: deque[tuple[str, Any]] = deque()
+        # Appends accepted so far, and how many of them the writer has finished with.
+        self._queued = 0
+        self._done = 0
+        self._flush_requested = False
+        self._closed = False
+        self._counts = {"written": 0, "dropped": 0, "failed": 0, "fsyncs": 0, "rotations": 0}
+
+        self._index_lock = Lock()
+        # session id -> segments holding it, for the segments in `_indexed`.
+        self._index: dict[str, set[Path]] = {}
+        self._indexed: set[Path] = set()
+
+        self._thread = Thread(target=self._run, name="gsd-run-event-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, session_id: str, event: Any) -> bool:
+        """Queue `event` for writing; `event.to_dict(include_details=True)` runs on the writer.
+
+        Returns False (and counts a drop) when the journal is closed or the queue is full.
+        """
+
+        with self._cond:
+            if self._closed or len(self._pending) >= self._max_pending:
+                self._counts["dropped"] += 1
+                return False
+            self._pending.append((session_id, event))
+            self._queued += 1
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not (
+                    self._closed or self._flush_requested or len(self._pending) >= self._batch_size
+                ):
+                    self._cond.wait(timeout=self._flush_interval_s)
+                batch = list(self._pending)
+                self._pending.clear()
+                target = self._queued
+                self._flush_requested = False
+                closing = self._closed
+            if batch:
+                self._write_batch(batch)
+            if closing:
+                self._close_file()
+            with self._cond:
+                self._done = target
+                self._cond.notify_all()
+            if closing:
+                return
+
+    def _write_batch(self, batch: list[tuple[str, Any]]) -> None:
+        records: list[tuple[str, bytes]] = []
+        for session_id, event in batch:
+            try:
+                record = {"session_id": session_id, **event.to_dict(include_details=True)}
+                records.append(
+                    (
+                        session_id,
+                        json.dumps(
+                            record, ensure_ascii=False, separators=(",", ":"), default=str
+                        ).encode("utf-8")
+                        + b"\n",
+                    )
+                )
+            except Exception:  # noqa: BLE001
+                logger.debug("Unserializable run event skipped", exc_info=True)
+                self._counts["failed"] += 1
+        if not records:
+            return
+        try:
+            if self._file is None:
+                self._open_segment()
+            elif self._file_bytes >= self._max_segment_bytes:
+                self._rotate()
+            assert self._file is not None and self._sidecar_file is not None
+            new_sessions = list(
+                dict.fromkeys(sid for sid, _ in records if sid not in self._file_sessions)
+            )
+            if new_sessions:
+                # The sidecar is written first, so it never misses a session of the segment.
+                self._sidecar_file.write("".join(f"{sid}\n" for sid in new_sessions).encode())
+                self._sidecar_file.flush()
+                self._file_sessions.update(new_sessions)
+                path = self._segments[-1]
+                with self._index_lock:
+                    if path in self._indexed:
+                        for sid in new_sessions:
+                            self._index.setdefault(sid, set()).add(path)
+            payload = b"".join(line for _, line in records)
+            self._file.write(payload)
+            self._file.flush()
+            self._file_bytes += len(payload)
+            now = time.monotonic()
+            if now - self._last_fsync >= self._fsync_interval_s:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+                self._counts["fsyncs"] += 1
+            self._counts["written"] += len(records)
+        except OSError:
+            logger.warning("Run event journal write failed", exc_info=True)
+            self._counts["failed"] += len(records)
+
+    def _open_segment(self) -> None:
+        """Continue the newest segment while it has room (after a restart), else rotate."""
+
+        last = self._segments[-1] if self._segments else None
+        try:
+            size = last.stat().st_size if last is not None else self._max_segment_bytes
+        except OSError:
+            size = self._max_segment_bytes
+        if last is None or size >= self._max_segment_bytes:
+            self._rotate()
+            return
+        self._file = last.open("ab")
+        self._file_bytes = size
+        if size:
+            with last.open("rb") as handle:
+                handle.seek(size - 1)
+                if handle.read(1) != b"\n":
+                    # Terminate a line torn by a crash so the next record starts cleanly.
+                    self._file.write(b"\n")
+                    self._file_bytes += 1
+        self._file_sessions = (
+            self._read_sidecar(last) if _sidecar(last).exists() else self._scan_segment(last)
+        )
+        self._sidecar_file = _sidecar(last).open("ab")
+        self._expire()
+
+    def _rotate(self) -> None:
+        self._close_file()
+        path = self.directory / f"events-{self._next_segment:08d}.jsonl"
+        self._next_segment += 1
+        self._file = path.open("ab")
+        self._file_bytes = 0
+        self._sidecar_file = _sidecar(path).open("ab")
+        self._file_sessions = set()
+        with self._index_lock:
+            self._segments.append(path)
+            # Empty so far: nothing to load, the writer adds its sessions as it goes.
+            self._indexed.add(path)
+        self._counts["rotations"] += 1
+        self._expire()
+
+    def _expire(self) -> None:
+        """Delete the oldest segments beyond `max_bytes` or `max_age_s` (never the current)."""
+
+        now = time.time()
+        with self._index_lock:
+            candidates = self._segments[:-1]
+        sizes: dict[Path, int] = {}
+        expired: list[Path] = []
+        for path in candidates:
+            try:
+                stat = path.stat()
+            except OSError:
+                expired.append(path)
+                continue
+            if self._max_age_s and now - stat.st_mtime > self._max_age_s:
+                expired.append(path)
+            else:
+                sizes[path] = stat.st_size
+        total = sum(sizes.values()) + self._file_bytes
+        for path in candidates:
+            if total <= self._max_bytes:
+                break
+            if path in sizes:
+                total -= sizes.pop(path)
+                expired.append(path)
+        if not expired:
+            return
+        gone = set(expired)
+        with self._index_lock:
+            self._segments = [path for path in self._segments if path not in gone]
+            self._indexed -= gone
+            for session_id in list(self._index):
+                paths = self._index[session_id]
+                paths -= gone
+                if not paths:
+                    del self._index[session_id]
+        for path in expired:
+            path.unlink(missing_ok=True)
+            _sidecar(path).unlink(missing_ok=True)
+
+    def _close_file(self) -> None:
+        if self._sidecar_file is not None:
+            self._sidecar_file.close()
+            self._sidecar_file = None
+        if self._file is None:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._counts["fsyncs"] += 1
+        except OSError:
+            logger.debug("Run event journal fsync failed", exc_info=True)
+        self._file.close()
+        self._file = None
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far has been written; False on timeout."""
+
+        with self._cond:
+            target = self._queued
+            if self._done >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._done >= target or not self._thread.is_alive(), timeout
+            )
+
+    @staticmethod
+    def _read_sidecar(path: Path) -> set[str]:
+        try:
+            text = _sidecar(path).read_text(encoding="utf-8")
+        except OSError:
+            return set()
+        return {line for line in text.split("\n") if line}
+
+    @staticmethod
+    def _scan_segment(path: Path) -> set[str]:
+        """Build (and write) the sidecar of a segment that has none."""
+
+        sessions: set[str] = set()
+        try:
+            with path.open("rb") as handle:
+                for line in handle:
+                    try:
+                        session_id = json.loads(line).get("session_id")
+                    except (ValueError, AttributeError):
+                        continue
+                    if isinstance(session_id, str):
+                        sessions.add(session_id)
+            _sidecar(path).write_text("".join(f"{sid}\n" for sid in sessions), encoding="utf-8")
+        except OSError:
+            logger.debug("Failed to index run event journal segment %s", path, exc_info=True)
+        return sessions
+
+    def _load_index_locked(self) -> None:
+        for path in self._segments:
+            if path in self._indexed:
+                continue
+            if _sidecar(path).exists():
+                sessions = self._read_sidecar(path)
+            else:
+                sessions = self._scan_segment(path)
+            for session_id in sessions:
+                self._index.setdefault(session_id, set()).add(path)
+            self._indexed.add(path)
+
+    def read_session(self, session_id: str) -> list[dict[str, Any]]:
+        """Return the journaled events of `session_id` in write order (without session_id)."""
+
+        with self._index_lock:
+            self._load_index_locked()
+            paths = [path for path in self._segments if path in self._index.get(session_id, ())]
+
+        prefix = _record_prefix(session_id)
+        events: list[dict[str, Any]] = []
+        for path in paths:
+            try:
+                with path.open("rb") as handle:
+                    chunk = handle.read()
+            except OSError:
+                continue
+            # A trailing line still being written has no newline yet and is skipped.
+            for line in chunk[: chunk.rfind(b"\n") + 1].splitlines():
+                if not line.startswith(prefix):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.pop("session_id", None) == session_id:
+                    events.append(record)
+        return events
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+            counts = dict(self._counts)
+        with self._index_lock:
+            segments = len(self._segments)
+        return {
+            "directory": str(self.directory),
+            "pending": pending,
+            "segments": segments,
+            **counts,
+        }
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Write everything still queued, fsync, and stop the writer thread."""
+
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
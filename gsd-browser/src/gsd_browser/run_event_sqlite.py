@@ -0,0 +1,562 @@
+"""SQLite-backed run event store, for runs whose events should outlive the process.
+
+Recording an event only queues a row in memory. A background thread inserts the queue with
+one `executemany` per batch, as soon as `batch_size` rows are pending and otherwise every
+`flush_interval_s`; reads flush whatever is still queued first. The state lock is held only
+to hand a batch over, not during the insert, so recording never waits on the database. The
+database runs in WAL mode so readers are not blocked by the batch writer. Every `get_events`
+filter is pushed down into the query and served by the indexes below.
+
+Per-session, per-type caps, the separate error cap and the `max_sessions` LRU limit match
+`RunEventStore`; page metrics samples are batched the same way and deleted with their
+session. Row counts and recency are mirrored in memory so caps are enforced without counting
+rows on each insert. Row ids are the event sequence numbers (`seq`); they are assigned when an
+event is recorded and the high-water mark is kept in `run_meta`, so numbers are never reused,
+even after the newest rows are pruned and the process restarts.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from typing import Any
+
+from .run_event_store import _EVENT_KINDS, BaseRunEventStore
+
+logger = logging.getLogger("gsd_browser.run_events")
+
+DEFAULT_SQLITE_BATCH_SIZE = 1024
+DEFAULT_SQLITE_FLUSH_INTERVAL_S = 0.5
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS run_events (
+        id INTEGER PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        summary TEXT NOT NULL,
+        has_error INTEGER NOT NULL,
+        details TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS run_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS run_page_metrics (
+        id INTEGER PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        sample TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS run_page_metrics_session ON run_page_metrics (session_id, id)",
+    """
+    CREATE TABLE IF NOT EXISTS run_sessions (
+        session_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        last_used INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS run_events_type_time"
+    " ON run_events (session_id, event_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS run_events_error ON run_events (session_id, has_error, timestamp)",
+    # Ring eviction deletes the oldest rows of one (session, kind) or of the session's
+    # errors by insertion order.
+    "DROP INDEX IF EXISTS run_events_kind",
+    "CREATE INDEX IF NOT EXISTS run_events_ring ON run_events (session_id, has_error, kind, id)",
+    # Queries across all sessions.
+    "CREATE INDEX IF NOT EXISTS run_events_time ON run_events (timestamp)",
+)
+
+_BUCKETS = (*_EVENT_KINDS, "error")
+
+_INSERT_EVENT = (
+    "INSERT INTO run_events"
+    " (session_id, kind, event_type, timestamp, summary, has_error, details, id)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_UPSERT_LAST_SEQ = (
+    "INSERT INTO run_meta (key, value) VALUES ('last_seq', ?)"
+    " ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+)
+_INSERT_PAGE_METRICS = "INSERT INTO run_page_metrics (session_id, sample) VALUES (?, ?)"
+_UPSERT_SESSION = (
+    "INSERT INTO run_sessions (session_id, created_at, last_used) VALUES (?, ?, ?)"
+    " ON CONFLICT (session_id) DO UPDATE SET last_used = excluded.last_used"
+)
+
+
+@dataclass
+class _SqliteSession:
+    created_at: float
+    last_used: int
+    # Rows per ring ("agent", "console", "network" without errors, and "error") in the
+    # database plus pending rows; trimmed back to the caps on flush.
+    counts: dict[str, int] = field(default_factory=lambda: dict.fromkeys(_BUCKETS, 0))
+    # Error rows per kind, included in counts["error"].
+    error_counts: dict[str, int] = field(default_factory=lambda: dict.fromkeys(_EVENT_KINDS, 0))
+    dropped: dict[str, int] = field(default_factory=lambda: dict.fromkeys(_EVENT_KINDS, 0))
+    # Page metrics rows in the database plus pending ones, trimmed like `counts`.
+    page_metrics: int = 0
+
+
+class SqliteRunEventStore(BaseRunEventStore):
+    """Run event store persisted to SQLite (`config.sqlite_path`, or in memory when None)."""
+
+    def __init__(
+        self,
+        *,
+        path: str | Path | None = None,
+        batch_size: int = DEFAULT_SQLITE_BATCH_SIZE,
+        flush_interval_s: float = DEFAULT_SQLITE_FLUSH_INTERVAL_S,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        target = path if path is not None else self._config.sqlite_path
+        if target is None or str(target) == ":memory:":
+            database = ":memory:"
+        else:
+            resolved = Path(target).expanduser()
+            resolved.parent.mkdir(parents=True, exist_ok=True)
+            database = str(resolved)
+        self.path = database
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval_s = max(0.0, float(flush_interval_s))
+
+        # `_db_lock` serializes database access (flushes and queries); `_lock` guards the
+        # in-memory state below and is never held across a database call. Lock order:
+        # `_db_lock`, then `_lock`.
+        self._db_lock = Lock()
+        self._lock = Lock()
+        self._wake = Condition(self._lock)
+        self._closed = False
+        # Autocommit mode; batches are wrapped in explicit transactions.
+        self._conn: sqlite3.Connection | None = sqlite3.connect(
+            database, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+        self._pending: list[tuple[Any, ...]] = []
+        self._pending_page_metrics: list[tuple[str, str]] = []
+        self._dirty_sessions: set[str] = set()
+        self._deleted_sessions: set[str] = set()
+        self._tick = 0
+        # Sequence number (row id) of the newest recorded event.
+        self._seq = 0
+        # Least recently used first, like RunEventStore._sessions.
+        self._sessions: OrderedDict[str, _SqliteSession] = OrderedDict()
+        self._load_sessions()
+        with self._lock:
+            self._prune_locked()
+        self._flush()
+        self._thread = Thread(target=self._run, name="gsd-run-events-sqlite", daemon=True)
+        self._thread.start()
+
+    def _load_sessions(self) -> None:
+        assert self._conn is not None
+        (self._seq,) = self._conn.execute(
+            "SELECT MAX((SELECT COALESCE(MAX(id), 0) FROM run_events),"
+            " (SELECT COALESCE(MAX(value), 0) FROM run_meta WHERE key = 'last_seq'))"
+        ).fetchone()
+        rows = self._conn.execute(
+            "SELECT session_id, created_at, last_used FROM run_sessions ORDER BY last_used"
+        ).fetchall()
+        for session_id, created_at, last_used in rows:
+            self._sessions[session_id] = _SqliteSession(
+                created_at=float(created_at), last_used=int(last_used)
+            )
+            self._tick = max(self._tick, int(last_used))
+        for session_id, kind, has_error, count in self._conn.execute(
+            "SELECT session_id, kind, has_error, COUNT(*) FROM run_events"
+            " GROUP BY session_id, kind, has_error"
+        ):
+            session = self._sessions.get(session_id)
+            if session is None:
+                self._tick += 1
+                session = _SqliteSession(created_at=0.0, last_used=self._tick)
+                self._sessions[session_id] = session
+                self._dirty_sessions.add(session_id)
+            if has_error:
+                session.counts["error"] += int(count)
+                session.error_counts[kind] = int(count)
+            else:
+                session.counts[kind] = int(count)
+        for session_id, count in self._conn.execute(
+            "SELECT session_id, COUNT(*) FROM run_page_metrics GROUP BY session_id"
+        ):
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.page_metrics = int(count)
+            else:
+                # Orphaned by an interrupted prune; delete on the first flush.
+                self._deleted_sessions.add(session_id)
+
+    def _cap(self, kind: str) -> int:
+        return max(0, int(getattr(self._config, f"max_{kind}_events")))
+
+    def _page_metrics_cap(self) -> int:
+        # One sample per agent step, like RunEventStore.
+        return max(1, self._config.max_agent_events)
+
+    def _touch_locked(self, session_id: str, *, created_at: float) -> _SqliteSession:
+        self._tick += 1
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _SqliteSession(created_at=created_at, last_used=self._tick)
+            self._sessions[session_id] = session
+            self._prune_locked()
+        else:
+            session.last_used = self._tick
+            self._sessions.move_to_end(session_id)
+        self._dirty_sessions.add(session_id)
+        return session
+
+    def ensure_session(self, session_id: str, *, created_at: float) -> None:
+        with self._lock:
+            self._touch_locked(session_id, created_at=created_at)
+
+    def _store_event(
+        self,
+        *,
+        session_id: str,
+        event_type: str,
+        timestamp: float,
+        summary: str,
+        details: dict[str, Any],
+        has_error: bool,
+    ) -> int | None:
+        # Unknown event types are stored with the agent events.
+        kind = event_type if event_type in _EVENT_KINDS else "agent"
+        values = (
+            session_id,
+            kind,
+            event_type,
+            timestamp,
+            summary,
+            int(has_error),
+            json.dumps(details, ensure_ascii=False, separators=(",", ":"), default=str)
+            if details
+            else None,
+        )
+        with self._lock:
+            if self._conn is None:
+                return None
+            session = self._touch_locked(session_id, created_at=timestamp)
+            if session_id not in self._sessions:
+                # Pruned straight away (max_sessions <= 0), as RunEventStore would.
+                return None
+            session.counts["error" if has_error else kind] += 1
+            if has_error:
+                session.error_counts[kind] += 1
+            self._seq += 1
+            seq = self._seq
+            self._pending.append((*values, seq))
+            if len(self._pending) == self._batch_size:
+                self._wake.notify()
+        return seq
+
+    def _store_page_metrics(
+        self, session_id: str, sample: dict[str, Any], *, created_at: float
+    ) -> None:
+        encoded = json.dumps(sample, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._conn is None:
+                return
+            session = self._touch_locked(session_id, created_at=created_at)
+            if session_id not in self._sessions:
+                return
+            session.page_metrics += 1
+            self._pending_page_metrics.append((session_id, encoded))
+
+    def get_page_metrics(self, session_id: str) -> list[dict[str, Any]]:
+        with self._db_lock:
+            with self._lock:
+                conn = self._conn
+                if conn is None or session_id not in self._sessions:
+                    return []
+                if self._config.refresh_on_access:
+                    self._touch_locked(session_id, created_at=0.0)
+            self._flush_db_locked()
+            rows = conn.execute(
+                "SELECT sample FROM run_page_metrics WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                if not self._closed and len(self._pending) < self._batch_size:
+                    self._wake.wait(max(0.01, self._flush_interval_s))
+                if self._closed:
+                    return
+            try:
+                self._flush()
+            except sqlite3.Error:
+                logger.warning("Run event batch insert failed", exc_info=True)
+
+    def _flush(self) -> None:
+        with self._db_lock:
+            self._flush_db_locked()
+
+    def _flush_db_locked(self) -> None:
+        """Insert the queued rows and trim the rings; the caller holds `_db_lock`."""
+
+        with self._lock:
+            conn = self._conn
+            if conn is None or not (
+                self._pending
+                or self._pending_page_metrics
+                or self._dirty_sessions
+                or self._deleted_sessions
+            ):
+                return
+            rows, self._pending = self._pending, []
+            samples, self._pending_page_metrics = self._pending_page_metrics, []
+            dirty, self._dirty_sessions = self._dirty_sessions, set()
+            deleted, self._deleted_sessions = self._deleted_sessions, set()
+            last_seq = self._seq
+            sessions = [
+                (session_id, session.created_at, session.last_used)
+                for session_id in dirty
+                if (session := self._sessions.get(session_id)) is not None
+            ]
+            # Every counted row is now either in the database or in `rows`, so the excess
+            # over each cap is exactly what has to be deleted once `rows` are inserted.
+            trims: list[tuple[str, _SqliteSession, str, int]] = []
+            for session_id, bucket in {(row[0], "error" if row[5] else row[1]) for row in rows}:
+                session = self._sessions.get(session_id)
+                excess = session.counts[bucket] - self._cap(bucket) if session else 0
+                if session is None or excess <= 0:
+                    continue
+                session.counts[bucket] -= excess
+                if bucket != "error":
+                    session.dropped[bucket] += excess
+                trims.append((session_id, session, bucket, excess))
+            sample_trims: list[tuple[str, int]] = []
+            for session_id in {row[0] for row in samples}:
+                session = self._sessions.get(session_id)
+                excess = session.page_metrics - self._page_metrics_cap() if session else 0
+                if session is not None and excess > 0:
+                    session.page_metrics -= excess
+                    sample_trims.append((session_id, excess))
+
+        evicted_errors: list[tuple[_SqliteSession, list[str]]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for session_id in deleted:
+                conn.execute("DELETE FROM run_events WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM run_sessions WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM run_page_metrics WHERE session_id = ?", (session_id,))
+            if samples:
+                conn.executemany(_INSERT_PAGE_METRICS, samples)
+            for session_id, excess in sample_trims:
+                conn.execute(
+                    "DELETE FROM run_page_metrics WHERE id IN (SELECT id FROM run_page_metrics"
+                    " WHERE session_id = ? ORDER BY id LIMIT ?)",
+                    (session_id, excess),
+                )
+            if rows:
+                conn.executemany(_INSERT_EVENT, rows)
+                conn.execute(_UPSERT_LAST_SEQ, (last_seq,))
+            for session_id, session, bucket, excess in trims:
+                kinds = self._trim(conn, session_id, bucket, excess)
+                if kinds:
+                    evicted_errors.append((session, kinds))
+            conn.executemany(_UPSERT_SESSION, sessions)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted_errors:
+            with self._lock:
+                for session, kinds in evicted_errors:
+                    for kind in kinds:
+                        session.error_counts[kind] -= 1
+                        session.dropped[kind] += 1
+
+    @staticmethod
+    def _trim(conn: sqlite3.Connection, session_id: str, bucket: str, excess: int) -> list[str]:
+        """Delete the `excess` oldest rows of a ring; return the kinds of evicted errors."""
+
+        if bucket == "error":
+            evicted = conn.execute(
+                "SELECT id, kind FROM run_events WHERE session_id = ? AND has_error = 1"
+                " ORDER BY id LIMIT ?",
+                (session_id, excess),
+            ).fetchall()
+            conn.executemany("DELETE FROM run_events WHERE id = ?", [(row[0],) for row in evicted])
+            return [kind for _row_id, kind in evicted]
+        conn.execute(
+            "DELETE FROM run_events WHERE id IN (SELECT id FROM run_events"
+            " WHERE session_id = ? AND has_error = 0 AND kind = ? ORDER BY id LIMIT ?)",
+            (session_id, bucket, excess),
+        )
+        return []
+
+    def _prune_locked(self) -> None:
+        max_sessions = max(0, self._config.max_sessions)
+        if max_sessions and len(self._sessions) <= max_sessions:
+            return
+        evicted: list[str] = []
+        while self._sessions and (not max_sessions or len(self._sessions) > max_sessions):
+            session_id, _session = self._sessions.popitem(last=False)
+            evicted.append(session_id)
+        if not evicted:
+            return
+        gone = set(evicted)
+        self._deleted_sessions.update(gone)
+        self._dirty_sessions.difference_update(gone)
+        if self._pending:
+            self._pending = [row for row in self._pending if row[0] not in gone]
+        if self._pending_page_metrics:
+            self._pending_page_metrics = [
+                row for row in self._pending_page_metrics if row[0] not in gone
+            ]
+
+    def get_events(
+        self,
+        *,
+        session_id: str | None = None,
+        last_n: int = 50,
+        event_types: list[str] | None = None,
+        from_timestamp: float | None = None,
+        has_error: bool | None = None,
+        include_details: bool = False,
+        since_seq: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return matching events newest first; every filter is part of the SQL query.
+
+        With `since_seq`, return the events recorded after it, oldest first (see
+        `RunEventStore.get_events`).
+        """
+
+        normalized_types = (
+            sorted({str(item).strip() for item in event_types if str(item).strip()})
+            if event_types
+            else []
+        )
+        clauses: list[str] = []
+        params: list[Any] = []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if normalized_types:
+            clauses.append(f"event_type IN ({', '.join('?' * len(normalized_types))})")
+            params.extend(normalized_types)
+        if from_timestamp is not None:
+            clauses.append("timestamp >= ?")
+            params.append(float(from_timestamp))
+        if has_error is not None:
+            clauses.append("has_error = ?")
+            params.append(int(bool(has_error)))
+        if since_seq is not None:
+            cursor = max(0, int(since_seq))
+            clauses.append("id > ?")
+            # A cursor ahead of every recorded event comes from another database; start over.
+            params.append(cursor if cursor <= self._seq else 0)
+        limit = max(0, int(last_n)) if last_n is not None else 0
+        query = (
+            "SELECT session_id, event_type, timestamp, summary, has_error, id"
+            f"{', details' if include_details else ''} FROM run_events"
+            f"{' WHERE ' + ' AND '.join(clauses) if clauses else ''}"
+            f"{' ORDER BY id' if since_seq is not None else ' ORDER BY timestamp DESC, id DESC'}"
+        )
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._db_lock:
+            with self._lock:
+                conn = self._conn
+                if conn is None:
+                    return []
+                if session_id is not None and self._config.refresh_on_access:
+                    if session_id in self._sessions:
+                        self._touch_locked(session_id, created_at=0.0)
+            self._flush_db_locked()
+            rows = conn.execute(query, params).fetchall()
+
+        results: list[dict[str, Any]] = []
+        for row in rows:
+            item: dict[str, Any] = {
+                "seq": row[5],
+                "event_type": row[1],
+                "timestamp": row[2],
+                "summary": row[3],
+                "has_error": bool(row[4]),
+            }
+            if include_details and row[6]:
+                item["details"] = json.loads(row[6])
+            if session_id is None:
+                item["session_id"] = row[0]
+            results.append(item)
+        return results
+
+    def get_counts(self, session_id: str) -> dict[str, int]:
+        with self._db_lock:
+            self._flush_db_locked()
+            with self._lock:
+                session = self._sessions.get(session_id)
+                if session is None:
+                    return {"agent": 0, "console": 0, "network": 0, "total": 0}
+                if self._config.refresh_on_access:
+                    self._touch_locked(session_id, created_at=session.created_at)
+                # Rows recorded since the flush are counted, but never beyond their ring's cap.
+                counts = {
+                    kind: min(session.counts[kind], self._cap(kind)) + session.error_counts[kind]
+                    for kind in _EVENT_KINDS
+                }
+        return {**counts, "total": sum(counts.values())}
+
+    def get_dropped(self, session_id: str | None = None) -> dict[str, int]:
+        # Drops are counted when a flush trims the rings back to their caps.
+        self._flush()
+        with self._lock:
+            if session_id is None:
+                sessions = list(self._sessions.values())
+            else:
+                session = self._sessions.get(session_id)
+                sessions = [] if session is None else [session]
+            dropped = dict.fromkeys(_EVENT_KINDS, 0)
+            for session in sessions:
+                for kind, value in session.dropped.items():
+                    dropped[kind] += value
+        return {**dropped, "total": sum(dropped.values())}
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write pending rows now, on the calling thread; `timeout` is not used."""
+
+        self._flush()
+        return True
+
+    def close(self) -> None:
+        """Stop the flusher, write pending rows and close the connection.
+
+        Later writes are ignored.
+        """
+
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        with self._db_lock:
+            self._flush_db_locked()
+            with self._lock:
+                if self._conn is None:
+                    return
+                self._conn.close()
+                self._conn = None
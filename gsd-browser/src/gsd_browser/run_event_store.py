@@ -1,12 +1,44 @@
-"""In-memory run event store keyed by web_eval_agent session_id."""
+"""Run event stores keyed by web_eval_agent session_id.
+
+`RunEventStore` keeps events in memory; `SqliteRunEventStore` (run_event_sqlite.py) persists
+them. Pick one with `create_run_event_store`, which follows `RunEventStoreConfig.backend`.
+"""
 
 from __future__ import annotations
 
-from collections import deque
-from dataclasses import dataclass, field
+import asyncio
+import heapq
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, replace
+from itertools import count, islice, repeat
 from threading import Lock
 from typing import Any
 
+from .network_stats import RunNetworkStats
+from .record_packing import PackedFields, intern_str, pack_fields, unpack_fields
+from .run_event_journal import (
+    DEFAULT_JOURNAL_FSYNC_INTERVAL_S,
+    DEFAULT_JOURNAL_MAX_AGE_S,
+    DEFAULT_JOURNAL_MAX_BYTES,
+    DEFAULT_JOURNAL_SEGMENT_BYTES,
+    RunEventJournal,
+)
+from .run_event_subscriptions import (
+    DEFAULT_SUBSCRIPTION_QUEUE,
+    RunEventHub,
+    RunEventSubscription,
+)
+from .user_config import default_config_dir
+
+_EVENT_KINDS = ("agent", "console", "network")
+# Detail fields with few distinct values, shared between events through the bounded intern
+# table; URLs, messages and other free-form values are stored per event.
+_INTERNED_DETAIL_FIELDS = frozenset({"method", "level", "type", "host", "protocol", "cache"})
+RUN_EVENT_BACKENDS = ("memory", "sqlite")
+
 
 def _truncate(value: str, *, max_len: int) -> str:
     if max_len <= 0:
@@ -16,29 +48,230 @@ def _truncate(value: str, *, max_len: int) -> str:
     return value[: max(0, max_len - 1)] + "…"
 
 
+def _parse_int(value: str | None, *, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
+
+def _network_summary(details: dict[str, Any]) -> str:
+    return f"{details.get('method', '')} {details.get('url', '')}".strip()
+
+
+@dataclass(frozen=True, slots=True)
+class _RunEvent:
+    """One stored event; the public dict is only built by `to_dict` when it is returned.
+
+    Details are packed with the low-cardinality fields in `_INTERNED_DETAIL_FIELDS` (method,
+    level, host, ...) interned; URLs and messages are stored per event. A network summary equal
+    to "METHOD URL" is not stored but rebuilt from the details.
+    """
+
+    event_type: str
+    timestamp: float
+    summary: str | None
+    has_error: bool
+    details: PackedFields | None
+    # Store-wide sequence number, increasing in recording order (the `since_seq` cursor).
+    seq: int = 0
+
+    def with_seq(self, seq: int) -> _RunEvent:
+        return _RunEvent(
+            self.event_type, self.timestamp, self.summary, self.has_error, self.details, seq
+        )
+
+    def to_dict(self, *, include_details: bool) -> dict[str, Any]:
+        details = unpack_fields(self.details)
+        payload: dict[str, Any] = {
+            "seq": self.seq,
+            "event_type": self.event_type,
+            "timestamp": self.timestamp,
+            "summary": self.summary if self.summary is not None else _network_summary(details),
+            "has_error": self.has_error,
+        }
+        if include_details and details:
+            payload["details"] = details
+        return payload
+
+
+def _event_timestamp(event: _RunEvent) -> float:
+    return event.timestamp
+
+
+def _event_kind(event: _RunEvent) -> str:
+    # Unknown event types are stored and counted with the agent events.
+    return event.event_type if event.event_type in _EVENT_KINDS else "agent"
+
+
+def _newest_first(
+    events: deque[_RunEvent],
+    *,
+    ordered: bool,
+    from_timestamp: float | None,
+    accept: Callable[[_RunEvent], bool],
+) -> Iterator[_RunEvent]:
+    """Yield accepted events newest first, stopping at the first one before from_timestamp.
+
+    `ordered` deques are walked backwards in place; the rare deque holding out-of-order
+    timestamps is sorted (by reference) first. Ties keep the newest-recorded event first.
+    """
+
+    candidates = (
+        reversed(events)
+        if ordered
+        else sorted(reversed(events), key=_event_timestamp, reverse=True)
+    )
+    for event in candidates:
+        if from_timestamp is not None and event.timestamp < from_timestamp:
+            return
+        if accept(event):
+            yield event
+
+
+def _after_seq(
+    events: deque[_RunEvent],
+    *,
+    since_seq: int,
+    from_timestamp: float | None,
+    accept: Callable[[_RunEvent], bool],
+) -> list[_RunEvent]:
+    """Return accepted events with seq > since_seq, oldest first.
+
+    Events are appended in sequence order, so the walk back from the newest end stops at the
+    first event at or before the cursor.
+    """
+
+    selected: list[_RunEvent] = []
+    for event in reversed(events):
+        if event.seq <= since_seq:
+            break
+        if from_timestamp is not None and event.timestamp < from_timestamp:
+            continue
+        if accept(event):
+            selected.append(event)
+    selected.reverse()
+    return selected
+
+
 @dataclass(frozen=True)
 class RunEventStoreConfig:
     max_sessions: int = 50
     max_agent_events: int = 200
     max_console_events: int = 200
     max_network_events: int = 500
+    # Error events (any type) are kept in their own per-session buffer with this cap, so a
+    # flood of successful events cannot evict them and has_error queries only walk errors.
+    # Values below 1 are raised to 1.
+    max_error_events: int = 200
     max_url_len: int = 1000
     max_message_len: int = 2000
     max_summary_len: int = 1000
+    # Sessions are pruned least-recently-used first. Recording an event always counts as a
+    # use; session-scoped reads (get_events(session_id=...), get_counts) count when True.
+    refresh_on_access: bool = True
+    # Optional write-behind journal (segmented JSONL) so sessions survive restarts; sessions
+    # missing from memory are replayed from it on first access. None disables it.
+    journal_dir: str | None = None
+    journal_segment_bytes: int = DEFAULT_JOURNAL_SEGMENT_BYTES
+    # Oldest segments are deleted beyond this total size or age.
+    journal_max_bytes: int = DEFAULT_JOURNAL_MAX_BYTES
+    journal_max_age_s: float = DEFAULT_JOURNAL_MAX_AGE_S
+    journal_fsync_interval_s: float = DEFAULT_JOURNAL_FSYNC_INTERVAL_S
+    # "memory" (default) or "sqlite"; the SQLite store ignores the journal settings.
+    backend: str = "memory"
+    # SQLite database file; None keeps the database in memory (":memory:").
+    sqlite_path: str | None = None
+
+
+def load_run_event_store_config() -> RunEventStoreConfig:
+    """Read the run event backend, error cap and journal settings from the environment."""
+
+    defaults = RunEventStoreConfig()
+    enabled = os.environ.get("GSD_RUN_EVENTS_JOURNAL", "").strip().lower() in {
+        "1",
+        "true",
+        "yes",
+        "on",
+    }
+    journal_dir = (os.environ.get("GSD_RUN_EVENTS_JOURNAL_DIR") or "").strip() or str(
+        default_config_dir() / "run_events"
+    )
+    fsync_ms = _parse_int(
+        os.environ.get("GSD_RUN_EVENTS_JOURNAL_FSYNC_MS"),
+        default=int(defaults.journal_fsync_interval_s * 1000),
+    )
+    backend = (os.environ.get("GSD_RUN_EVENTS_BACKEND") or "").strip().lower()
+    if backend not in RUN_EVENT_BACKENDS:
+        backend = defaults.backend
+    sqlite_path = (os.environ.get("GSD_RUN_EVENTS_SQLITE_PATH") or "").strip() or str(
+        default_config_dir() / "run_events.sqlite3"
+    )
+    return RunEventStoreConfig(
+        journal_dir=journal_dir if enabled else None,
+        journal_segment_bytes=_parse_int(
+            os.environ.get("GSD_RUN_EVENTS_JOURNAL_SEGMENT_BYTES"),
+            default=defaults.journal_segment_bytes,
+        ),
+        journal_max_bytes=_parse_int(
+            os.environ.get("GSD_RUN_EVENTS_JOURNAL_MAX_BYTES"),
+            default=defaults.journal_max_bytes,
+        ),
+        journal_max_age_s=_parse_int(
+            os.environ.get("GSD_RUN_EVENTS_JOURNAL_MAX_AGE_HOURS"),
+            default=int(defaults.journal_max_age_s // 3600),
+        )
+        * 3600.0,
+        journal_fsync_interval_s=max(0, fsync_ms) / 1000.0,
+        max_error_events=max(
+            1,
+            _parse_int(
+                os.environ.get("GSD_RUN_EVENTS_MAX_ERROR_EVENTS"),
+                default=defaults.max_error_events,
+            ),
+        ),
+        backend=backend,
+        sqlite_path=sqlite_path if backend == "sqlite" else None,
+    )
 
 
 @dataclass
 class _RunSessionEvents:
     created_at: float
-    agent_events: deque[dict[str, Any]]
-    console_events: deque[dict[str, Any]]
-    network_events: deque[dict[str, Any]]
+    agent_events: deque[_RunEvent]
+    console_events: deque[_RunEvent]
+    network_events: deque[_RunEvent]
+    # Events recorded with has_error=True, of every type; the type deques hold the rest.
+    error_events: deque[_RunEvent]
     dropped: dict[str, int] = field(
         default_factory=lambda: {"agent": 0, "console": 0, "network": 0}
     )
+    # Error events per type, so counts do not have to scan error_events.
+    error_counts: dict[str, int] = field(
+        default_factory=lambda: {"agent": 0, "console": 0, "network": 0}
+    )
+    # Adjacent pairs per deque whose timestamps go backwards; 0 means the deque is sorted.
+    inversions: dict[str, int] = field(
+        default_factory=lambda: {"agent": 0, "console": 0, "network": 0, "error": 0}
+    )
+    # Sequence number of the newest event recorded for the session.
+    last_seq: int = 0
+    # Opt-in per-step page performance samples (see page_metrics), packed; evicted with the
+    # session. Capped at max_agent_events, one sample per agent step.
+    page_metrics: deque[PackedFields] = field(default_factory=deque)
+    # Guards the deques and counters above; each session has its own.
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)
 
 
-class RunEventStore:
+class BaseRunEventStore(ABC):
+    """Config handling, field truncation and the typed `record_*` helpers.
+
+    Subclasses implement storage: the abstract `_store_event`, `ensure_session`, `get_events`,
+    `get_counts`, `get_dropped`, `_store_page_metrics` and `get_page_metrics`.
+    """
+
     def __init__(
         self,
         *,
@@ -69,7 +302,8 @@ class RunEventStore:
             None,
         )
 
-        self._config = RunEventStoreConfig(
+        self._config = replace(
+            base,
             max_sessions=base.max_sessions if max_sessions is None else int(max_sessions),
             max_agent_events=base.max_agent_events
             if max_events_value is None
@@ -80,24 +314,18 @@ class RunEventStore:
             max_network_events=base.max_network_events
             if max_events_value is None
             else int(max_events_value),
+            # Errors are what triage reads, so at least the newest one is always kept.
+            max_error_events=max(
+                1, base.max_error_events if max_events_value is None else int(max_events_value)
+            ),
             max_url_len=base.max_url_len if max_len_value is None else int(max_len_value),
             max_message_len=base.max_message_len if max_len_value is None else int(max_len_value),
             max_summary_len=base.max_summary_len if max_len_value is None else int(max_len_value),
         )
-        self._lock = Lock()
-        self._sessions: dict[str, _RunSessionEvents] = {}
-
-    def ensure_session(self, session_id: str, *, created_at: float) -> None:
-        with self._lock:
-            if session_id in self._sessions:
-                return
-            self._sessions[session_id] = _RunSessionEvents(
-                created_at=created_at,
-                agent_events=deque(maxlen=self._config.max_agent_events),
-                console_events=deque(maxlen=self._config.max_console_events),
-                network_events=deque(maxlen=self._config.max_network_events),
-            )
-            self._prune_locked()
+        self._hub = RunEventHub()
+        # Network aggregates per session, least recently used first (same cap as sessions).
+        self._network_stats: OrderedDict[str, RunNetworkStats] = OrderedDict()
+        self._network_stats_lock = Lock()
 
     def record_event(
         self,
@@ -113,53 +341,138 @@ class RunEventStore:
         if not normalized:
             normalized = "unknown"
 
-        payload: dict[str, Any] = {
-            "event_type": normalized,
-            "timestamp": float(timestamp),
-            "summary": _truncate(str(summary), max_len=self._config.max_summary_len),
-            "has_error": bool(has_error),
-        }
-        if details:
-            safe_details: dict[str, Any] = {}
-            for key, value in details.items():
-                if value is None:
-                    continue
-                if isinstance(value, str):
-                    safe_details[key] = _truncate(value, max_len=self._config.max_message_len)
-                else:
-                    safe_details[key] = value
-            if safe_details:
-                payload["details"] = safe_details
+        safe_summary = _truncate(str(summary), max_len=self._config.max_summary_len)
+        safe_details: dict[str, Any] = {}
+        for key, value in (details or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, str):
+                safe_details[key] = _truncate(value, max_len=self._config.max_message_len)
+            else:
+                safe_details[key] = value
+        seq = self._store_event(
+            session_id=session_id,
+            event_type=normalized,
+            timestamp=float(timestamp),
+            summary=safe_summary,
+            details=safe_details,
+            has_error=bool(has_error),
+        )
+        if self._hub and seq is not None:
+            self._hub.publish(
+                session_id,
+                normalized,
+                lambda: {
+                    "seq": seq,
+                    "session_id": session_id,
+                    "event_type": normalized,
+                    "timestamp": float(timestamp),
+                    "summary": safe_summary,
+                    "has_error": bool(has_error),
+                    "details": dict(safe_details),
+                },
+            )
 
-        with self._lock:
-            session = self._sessions.get(session_id)
-            if session is None:
-                self._sessions[session_id] = _RunSessionEvents(
-                    created_at=float(timestamp),
-                    agent_events=deque(maxlen=self._config.max_agent_events),
-                    console_events=deque(maxlen=self._config.max_console_events),
-                    network_events=deque(maxlen=self._config.max_network_events),
-                )
-                session = self._sessions[session_id]
-                self._prune_locked()
+    def subscribe(
+        self,
+        *,
+        session_id: str | None = None,
+        event_types: list[str] | None = None,
+        max_queue: int = DEFAULT_SUBSCRIPTION_QUEUE,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> RunEventSubscription:
+        """Stream events as they are recorded, optionally for one session and some types.
 
-            if normalized == "agent":
-                target = session.agent_events
-                dropped_key = "agent"
-            elif normalized == "console":
-                target = session.console_events
-                dropped_key = "console"
-            elif normalized == "network":
-                target = session.network_events
-                dropped_key = "network"
+        Iterate the returned subscription with `async for` on `loop` (default: the running
+        loop) and close it when done. Recording never blocks: once `max_queue` events are
+        waiting, the oldest is dropped and counted in `subscription.dropped`.
+        """
+
+        return self._hub.subscribe(
+            session_id=session_id, event_types=event_types, max_queue=max_queue, loop=loop
+        )
+
+    def subscription_stats(self) -> list[dict[str, Any]]:
+        return self._hub.stats()
+
+    def network_stats(self, session_id: str) -> RunNetworkStats:
+        """Return (creating if needed) the incremental network aggregates of a session."""
+
+        with self._network_stats_lock:
+            stats = self._network_stats.get(session_id)
+            if stats is None:
+                stats = RunNetworkStats()
+                self._network_stats[session_id] = stats
+                while len(self._network_stats) > max(1, self._config.max_sessions):
+                    self._network_stats.popitem(last=False)
             else:
-                target = session.agent_events
-                dropped_key = "agent"
+                self._network_stats.move_to_end(session_id)
+            return stats
+
+    def get_network_stats(
+        self, session_id: str, *, top_n: int = 10, sort_by: str = "p95_ms"
+    ) -> dict[str, Any] | None:
+        with self._network_stats_lock:
+            stats = self._network_stats.get(session_id)
+        return stats.snapshot(top_n=top_n, sort_by=sort_by) if stats is not None else None
+
+    def record_page_metrics(
+        self,
+        session_id: str,
+        *,
+        captured_at: float,
+        step: int | None,
+        url: str | None,
+        metrics: dict[str, Any],
+    ) -> None:
+        """Append one per-step page performance sample (flat numeric `metrics`).
 
-            if len(target) >= target.maxlen:  # type: ignore[operator]
-                session.dropped[dropped_key] += 1
-            target.append(payload)
+        Samples belong to the run session (created if needed) and are pruned with it; at most
+        max_agent_events are kept per session.
+        """
 
+        sample: dict[str, Any] = {"step": step, "timestamp": float(captured_at)}
+        if url:
+            sample["url"] = _truncate(str(url), max_len=self._config.max_url_len)
+        sample.update(
+            (str(key), value)
+            for key, value in metrics.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        )
+        self._store_page_metrics(session_id, sample, created_at=float(captured_at))
+
+    @abstractmethod
+    def _store_page_metrics(
+        self, session_id: str, sample: dict[str, Any], *, created_at: float
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_page_metrics(self, session_id: str) -> list[dict[str, Any]]:
+        """Return a session's page performance samples, oldest step first."""
+
+        raise NotImplementedError
+
+    @abstractmethod
+    def _store_event(
+        self,
+        *,
+        session_id: str,
+        event_type: str,
+        timestamp: float,
+        summary: str,
+        details: dict[str, Any],
+        has_error: bool,
+    ) -> int | None:
+        """Store one sanitized event; return its sequence number (None when it was ignored)."""
+
+        raise NotImplementedError
+
+    @abstractmethod
+    def ensure_session(self, session_id: str, *, created_at: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
     def get_events(
         self,
         *,
@@ -169,69 +482,32 @@ class RunEventStore:
         from_timestamp: float | None = None,
         has_error: bool | None = None,
         include_details: bool = False,
+        since_seq: int | None = None,
     ) -> list[dict[str, Any]]:
-        normalized_types = (
-            {str(item).strip() for item in event_types if str(item).strip()}
-            if event_types
-            else None
-        )
+        raise NotImplementedError
 
-        with self._lock:
-            sessions: list[tuple[str, _RunSessionEvents]]
-            if session_id is None:
-                sessions = list(self._sessions.items())
-            else:
-                session = self._sessions.get(session_id)
-                sessions = [] if session is None else [(session_id, session)]
+    @abstractmethod
+    def get_counts(self, session_id: str) -> dict[str, int]:
+        raise NotImplementedError
 
-            events: list[dict[str, Any]] = []
-            for sid, session in sessions:
-                for entry in (
-                    tuple(session.agent_events)
-                    + tuple(session.console_events)
-                    + tuple(session.network_events)
-                ):
-                    if not isinstance(entry, dict):
-                        continue
-                    event_type_value = entry.get("event_type") or entry.get("type")
-                    if normalized_types and event_type_value not in normalized_types:
-                        continue
-                    timestamp_value = entry.get("timestamp")
-                    if timestamp_value is None:
-                        timestamp_value = entry.get("captured_at")
-                    if from_timestamp is not None and isinstance(timestamp_value, (int, float)):
-                        if float(timestamp_value) < float(from_timestamp):
-                            continue
-                    if has_error is not None and entry.get("has_error") is not None:
-                        if bool(entry.get("has_error")) is not bool(has_error):
-                            continue
-                    if session_id is None:
-                        item = dict(entry)
-                        item["session_id"] = sid
-                    else:
-                        item = dict(entry)
-                    if not include_details:
-                        item.pop("details", None)
-                        item.pop("location", None)
-                    events.append(item)
-
-        def sort_key(item: dict[str, Any]) -> float:
-            value = item.get("timestamp")
-            if value is None:
-                value = item.get("captured_at")
-            if value is None:
-                value = 0.0
-            try:
-                return float(value)
-            except Exception:  # noqa: BLE001
-                return 0.0
+    @abstractmethod
+    def get_dropped(self, session_id: str | None = None) -> dict[str, int]:
+        """Events evicted by the per-type and error caps, for one session or all of them."""
+
+        raise NotImplementedError
+
+    def load_session(self, session_id: str) -> None:
+        """Bring a session into memory ahead of reads; may block on IO (see RunEventStore)."""
+
+        return None
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for buffered writes to reach durable storage (True when there are none)."""
+
+        return True
 
-        events.sort(key=sort_key, reverse=True)
-        if last_n is not None:
-            last_n_value = max(0, int(last_n))
-            if last_n_value:
-                events = events[:last_n_value]
-        return events
+    def close(self) -> None:
+        return None
 
     def record_agent_event(
         self,
@@ -269,7 +545,10 @@ class RunEventStore:
         level: str,
         message: str,
         location: dict[str, Any] | None = None,
+        target: str | None = None,
     ) -> None:
+        """Record one console message; `target` names a non-page source (iframe, worker)."""
+
         safe_level = _truncate(str(level), max_len=50)
         safe_message = _truncate(str(message), max_len=self._config.max_message_len)
         details: dict[str, Any] = {"level": safe_level}
@@ -283,6 +562,8 @@ class RunEventStore:
                     safe_location[key] = location[key]
             if safe_location:
                 details["location"] = safe_location
+        if target:
+            details["target"] = _truncate(str(target), max_len=50)
 
         self.record_event(
             session_id=session_id,
@@ -303,7 +584,14 @@ class RunEventStore:
         status: int | None = None,
         duration_ms: float | None = None,
         error: str | None = None,
+        protocol: str | None = None,
+        transfer_bytes: int | None = None,
+        cache: str | None = None,
+        timing: dict[str, float] | None = None,
+        target: str | None = None,
     ) -> None:
+        """Record one request; `timing` holds phase durations in ms (dns_ms, ttfb_ms, ...)."""
+
         safe_method = _truncate(str(method), max_len=20)
         safe_url = _truncate(str(url), max_len=self._config.max_url_len)
         details: dict[str, Any] = {"method": safe_method, "url": safe_url}
@@ -313,6 +601,16 @@ class RunEventStore:
             details["duration_ms"] = float(duration_ms)
         if error:
             details["error"] = _truncate(str(error), max_len=self._config.max_message_len)
+        if protocol:
+            details["protocol"] = _truncate(str(protocol), max_len=20)
+        if transfer_bytes is not None:
+            details["bytes"] = int(transfer_bytes)
+        if cache:
+            details["cache"] = _truncate(str(cache), max_len=20)
+        if timing:
+            details["timing"] = {str(key): float(value) for key, value in timing.items()}
+        if target:
+            details["target"] = _truncate(str(target), max_len=50)
 
         summary = f"{safe_method} {safe_url}".strip()
         inferred_error = bool(error) or (status is not None and int(status) >= 400)
@@ -325,20 +623,355 @@ class RunEventStore:
             has_error=inferred_error,
         )
 
-    def get_counts(self, session_id: str) -> dict[str, int]:
+
+class RunEventStore(BaseRunEventStore):
+    """In-memory store: per-session, per-type ring buffers with an optional journal.
+
+    Locking is sharded per session. Each session's buffers are guarded by that session's own
+    lock, so writers for different runs never wait on each other's appends and a reader of
+    one session never blocks writers of another. `_lock` only covers the session map: the
+    O(1) recency update (`move_to_end`), adding sessions and evicting the least recently used
+    one. A write racing the eviction of its own (least recently used) session may be lost,
+    as if it had arrived just before the eviction.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._lock = Lock()
+        # Least recently used first.
+        self._sessions: OrderedDict[str, _RunSessionEvents] = OrderedDict()
+        # Event sequence numbers; drawn under the session lock so each session's buffers stay
+        # in sequence order.
+        self._seq = count(1)
+        self._journal: RunEventJournal | None = (
+            RunEventJournal(
+                self._config.journal_dir,
+                max_segment_bytes=self._config.journal_segment_bytes,
+                max_bytes=self._config.journal_max_bytes,
+                max_age_s=self._config.journal_max_age_s,
+                fsync_interval_s=self._config.journal_fsync_interval_s,
+            )
+            if self._config.journal_dir
+            else None
+        )
+
+    def _new_session(self, *, created_at: float) -> _RunSessionEvents:
+        return _RunSessionEvents(
+            created_at=created_at,
+            agent_events=deque(maxlen=self._config.max_agent_events),
+            console_events=deque(maxlen=self._config.max_console_events),
+            network_events=deque(maxlen=self._config.max_network_events),
+            error_events=deque(maxlen=self._config.max_error_events),
+            page_metrics=deque(maxlen=max(1, self._config.max_agent_events)),
+        )
+
+    def ensure_session(self, session_id: str, *, created_at: float) -> None:
+        self._session_for_write(session_id, created_at=created_at)
+
+    def _session_for_write(self, session_id: str, *, created_at: float) -> _RunSessionEvents:
+        """Return the session (created if missing) after marking it most recently used."""
+
         with self._lock:
             session = self._sessions.get(session_id)
             if session is None:
-                return {"agent": 0, "console": 0, "network": 0, "total": 0}
-            agent = len(session.agent_events)
-            console = len(session.console_events)
-            network = len(session.network_events)
-            return {
-                "agent": agent,
-                "console": console,
-                "network": network,
-                "total": agent + console + network,
-            }
+                session = self._new_session(created_at=created_at)
+                self._sessions[session_id] = session
+                self._prune_locked()
+            else:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def _touch(self, session_id: str) -> _RunSessionEvents | None:
+        """Look a session up for reading, refreshing its recency when configured to."""
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and self._config.refresh_on_access:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    @staticmethod
+    def _build_event(
+        *,
+        event_type: str,
+        timestamp: float,
+        summary: str | None,
+        has_error: bool,
+        details: dict[str, Any],
+    ) -> _RunEvent:
+        if event_type == "network" and summary == _network_summary(details):
+            summary = None
+        return _RunEvent(
+            event_type=intern_str(event_type),
+            timestamp=float(timestamp),
+            summary=summary,
+            has_error=bool(has_error),
+            details=pack_fields(details, intern_fields=_INTERNED_DETAIL_FIELDS),
+        )
+
+    @staticmethod
+    def _append_locked(session: _RunSessionEvents, event: _RunEvent) -> None:
+        session.last_seq = event.seq
+        kind = _event_kind(event)
+        bucket = "error" if event.has_error else kind
+        target: deque[_RunEvent] = getattr(session, f"{bucket}_events")
+        if event.has_error:
+            session.error_counts[kind] += 1
+        if len(target) >= target.maxlen:  # type: ignore[operator]
+            evicted = target.popleft() if target else event
+            session.dropped[_event_kind(evicted)] += 1
+            if evicted.has_error:
+                session.error_counts[_event_kind(evicted)] -= 1
+            if target and target[0].timestamp < evicted.timestamp:
+                session.inversions[bucket] -= 1
+            if evicted is event:
+                return
+        if target and event.timestamp < target[-1].timestamp:
+            session.inversions[bucket] += 1
+        target.append(event)
+
+    def _store_event(
+        self,
+        *,
+        session_id: str,
+        event_type: str,
+        timestamp: float,
+        summary: str,
+        details: dict[str, Any],
+        has_error: bool,
+    ) -> int:
+        event = self._build_event(
+            event_type=event_type,
+            timestamp=timestamp,
+            summary=summary,
+            has_error=has_error,
+            details=details,
+        )
+
+        session = self._session_for_write(session_id, created_at=timestamp)
+        with session.lock:
+            event = event.with_seq(next(self._seq))
+            self._append_locked(session, event)
+        if self._journal is not None:
+            self._journal.append(session_id, event)
+        return event.seq
+
+    def load_session(self, session_id: str) -> None:
+        """Replay `session_id` from the journal if needed; async callers run this in a thread.
+
+        Reads replay on first access as well, but doing it here first keeps the journal's file
+        IO and JSON parsing off the event loop.
+        """
+
+        self._replay(session_id)
+
+    def _replay(self, session_id: str) -> None:
+        """Load a session missing from memory from the journal (after a restart or prune)."""
+
+        if self._journal is None or session_id in self._sessions:
+            return
+        payloads = self._journal.read_session(session_id)
+        if not payloads:
+            return
+        events: list[_RunEvent] = []
+        for payload in payloads:
+            try:
+                events.append(
+                    self._build_event(
+                        event_type=str(payload["event_type"]),
+                        timestamp=float(payload["timestamp"]),
+                        summary=payload.get("summary"),
+                        has_error=bool(payload.get("has_error")),
+                        details=dict(payload.get("details") or {}),
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not events:
+            return
+        with self._lock:
+            if session_id in self._sessions:
+                return
+            # Not yet published in `_sessions`, so no other thread can see this session.
+            session = self._new_session(created_at=events[0].timestamp)
+            for event in events:
+                # Replayed history is numbered afresh, after everything recorded so far.
+                self._append_locked(session, event.with_seq(next(self._seq)))
+            # Journaled history is not a drop within this process.
+            session.dropped = dict.fromkeys(_EVENT_KINDS, 0)
+            self._sessions[session_id] = session
+            self._prune_locked()
+
+    def get_events(
+        self,
+        *,
+        session_id: str | None = None,
+        last_n: int = 50,
+        event_types: list[str] | None = None,
+        from_timestamp: float | None = None,
+        has_error: bool | None = None,
+        include_details: bool = False,
+        since_seq: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return matching events newest first, building dicts only for the returned ones.
+
+        Each per-type deque is walked from its newest end and the walks are k-way merged by
+        timestamp, so the scan stops as soon as `last_n` matches have been found. Error events
+        live in their own deque, so has_error=True walks only errors and has_error=False skips
+        them entirely. Deques are copied under the session lock and walked with no lock held.
+
+        With `since_seq`, only events recorded after that sequence number are returned, oldest
+        first (the first `last_n` of them), for clients tailing a run. A cursor ahead of every
+        recorded event (the store restarted) is treated as 0. Cursors are exact per session;
+        across sessions, an event being recorded concurrently for another session can be
+        numbered below a cursor taken just before it is visible.
+        """
+
+        normalized_types = (
+            {str(item).strip() for item in event_types if str(item).strip()}
+            if event_types
+            else None
+        )
+        from_value = float(from_timestamp) if from_timestamp is not None else None
+
+        def accept(event: _RunEvent) -> bool:
+            if normalized_types and event.event_type not in normalized_types:
+                return False
+            if has_error is not None and event.has_error is not bool(has_error):
+                return False
+            return True
+
+        limit = max(0, int(last_n)) if last_n is not None else 0
+        if session_id is not None:
+            self._replay(session_id)
+
+        sessions: list[tuple[str, _RunSessionEvents]]
+        if session_id is None:
+            with self._lock:
+                sessions = list(self._sessions.items())
+        else:
+            session = self._touch(session_id)
+            sessions = [] if session is None else [(session_id, session)]
+
+        keys: list[str] = []
+        if has_error is not True:
+            # Unknown event types are stored with the agent events.
+            keys += [
+                key
+                for key in _EVENT_KINDS
+                if not normalized_types or key == "agent" or key in normalized_types
+            ]
+        if has_error is not False:
+            keys.append("error")
+
+        streams: list[Iterator[tuple[str, _RunEvent]]] = []
+        if since_seq is not None:
+            cursor = max(0, int(since_seq))
+            if cursor > max((session.last_seq for _, session in sessions), default=0):
+                cursor = 0
+            for sid, session in sessions:
+                for events, _ordered in self._snapshot(session, keys):
+                    tail = _after_seq(
+                        events, since_seq=cursor, from_timestamp=from_value, accept=accept
+                    )
+                    streams.append(zip(repeat(sid), tail))
+            merged = heapq.merge(*streams, key=lambda item: item[1].seq)
+        else:
+            for sid, session in sessions:
+                for events, ordered in self._snapshot(session, keys):
+                    walk = _newest_first(
+                        events, ordered=ordered, from_timestamp=from_value, accept=accept
+                    )
+                    streams.append(zip(repeat(sid), walk))
+            merged = heapq.merge(*streams, key=lambda item: item[1].timestamp, reverse=True)
+        selected = list(islice(merged, limit)) if limit else list(merged)
+
+        # Records are immutable, so the dicts are built outside the locks as well.
+        results: list[dict[str, Any]] = []
+        for sid, event in selected:
+            item = event.to_dict(include_details=include_details)
+            if session_id is None:
+                item["session_id"] = sid
+            results.append(item)
+        return results
+
+    @staticmethod
+    def _snapshot(
+        session: _RunSessionEvents, keys: list[str]
+    ) -> list[tuple[deque[_RunEvent], bool]]:
+        """Copy the non-empty `keys` buckets of a session, each with its `ordered` flag."""
+
+        with session.lock:
+            return [
+                (events.copy(), session.inversions[key] == 0)
+                for key in keys
+                if (events := getattr(session, f"{key}_events"))
+            ]
+
+    def get_counts(self, session_id: str) -> dict[str, int]:
+        self._replay(session_id)
+        session = self._touch(session_id)
+        if session is None:
+            return {"agent": 0, "console": 0, "network": 0, "total": 0}
+        with session.lock:
+            errors = dict(session.error_counts)
+            sizes = [len(getattr(session, f"{kind}_events")) for kind in _EVENT_KINDS]
+        agent, console, network = (
+            size + errors[kind] for size, kind in zip(sizes, _EVENT_KINDS, strict=True)
+        )
+        return {
+            "agent": agent,
+            "console": console,
+            "network": network,
+            "total": agent + console + network,
+        }
+
+    def _store_page_metrics(
+        self, session_id: str, sample: dict[str, Any], *, created_at: float
+    ) -> None:
+        packed = pack_fields(sample)
+        if packed is None:
+            return
+        session = self._session_for_write(session_id, created_at=created_at)
+        with session.lock:
+            session.page_metrics.append(packed)
+
+    def get_page_metrics(self, session_id: str) -> list[dict[str, Any]]:
+        session = self._touch(session_id)
+        if session is None:
+            return []
+        with session.lock:
+            samples = list(session.page_metrics)
+        return [unpack_fields(sample) for sample in samples]
+
+    def get_dropped(self, session_id: str | None = None) -> dict[str, int]:
+        if session_id is None:
+            with self._lock:
+                sessions = list(self._sessions.values())
+        else:
+            self._replay(session_id)
+            session = self._sessions.get(session_id)
+            sessions = [] if session is None else [session]
+        dropped = dict.fromkeys(_EVENT_KINDS, 0)
+        for session in sessions:
+            with session.lock:
+                for kind, value in session.dropped.items():
+                    dropped[kind] += value
+        return {**dropped, "total": sum(dropped.values())}
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait for journal writes queued so far (True when there is no journal)."""
+
+        return self._journal.flush(timeout) if self._journal is not None else True
+
+    def close(self) -> None:
+        """Flush and stop the journal writer; in-memory events are kept."""
+
+        if self._journal is not None:
+            self._journal.close()
+
+    def journal_stats(self) -> dict[str, Any] | None:
+        return self._journal.stats() if self._journal is not None else None
 
     def _prune_locked(self) -> None:
         max_sessions = max(0, self._config.max_sessions)
@@ -348,5 +981,17 @@ class RunEventStore:
             self._sessions.clear()
             return
         while len(self._sessions) > max_sessions:
-            oldest_session_id = min(self._sessions.items(), key=lambda item: item[1].created_at)[0]
-            self._sessions.pop(oldest_session_id, None)
+            self._sessions.popitem(last=False)
+
+
+def create_run_event_store(config: RunEventStoreConfig | None = None) -> BaseRunEventStore:
+    """Build the store selected by `config.backend` ("memory" or "sqlite")."""
+
+    config = config or RunEventStoreConfig()
+    if config.backend == "sqlite":
+        from .run_event_sqlite import SqliteRunEventStore
+
+        return SqliteRunEventStore(config=config)
+    if config.backend != "memory":
+        raise ValueError(f"Unknown run event backend: {config.backend!r}")
+    return RunEventStore(config=config)
@@ -0,0 +1,185 @@
+"""Live run event subscriptions: push events to dashboard viewers as they are recorded.
+
+`RunEventHub.publish` is called by the store for every recorded event, from whatever thread
+recorded it. Each `RunEventSubscription` filters by session and type, buffers matches in a
+bounded queue (dropping the oldest and counting the drop when a slow consumer falls behind)
+and wakes its asyncio consumer through the event loop it was created on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Iterable
+from threading import Lock
+from typing import Any
+
+DEFAULT_SUBSCRIPTION_QUEUE = 256
+
+
+class RunEventSubscription:
+    """Async iterator over matching run event dicts (each carries its `session_id`)."""
+
+    def __init__(
+        self,
+        *,
+        session_id: str | None,
+        event_types: Iterable[str] | None,
+        max_queue: int,
+        loop: asyncio.AbstractEventLoop,
+        on_close: Callable[[RunEventSubscription], None],
+    ) -> None:
+        self.session_id = session_id
+        self.event_types = (
+            frozenset(str(item).strip() for item in event_types if str(item).strip())
+            if event_types
+            else None
+        )
+        self.max_queue = max(1, int(max_queue))
+        self._loop = loop
+        self._on_close = on_close
+        self._lock = Lock()
+        self._items: deque[dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def matches(self, session_id: str, event_type: str) -> bool:
+        if self.session_id is not None and session_id != self.session_id:
+            return False
+        return self.event_types is None or event_type in self.event_types
+
+    def offer(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if len(self._items) >= self.max_queue:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(event)
+            # Only the first item after the consumer drained the queue needs a wakeup.
+            wake = len(self._items) == 1
+        if wake:
+            self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # The consumer's loop is gone; nobody will read this subscription again.
+            self.close()
+
+    def drain(self, max_items: int | None = None) -> list[dict[str, Any]]:
+        """Return queued events without waiting (at most `max_items`)."""
+
+        with self._lock:
+            count = len(self._items) if max_items is None else min(len(self._items), max_items)
+            items = [self._items.popleft() for _ in range(max(0, count))]
+            self.delivered += len(items)
+        return items
+
+    async def next_batch(self, max_items: int = 100) -> list[dict[str, Any]]:
+        """Wait for at least one event and return up to `max_items`; [] once closed."""
+
+        while True:
+            with self._lock:
+                if not self._items and not self._closed:
+                    self._wakeup.clear()
+                closed = self._closed
+            items = self.drain(max_items)
+            if items or closed:
+                return items
+            await self._wakeup.wait()
+
+    def __aiter__(self) -> RunEventSubscription:
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        items = await self.next_batch(1)
+        if not items:
+            raise StopAsyncIteration
+        return items[0]
+
+    async def __aenter__(self) -> RunEventSubscription:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._on_close(self)
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            queued = len(self._items)
+        return {
+            "session_id": self.session_id,
+            "event_types": sorted(self.event_types) if self.event_types else None,
+            "queued": queued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class RunEventHub:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # Replaced (never mutated) under _lock, so publish iterates without holding it.
+        self._subscriptions: tuple[RunEventSubscription, ...] = ()
+
+    def subscribe(
+        self,
+        *,
+        session_id: str | None = None,
+        event_types: Iterable[str] | None = None,
+        max_queue: int = DEFAULT_SUBSCRIPTION_QUEUE,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> RunEventSubscription:
+        subscription = RunEventSubscription(
+            session_id=session_id,
+            event_types=event_types,
+            max_queue=max_queue,
+            loop=loop or asyncio.get_running_loop(),
+            on_close=self._remove,
+        )
+        with self._lock:
+            self._subscriptions = (*self._subscriptions, subscription)
+        return subscription
+
+    def _remove(self, subscription: RunEventSubscription) -> None:
+        with self._lock:
+            self._subscriptions = tuple(
+                item for item in self._subscriptions if item is not subscription
+            )
+
+    def __bool__(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(
+        self, session_id: str, event_type: str, build: Callable[[], dict[str, Any]]
+    ) -> None:
+        """Offer an event to matching subscribers; `build` runs at most once, only on a match."""
+
+        event: dict[str, Any] | None = None
+        for subscription in self._subscriptions:
+            if not subscription.matches(session_id, event_type):
+                continue
+            if event is None:
+                event = build()
+            subscription.offer(event)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [subscription.stats() for subscription in self._subscriptions]
@@ -3,14 +3,15 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
 import socket
 import threading
 import time
 from dataclasses import dataclass
 
 from .config import Settings, load_settings
-from .run_event_store import RunEventStore
-from .screenshot_manager import ScreenshotManager
+from .run_event_store import create_run_event_store, load_run_event_store_config
+from .screenshot_manager import ScreenshotManager, load_screenshot_manager_config
 from .streaming.server import StreamingRuntime, create_streaming_app
 
 DEFAULT_DASHBOARD_HOST = "127.0.0.1"
@@ -28,8 +29,10 @@ class DashboardServer:
 
 class AppRuntime:
     def __init__(self) -> None:
-        self.screenshots = ScreenshotManager()
-        self.run_events = RunEventStore()
+        self.screenshots = ScreenshotManager(config=load_screenshot_manager_config())
+        self.run_events = create_run_event_store(load_run_event_store_config())
+        # Write out run events still queued (journal or SQLite batch) when the server exits.
+        atexit.register(self.run_events.close)
         self._lock = threading.Lock()
         self._dashboard: DashboardServer | None = None
 
@@ -58,7 +61,9 @@ class AppRuntime:
 
             effective_settings = settings or load_settings(strict=False)
             runtime = create_streaming_app(
-                settings=effective_settings, screenshots=self.screenshots
+                settings=effective_settings,
+                screenshots=self.screenshots,
+                run_events=self.run_events,
             )
 
             loop_ready = threading.Event()
@@ -3,31 +3,279 @@
 from __future__ import annotations
 
 import base64
+import hashlib
+import os
 import time
 import uuid
-from collections import deque
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from threading import Lock
 from typing import Any
 
+from .record_packing import PackedFields, intern_str, pack_fields, unpack_fields
+from .screenshot_spill import DEFAULT_MAX_SEGMENT_BYTES, SegmentSpillStore, SpillRef
+from .screenshot_transcode import (
+    DEFAULT_TRANSCODE_QUALITY,
+    ScreenshotTranscoder,
+    normalize_transcode_format,
+)
+
+DEFAULT_MAX_TOTAL_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_SPILL_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_HOT_WINDOW = 50
+
+# Eviction tiers, lowest first: stream samples, then ordinary agent steps, then protected shots
+# (errors plus the first and final agent_step of each session).
+_TIER_STREAM = 0
+_TIER_AGENT_STEP = 1
+_TIER_PROTECTED = 2
+_TIER_NAMES = ("stream_sample", "agent_step", "protected")
+
+# Blob key suffix for an untranscoded copy kept for error screenshots whose content matches a
+# blob that has already been transcoded.
+_ORIGINAL_KEY_SUFFIX = b":original"
+
+
+def _parse_int(value: str | None, *, default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
 
 @dataclass(frozen=True)
+class ScreenshotManagerConfig:
+    max_screenshots: int = 500
+    max_agent_step_per_session: int = 50
+    max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES
+    # Disk spill tier: when spill_dir is set, image bytes older than the newest `hot_window`
+    # screenshots move to append-only segment files under it (bounded by max_spill_bytes).
+    spill_dir: str | None = None
+    hot_window: int = DEFAULT_HOT_WINDOW
+    max_spill_bytes: int = DEFAULT_MAX_SPILL_BYTES
+    spill_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES
+    # Background re-encoding of agent_step PNGs ("jpeg" or "webp"; None disables it). Error
+    # screenshots keep their original bytes unless keep_error_originals is False.
+    transcode_format: str | None = None
+    transcode_quality: int = DEFAULT_TRANSCODE_QUALITY
+    transcode_workers: int = 1
+    keep_error_originals: bool = True
+
+
+def load_screenshot_manager_config() -> ScreenshotManagerConfig:
+    """Read screenshot retention limits from the environment (0 disables a limit)."""
+
+    defaults = ScreenshotManagerConfig()
+    return ScreenshotManagerConfig(
+        max_screenshots=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_MAX_COUNT"), default=defaults.max_screenshots
+        ),
+        max_agent_step_per_session=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_MAX_AGENT_STEPS_PER_SESSION"),
+            default=defaults.max_agent_step_per_session,
+        ),
+        max_total_bytes=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_MAX_BYTES"), default=defaults.max_total_bytes
+        ),
+        spill_dir=(os.environ.get("GSD_SCREENSHOT_SPILL_DIR") or "").strip() or None,
+        hot_window=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_HOT_WINDOW"), default=defaults.hot_window
+        ),
+        max_spill_bytes=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_MAX_SPILL_BYTES"), default=defaults.max_spill_bytes
+        ),
+        transcode_format=normalize_transcode_format(
+            os.environ.get("GSD_SCREENSHOT_TRANSCODE_FORMAT")
+        ),
+        transcode_quality=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_TRANSCODE_QUALITY"),
+            default=defaults.transcode_quality,
+        ),
+        transcode_workers=_parse_int(
+            os.environ.get("GSD_SCREENSHOT_TRANSCODE_WORKERS"),
+            default=defaults.transcode_workers,
+        ),
+        keep_error_originals=(
+            os.environ.get("GSD_SCREENSHOT_KEEP_ERROR_ORIGINALS", "").strip().lower()
+            not in {"0", "false", "no", "off"}
+        ),
+    )
+
+
+def _content_digest(data: bytes, *, encoding: bytes) -> bytes:
+    # The personalization keeps raw bytes and base64 text with identical contents apart.
+    return hashlib.blake2b(data, digest_size=16, person=encoding).digest()
+
+
+def _decoded_length(image_base64: str) -> int:
+    padding = 2 if image_base64.endswith("==") else (1 if image_base64.endswith("=") else 0)
+    return max(0, len(image_base64) * 3 // 4 - padding)
+
+
+def _decode_base64(image_base64: str) -> bytes:
+    try:
+        return base64.b64decode(image_base64)
+    except Exception:  # noqa: BLE001
+        return b""
+
+
+class _StoredImage:
+    """Content-addressed image blob held in RAM or in the spill tier (`spill`).
+
+    Screenshots with identical images share one blob; `refs` counts them. A blob keeps the
+    representation it was recorded with (raw `data` or `b64` text) and converts lazily; with
+    `memoize=True` the converted form is kept, so each conversion happens at most once. The
+    spill tier stores the base64 form, which is what `get_screenshots` serves.
+
+    `mime_type` is set once the blob has been transcoded; `pinned` blobs (referenced by an
+    error screenshot) keep their original bytes.
+    """
+
+    __slots__ = (
+        "data",
+        "b64",
+        "spill",
+        "size",
+        "digest",
+        "refs",
+        "mime_type",
+        "pinned",
+        "_spill_store",
+    )
+
+    def __init__(self, *, data: bytes | None = None, b64: str | None = None, digest: bytes) -> None:
+        self.data = data
+        self.b64 = b64
+        self.spill: SpillRef | None = None
+        self.size = len(data) if data is not None else _decoded_length(b64 or "")
+        self.digest = digest
+        self.refs = 0
+        self.mime_type: str | None = None
+        self.pinned = False
+        self._spill_store: SegmentSpillStore | None = None
+
+    @property
+    def resident(self) -> bool:
+        return self.data is not None or self.b64 is not None
+
+    @property
+    def resident_bytes(self) -> int:
+        return len(self.data or b"") + len(self.b64 or "")
+
+    @property
+    def spilled_bytes(self) -> int:
+        return self.spill.length if self.spill is not None else 0
+
+    def move_to(self, spill_store: SegmentSpillStore) -> None:
+        if not self.resident:
+            return
+        encoded = self.to_base64(memoize=False) or ""
+        self._spill_store = spill_store
+        self.spill = spill_store.append(encoded.encode("ascii", "replace"))
+        self.data = None
+        self.b64 = None
+
+    def release(self) -> None:
+        if self.spill is not None and self._spill_store is not None:
+            self._spill_store.release(self.spill)
+
+    def _read_spilled(self) -> str | None:
+        ref, spill_store = self.spill, self._spill_store
+        if ref is None or spill_store is None:
+            return None
+        try:
+            return spill_store.read(ref).decode("ascii")
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def to_base64(self, *, memoize: bool = False) -> str | None:
+        if self.b64 is not None:
+            return self.b64
+        if self.data is not None:
+            encoded = base64.b64encode(self.data).decode("ascii")
+            if memoize:
+                self.b64 = encoded
+            return encoded
+        return self._read_spilled()
+
+    def to_bytes(self, *, memoize: bool = False) -> bytes | None:
+        if self.data is not None:
+            return self.data
+        if self.b64 is not None:
+            decoded = _decode_base64(self.b64)
+            if memoize:
+                self.data = decoded
+            return decoded
+        spilled = self._read_spilled()
+        return _decode_base64(spilled) if spilled is not None else None
+
+
+@dataclass(frozen=True, slots=True)
 class Screenshot:
+    """One stored screenshot; build with `Screenshot.create` to intern and pack fields."""
+
     id: str
     timestamp: float
     screenshot_type: str
     source: str | None
     session_id: str | None
     has_error: bool
-    metadata: dict[str, Any]
-    image_bytes: bytes | None
+    image: _StoredImage | None
     mime_type: str | None
     url: str | None = None
     step: int | None = None
+    packed_metadata: PackedFields | None = None
+    # Store-wide insertion sequence number (1-based, monotonically increasing).
+    seq: int = 0
+
+    @classmethod
+    def create(
+        cls,
+        *,
+        id: str,
+        timestamp: float,
+        screenshot_type: str,
+        source: str | None = None,
+        session_id: str | None = None,
+        has_error: bool = False,
+        metadata: dict[str, Any] | None = None,
+        image: _StoredImage | None = None,
+        mime_type: str | None = None,
+        url: str | None = None,
+        step: int | None = None,
+        seq: int = 0,
+    ) -> Screenshot:
+        return cls(
+            id=id,
+            timestamp=timestamp,
+            screenshot_type=intern_str(screenshot_type),
+            source=intern_str(source),
+            session_id=intern_str(session_id),
+            has_error=has_error,
+            image=image,
+            mime_type=intern_str(mime_type),
+            url=intern_str(url),
+            step=step,
+            packed_metadata=pack_fields(metadata),
+            seq=seq,
+        )
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        return unpack_fields(self.packed_metadata)
+
+    @property
+    def image_bytes(self) -> bytes | None:
+        return self.image.to_bytes() if self.image is not None else None
 
     def to_dict(self, *, include_images: bool) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "id": self.id,
+            "seq": self.seq,
             "timestamp": self.timestamp,
             "captured_at": self.timestamp,
             "type": self.screenshot_type,
@@ -35,78 +283,457 @@ class Screenshot:
             "session_id": self.session_id,
             "has_error": self.has_error,
             "metadata": self.metadata,
-            "mime_type": self.mime_type,
+            "mime_type": (
+                self.image.mime_type
+                if self.image is not None and self.image.mime_type
+                else self.mime_type
+            ),
             "url": self.url,
             "step": self.step,
         }
-        if include_images and self.image_bytes is not None:
-            payload["image_data"] = base64.b64encode(self.image_bytes).decode("ascii")
+        if include_images and self.image is not None:
+            image_data = self.image.to_base64()
+            if image_data is not None:
+                payload["image_data"] = image_data
         return payload
 
 
+# A selected shot with its image's mime type, base64 text and raw bytes as of selection.
+_Captured = tuple[Screenshot, str | None, str | None, bytes | None]
+
+
 class ScreenshotManager:
     SAMPLING_RATE = 10
 
-    def __init__(self, *, max_screenshots: int = 500, max_agent_step_per_session: int = 50) -> None:
-        self._max_screenshots = max_screenshots
-        self._max_agent_step_per_session = max_agent_step_per_session
-        self._items: deque[Screenshot] = deque()
+    def __init__(
+        self,
+        *,
+        config: ScreenshotManagerConfig | None = None,
+        max_screenshots: int | None = None,
+        max_agent_step_per_session: int | None = None,
+        max_total_bytes: int | None = None,
+    ) -> None:
+        base = config or ScreenshotManagerConfig()
+        self._max_screenshots = (
+            base.max_screenshots if max_screenshots is None else int(max_screenshots)
+        )
+        self._max_agent_step_per_session = (
+            base.max_agent_step_per_session
+            if max_agent_step_per_session is None
+            else int(max_agent_step_per_session)
+        )
+        self._max_total_bytes = (
+            base.max_total_bytes if max_total_bytes is None else int(max_total_bytes)
+        )
+        self._hot_window = max(0, int(base.hot_window))
+        self._max_spill_bytes = int(base.max_spill_bytes)
+        self._spill: SegmentSpillStore | None = (
+            SegmentSpillStore(base_dir=base.spill_dir, max_segment_bytes=base.spill_segment_bytes)
+            if base.spill_dir
+            else None
+        )
+        # Unique image blobs by content digest, and the resident ones in recency order (a
+        # duplicate capture refreshes its blob); the oldest resident blobs spill first.
+        self._blobs: dict[bytes, _StoredImage] = {}
+        self._hot: OrderedDict[bytes, _StoredImage] = OrderedDict()
+        self._logical_size_bytes = 0
+        self._dedup_hits = 0
+        transcode_format = normalize_transcode_format(base.transcode_format)
+        self._transcoder: ScreenshotTranscoder | None = (
+            ScreenshotTranscoder(
+                image_format=transcode_format,
+                quality=base.transcode_quality,
+                workers=base.transcode_workers,
+            )
+            if transcode_format
+            else None
+        )
+        self._keep_error_originals = bool(base.keep_error_originals)
+        # Spill segments are compacted on a worker thread once evictions leave dead bytes.
+        self._spill_dirty = False
+        self._compactor: ThreadPoolExecutor | None = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="gsd-screenshot-compact")
+            if self._spill is not None
+            else None
+        )
+        self._compaction: Future[int] | None = None
+        self.spilled_size_bytes = 0
+        # All stored shots (id -> shot, insertion ordered); removal by id is O(1).
+        self._items: dict[str, Screenshot] = {}
         self._lock = Lock()
 
+        # Secondary indexes (id -> shot, insertion ordered) kept in sync on insert/evict so
+        # filtered lookups and counts cost O(matches) instead of O(store).
+        self._seq = 0
+        self._by_session: dict[str, dict[str, Screenshot]] = {}
+        self._by_type: dict[str, dict[str, Screenshot]] = {}
+        self._errors: dict[str, Screenshot] = {}
+        # Sorted by seq and by (timestamp, seq) for binary search. Evicted entries are dropped
+        # lazily: they are skipped on read and swept out once they outnumber the live ones.
+        self._by_seq: list[Screenshot] = []
+        self._by_time: list[tuple[float, int, Screenshot]] = []
+        self._stale_entries = 0
+
+        # Eviction tiers (id -> shot, oldest first) and per-session [first, final] agent_step
+        # ids, used to pick victims when a count or byte limit is exceeded. OrderedDict keeps
+        # reaching the oldest entry O(1) under FIFO churn, where a plain dict has to skip
+        # over the deleted slots at its front.
+        self._tiers: tuple[OrderedDict[str, Screenshot], ...] = (
+            OrderedDict(),
+            OrderedDict(),
+            OrderedDict(),
+        )
+        self._step_bounds: dict[str, list[str | None]] = {}
+        # Per-session agent_steps, oldest first, so the per-session cap evicts in O(1).
+        self._session_steps: dict[str, OrderedDict[str, Screenshot]] = {}
+        self._evictions_by_reason: dict[str, int] = {
+            "max_screenshots": 0,
+            "max_total_bytes": 0,
+            "max_agent_step_per_session": 0,
+            "max_spill_bytes": 0,
+        }
+        self._evictions_by_tier: dict[str, int] = dict.fromkeys(_TIER_NAMES, 0)
+
         # Compatibility attributes expected by downstream tooling/tests.
-        self.key_screenshots = self._items
+        self.key_screenshots = self._items.values()
         self.metadata_index: dict[str, Any] = {}
         self.stream_counter = 0
         self.total_size_bytes = 0
         self.current_session_id: str | None = None
         self.current_session_start: float | None = None
 
+    def _index(self, shot: Screenshot) -> None:
+        self._by_seq.append(shot)
+        if shot.session_id:
+            self._by_session.setdefault(shot.session_id, {})[shot.id] = shot
+            if shot.screenshot_type == "agent_step":
+                steps = self._session_steps.get(shot.session_id)
+                if steps is None:
+                    steps = self._session_steps[shot.session_id] = OrderedDict()
+                steps[shot.id] = shot
+        self._by_type.setdefault(shot.screenshot_type, {})[shot.id] = shot
+        if shot.has_error:
+            self._errors[shot.id] = shot
+
+        if shot.screenshot_type == "agent_step" and shot.session_id:
+            # Every new agent_step becomes the session's final step; the previous final step
+            # drops to the ordinary agent_step tier unless it is also the first one.
+            tier = _TIER_PROTECTED
+            bounds = self._step_bounds.get(shot.session_id)
+            if bounds is None:
+                self._step_bounds[shot.session_id] = [shot.id, shot.id]
+            else:
+                previous_final = bounds[1]
+                bounds[1] = shot.id
+                if previous_final is not None and previous_final != bounds[0]:
+                    self._demote_locked(previous_final)
+        elif shot.has_error:
+            tier = _TIER_PROTECTED
+        elif shot.screenshot_type == "agent_step":
+            tier = _TIER_AGENT_STEP
+        else:
+            tier = _TIER_STREAM
+        self._tiers[tier][shot.id] = shot
+
+        entry = (shot.timestamp, shot.seq, shot)
+        if not self._by_time or self._by_time[-1][0] <= shot.timestamp:
+            # Shots almost always arrive in timestamp order.
+            self._by_time.append(entry)
+        else:
+            insort(self._by_time, entry, key=lambda item: item[:2])
+
+    def _unindex(self, shot: Screenshot) -> None:
+        if shot.session_id:
+            session_items = self._by_session.get(shot.session_id)
+            if session_items is not None:
+                session_items.pop(shot.id, None)
+                if not session_items:
+                    del self._by_session[shot.session_id]
+                    self._step_bounds.pop(shot.session_id, None)
+            steps = self._session_steps.get(shot.session_id)
+            if steps is not None and steps.pop(shot.id, None) is not None and not steps:
+                del self._session_steps[shot.session_id]
+            bounds = self._step_bounds.get(shot.session_id)
+            if bounds is not None:
+                if bounds[0] == shot.id:
+                    bounds[0] = None
+                if bounds[1] == shot.id:
+                    bounds[1] = None
+        for tier in self._tiers:
+            if tier.pop(shot.id, None) is not None:
+                break
+        type_items = self._by_type.get(shot.screenshot_type)
+        if type_items is not None:
+            type_items.pop(shot.id, None)
+            if not type_items:
+                del self._by_type[shot.screenshot_type]
+        self._errors.pop(shot.id, None)
+        self._stale_entries += 1
+        if self._stale_entries > max(64, len(self._items)):
+            items = self._items
+            self._by_seq = [item for item in self._by_seq if item.id in items]
+            self._by_time = [entry for entry in self._by_time if entry[2].id in items]
+            self._stale_entries = 0
+
+    def _demote_locked(self, shot_id: str) -> None:
+        shot = self._tiers[_TIER_PROTECTED].get(shot_id)
+        if shot is None or shot.has_error:
+            return
+        del self._tiers[_TIER_PROTECTED][shot_id]
+        self._tiers[_TIER_AGENT_STEP][shot_id] = shot
+
+    def _tier_of(self, shot: Screenshot) -> int:
+        for tier, members in enumerate(self._tiers):
+            if shot.id in members:
+                return tier
+        return _TIER_STREAM
+
+    def _note_eviction(self, shot: Screenshot, *, reason: str) -> None:
+        self._evictions_by_reason[reason] = self._evictions_by_reason.get(reason, 0) + 1
+        self._evictions_by_tier[_TIER_NAMES[self._tier_of(shot)]] += 1
+
+    def _evict_one_locked(
+        self, *, reason: str, keep: Screenshot, resident: bool | None = None
+    ) -> bool:
+        """Evict the oldest shot of the lowest non-empty tier, never `keep`.
+
+        `resident` restricts victims to shots whose image is in RAM (True) or spilled (False),
+        so a limit is only ever relieved by evicting shots that count against it.
+        """
+
+        for members in self._tiers:
+            for victim in members.values():
+                if victim is keep:
+                    continue
+                if resident is not None and (
+                    victim.image is None or victim.image.resident is not resident
+                ):
+                    continue
+                self._note_eviction(victim, reason=reason)
+                self._remove_item(victim)
+                return True
+        return False
+
     def _remove_item(self, item: Screenshot) -> None:
-        try:
-            self._items.remove(item)
-        except ValueError:
+        if self._items.pop(item.id, None) is None:
             return
-        if item.image_bytes is not None:
-            self.total_size_bytes = max(0, self.total_size_bytes - len(item.image_bytes))
+        self._unindex(item)
+        if item.image is not None:
+            self._release_image_locked(item.image)
 
-    def _evict_left(self) -> None:
-        try:
-            item = self._items.popleft()
-        except IndexError:
+    def _acquire_image_locked(
+        self, *, data: bytes | None, b64: str | None, digest: bytes, pin: bool = False
+    ) -> _StoredImage:
+        image = self._blobs.get(digest)
+        if image is not None and pin and image.mime_type is not None:
+            # The shared blob was transcoded; error screenshots get their own original copy.
+            digest += _ORIGINAL_KEY_SUFFIX
+            image = self._blobs.get(digest)
+        if image is None:
+            image = _StoredImage(data=data, b64=b64, digest=digest)
+            self._blobs[digest] = image
+            self._hot[digest] = image
+            self.total_size_bytes += image.resident_bytes
+        else:
+            self._dedup_hits += 1
+            if digest in self._hot:
+                self._hot.move_to_end(digest)
+        image.refs += 1
+        image.pinned = image.pinned or pin
+        self._logical_size_bytes += image.size
+        return image
+
+    def _release_image_locked(self, image: _StoredImage) -> None:
+        """Drop one reference; the blob's bytes are only freed with its last screenshot."""
+
+        self._logical_size_bytes = max(0, self._logical_size_bytes - image.size)
+        image.refs -= 1
+        if image.refs > 0:
             return
-        if item.image_bytes is not None:
-            self.total_size_bytes = max(0, self.total_size_bytes - len(item.image_bytes))
+        self._blobs.pop(image.digest, None)
+        self._hot.pop(image.digest, None)
+        if image.resident:
+            self.total_size_bytes = max(0, self.total_size_bytes - image.resident_bytes)
+        else:
+            image.release()
+            self.spilled_size_bytes = max(0, self.spilled_size_bytes - image.spilled_bytes)
+            self._spill_dirty = True
+
+    def _swap_transcoded(self, image: _StoredImage, encoded: bytes, mime_type: str) -> bool:
+        """Install transcoded bytes on a live, resident, unpinned blob (worker thread)."""
+
+        with self._lock:
+            if image.refs <= 0 or not image.resident or image.pinned or image.mime_type:
+                return False
+            before = image.resident_bytes
+            self._logical_size_bytes += image.refs * (len(encoded) - image.size)
+            image.data = encoded
+            image.b64 = None
+            image.size = len(encoded)
+            image.mime_type = mime_type
+            self.total_size_bytes += image.resident_bytes - before
+            return True
+
+    def _maybe_transcode(self, shot: Screenshot) -> None:
+        transcoder = self._transcoder
+        image = shot.image
+        if (
+            transcoder is None
+            or image is None
+            or shot.screenshot_type != "agent_step"
+            or shot.mime_type != "image/png"
+            or image.pinned
+            or image.mime_type
+        ):
+            return
+        transcoder.submit(
+            image.to_bytes,
+            lambda encoded, mime_type: self._swap_transcoded(image, encoded, mime_type),
+        )
+
+    def wait_for_transcodes(self, timeout: float | None = None) -> bool:
+        """Block until queued transcodes finish (for shutdown and tests)."""
+
+        return self._transcoder.wait(timeout) if self._transcoder is not None else True
+
+    @staticmethod
+    def _capture_locked(shot: Screenshot) -> _Captured:
+        """Snapshot what a payload needs from the mutable image state (under `_lock`)."""
+
+        image = shot.image
+        if image is None:
+            return shot, None, None, None
+        return shot, image.mime_type, image.b64, image.data
+
+    def _to_dicts(self, captured: list[_Captured], *, include_images: bool) -> list[dict[str, Any]]:
+        """Build payloads from `_capture_locked` snapshots; called without `_lock` held.
+
+        Base64 encoding and spill reads happen here. Encodings of resident raw images are
+        memoized afterwards, if the image has not changed in the meantime and the memo fits in
+        the byte budget (reads never evict screenshots).
+        """
+
+        payloads: list[dict[str, Any]] = []
+        encoded_raw: list[tuple[_StoredImage, bytes, str]] = []
+        for shot, mime_type, b64, data in captured:
+            payload = shot.to_dict(include_images=False)
+            if mime_type:
+                payload["mime_type"] = mime_type
+            image = shot.image
+            if include_images and image is not None:
+                if b64 is not None:
+                    image_data: str | None = b64
+                elif data is not None:
+                    image_data = base64.b64encode(data).decode("ascii")
+                    encoded_raw.append((image, data, image_data))
+                else:
+                    # Spilled (or evicted since the snapshot, in which case this is None).
+                    image_data = image._read_spilled()
+                if image_data is not None:
+                    payload["image_data"] = image_data
+            payloads.append(payload)
+        if encoded_raw:
+            budget = int(self._max_total_bytes)
+            with self._lock:
+                for image, data, image_data in encoded_raw:
+                    if image.refs <= 0 or image.data is not data or image.b64 is not None:
+                        continue
+                    if budget > 0 and self.total_size_bytes + len(image_data) > budget:
+                        continue
+                    image.b64 = image_data
+                    self.total_size_bytes += len(image_data)
+        return payloads
+
+    def _spill_oldest_locked(self, *, keep: Screenshot | None = None) -> bool:
+        if self._spill is None:
+            return False
+        keep_image = keep.image if keep is not None else None
+        for digest, image in self._hot.items():
+            if image is keep_image:
+                continue
+            del self._hot[digest]
+            resident_bytes = image.resident_bytes
+            if resident_bytes == 0:
+                return True
+            image.move_to(self._spill)
+            self.total_size_bytes = max(0, self.total_size_bytes - resident_bytes)
+            self.spilled_size_bytes += image.spilled_bytes
+            return True
+        return False
 
     def _enforce_agent_step_session_cap(self, *, session_id: str) -> None:
         cap = int(self._max_agent_step_per_session)
         if cap <= 0:
             return
 
-        kept = 0
-        to_remove: list[Screenshot] = []
-        for shot in reversed(self._items):
-            if shot.screenshot_type != "agent_step" or shot.session_id != session_id:
-                continue
-            kept += 1
-            if kept > cap:
-                to_remove.append(shot)
-
-        for shot in to_remove:
+        steps = self._session_steps.get(session_id)
+        while steps and len(steps) > cap:
+            shot = next(iter(steps.values()))
+            self._note_eviction(shot, reason="max_agent_step_per_session")
             self._remove_item(shot)
 
-    def _enforce_global_cap(self) -> None:
+    def _enforce_global_caps(self, *, keep: Screenshot) -> None:
         cap = int(self._max_screenshots)
-        if cap <= 0:
+        if cap > 0:
+            while len(self._items) > cap:
+                if not self._evict_one_locked(reason="max_screenshots", keep=keep):
+                    break
+
+        if self._spill is not None:
+            while len(self._hot) > self._hot_window and self._spill_oldest_locked():
+                pass
+
+        budget = int(self._max_total_bytes)
+        if budget > 0:
+            while self.total_size_bytes > budget:
+                # Spilling relieves the in-memory budget without losing the screenshot.
+                if self._spill_oldest_locked(keep=keep):
+                    continue
+                if not self._evict_one_locked(reason="max_total_bytes", keep=keep, resident=True):
+                    break
+
+        spill_budget = int(self._max_spill_bytes)
+        if self._spill is not None and spill_budget > 0:
+            while self.spilled_size_bytes > spill_budget:
+                if not self._evict_one_locked(reason="max_spill_bytes", keep=keep, resident=False):
+                    break
+
+    def _take_compaction_locked(self) -> bool:
+        """Claim a pending compaction, unless one is still running (it is retried later)."""
+
+        running = self._compaction is not None and not self._compaction.done()
+        if not self._spill_dirty or running:
+            return False
+        self._spill_dirty = False
+        return True
+
+    def _schedule_compaction(self) -> None:
+        """Compact the spill segments in the background; called without `_lock` held."""
+
+        spill, compactor = self._spill, self._compactor
+        if spill is None or compactor is None:
+            return
+        try:
+            future = compactor.submit(spill.compact)
+        except RuntimeError:  # closed
             return
-        while len(self._items) > cap:
-            self._evict_left()
+        with self._lock:
+            self._compaction = future
+
+    def wait_for_compaction(self, timeout: float | None = None) -> bool:
+        """Block until a scheduled spill compaction finishes (for shutdown and tests)."""
+
+        with self._lock:
+            future = self._compaction
+        return future is None or not wait([future], timeout=timeout).not_done
 
     def record_screenshot(
         self,
         *,
         screenshot_type: str,
         source: str | None = None,
-        image_bytes: bytes | None,
+        image_bytes: bytes | None = None,
+        image_base64: str | None = None,
         mime_type: str | None = None,
         session_id: str | None = None,
         captured_at: float | None = None,
@@ -115,27 +742,56 @@ class ScreenshotManager:
         url: str | None = None,
         step: int | None = None,
     ) -> Screenshot:
+        """Store a screenshot given raw `image_bytes` or `image_base64` text.
+
+        The representation is kept as received (base64 wins if both are passed) and converted
+        lazily when read.
+        """
+
         timestamp = captured_at if captured_at is not None else time.time()
-        shot = Screenshot(
-            id=str(uuid.uuid4()),
-            timestamp=timestamp,
-            screenshot_type=screenshot_type,
-            source=source,
-            session_id=session_id,
-            has_error=has_error,
-            metadata=dict(metadata or {}),
-            image_bytes=image_bytes,
-            mime_type=mime_type,
-            url=url,
-            step=step,
-        )
+        if image_base64 is not None:
+            image_bytes = None
+        # Hash outside the lock; identical images then share one blob.
+        digest = b""
+        if image_base64 is not None:
+            digest = _content_digest(image_base64.encode("ascii", "replace"), encoding=b"b64")
+        elif image_bytes is not None:
+            digest = _content_digest(image_bytes, encoding=b"raw")
         with self._lock:
-            self._items.append(shot)
-            if image_bytes is not None:
-                self.total_size_bytes += len(image_bytes)
+            image = (
+                self._acquire_image_locked(
+                    data=image_bytes,
+                    b64=image_base64,
+                    digest=digest,
+                    pin=has_error and self._keep_error_originals,
+                )
+                if image_bytes is not None or image_base64 is not None
+                else None
+            )
+            shot = Screenshot.create(
+                id=str(uuid.uuid4()),
+                timestamp=timestamp,
+                screenshot_type=screenshot_type,
+                source=source,
+                session_id=session_id,
+                has_error=has_error,
+                metadata=metadata,
+                image=image,
+                mime_type=mime_type,
+                url=url,
+                step=step,
+                seq=self._seq + 1,
+            )
+            self._seq = shot.seq
+            self._items[shot.id] = shot
+            self._index(shot)
             if screenshot_type == "agent_step" and session_id is not None:
                 self._enforce_agent_step_session_cap(session_id=session_id)
-            self._enforce_global_cap()
+            self._enforce_global_caps(keep=shot)
+            compact = self._take_compaction_locked()
+        if compact:
+            self._schedule_compaction()
+        self._maybe_transcode(shot)
         return shot
 
     async def add_key_screenshot(
@@ -150,13 +806,9 @@ class ScreenshotManager:
         mime_type: str = "image/png",
         metadata: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        try:
-            image_bytes = base64.b64decode(image_data) if image_data else b""
-        except Exception:  # noqa: BLE001
-            image_bytes = b""
         shot = self.record_screenshot(
             screenshot_type="agent_step",
-            image_bytes=image_bytes,
+            image_base64=image_data or "",
             mime_type=mime_type,
             session_id=session_id,
             captured_at=timestamp,
@@ -165,7 +817,9 @@ class ScreenshotManager:
             url=url,
             step=step,
         )
-        return shot.to_dict(include_images=True)
+        with self._lock:
+            captured = self._capture_locked(shot)
+        return self._to_dicts([captured], include_images=True)[0]
 
     async def add_stream_screenshot(
         self,
@@ -180,20 +834,90 @@ class ScreenshotManager:
         self.stream_counter += 1
         if self.stream_counter % self.SAMPLING_RATE != 0:
             return None
-        try:
-            image_bytes = base64.b64decode(image_data) if image_data else b""
-        except Exception:  # noqa: BLE001
-            image_bytes = b""
         shot = self.record_screenshot(
             screenshot_type="stream_sample",
-            image_bytes=image_bytes,
+            image_base64=image_data or "",
             mime_type=mime_type,
             session_id=session_id,
             captured_at=timestamp,
             metadata=dict(metadata or {}),
             url=url,
         )
-        return shot.to_dict(include_images=True)
+        with self._lock:
+            captured = self._capture_locked(shot)
+        return self._to_dicts([captured], include_images=True)[0]
+
+    def _plan_locked(
+        self,
+        *,
+        screenshot_type: str | None,
+        session_id: str | None,
+        from_timestamp: float | None,
+        has_error: bool | None,
+    ) -> tuple[str, int]:
+        """Pick the smallest index covering the filters, returning (index name, size).
+
+        The "time" size includes evicted entries not yet swept from the timestamp index.
+        """
+
+        plan = ("all", len(self._items))
+        candidates = (
+            ("session", len(self._by_session.get(session_id, ())) if session_id else None),
+            ("type", len(self._by_type.get(screenshot_type, ())) if screenshot_type else None),
+            ("error", len(self._errors) if has_error is True else None),
+            (
+                "time",
+                len(self._by_time)
+                - bisect_left(self._by_time, from_timestamp, key=lambda entry: entry[0])
+                if from_timestamp is not None
+                else None,
+            ),
+        )
+        for name, size in candidates:
+            if size is not None and size < plan[1]:
+                plan = (name, size)
+        return plan
+
+    def _source_locked(
+        self,
+        plan: str,
+        *,
+        screenshot_type: str | None,
+        session_id: str | None,
+        from_timestamp: float | None,
+    ) -> Any:
+        """Return the items of an index; all but "time" are in insertion order."""
+
+        if plan == "session" and session_id:
+            return self._by_session.get(session_id, {}).values()
+        if plan == "type" and screenshot_type:
+            return self._by_type.get(screenshot_type, {}).values()
+        if plan == "error":
+            return self._errors.values()
+        if plan == "time" and from_timestamp is not None:
+            start = bisect_left(self._by_time, from_timestamp, key=lambda entry: entry[0])
+            items = self._items
+            return [entry[2] for entry in self._by_time[start:] if entry[2].id in items]
+        return self._items.values()
+
+    @staticmethod
+    def _matches(
+        shot: Screenshot,
+        *,
+        screenshot_type: str | None,
+        session_id: str | None,
+        from_timestamp: float | None,
+        has_error: bool | None,
+    ) -> bool:
+        if screenshot_type and shot.screenshot_type != screenshot_type:
+            return False
+        if session_id and shot.session_id != session_id:
+            return False
+        if from_timestamp is not None and shot.timestamp < from_timestamp:
+            return False
+        if has_error is not None and shot.has_error != has_error:
+            return False
+        return True
 
     def count_screenshots(
         self,
@@ -206,21 +930,42 @@ class ScreenshotManager:
         if screenshot_type == "all":
             screenshot_type = None
 
+        # Filters answered by an index alone; has_error=False has no index of its own.
+        indexed = [
+            bool(screenshot_type),
+            bool(session_id),
+            from_timestamp is not None,
+            has_error is True,
+        ]
         with self._lock:
-            items = list(self._items)
-
-        total = 0
-        for shot in items:
-            if screenshot_type and shot.screenshot_type != screenshot_type:
-                continue
-            if session_id and shot.session_id != session_id:
-                continue
-            if from_timestamp is not None and shot.timestamp < from_timestamp:
-                continue
-            if has_error is not None and shot.has_error != has_error:
-                continue
-            total += 1
-        return total
+            plan, size = self._plan_locked(
+                screenshot_type=screenshot_type,
+                session_id=session_id,
+                from_timestamp=from_timestamp,
+                has_error=has_error,
+            )
+            # Evicted entries still in the timestamp index inflate its size (and can make the
+            # planner fall back to "all"), so a timestamp filter is only exact without them.
+            exact = from_timestamp is None or not self._stale_entries
+            if has_error is not False and sum(indexed) <= 1 and exact:
+                return size
+            source = self._source_locked(
+                plan,
+                screenshot_type=screenshot_type,
+                session_id=session_id,
+                from_timestamp=from_timestamp,
+            )
+            return sum(
+                1
+                for shot in source
+                if self._matches(
+                    shot,
+                    screenshot_type=screenshot_type,
+                    session_id=session_id,
+                    from_timestamp=from_timestamp,
+                    has_error=has_error,
+                )
+            )
 
     def get_screenshots(
         self,
@@ -231,42 +976,165 @@ class ScreenshotManager:
         from_timestamp: float | None = None,
         has_error: bool | None = None,
         include_images: bool = True,
+        since_seq: int | None = None,
     ) -> list[dict[str, Any]]:
+        """Return the newest `last_n` matches, or with `since_seq` the oldest `last_n` newer
+        than that cursor (see `get_screenshots_since`)."""
+
+        if since_seq is not None:
+            page = self.get_screenshots_since(
+                since_seq,
+                limit=last_n,
+                screenshot_type=screenshot_type,
+                session_id=session_id,
+                from_timestamp=from_timestamp,
+                has_error=has_error,
+                include_images=include_images,
+            )
+            screenshots: list[dict[str, Any]] = page["screenshots"]
+            return screenshots
         if last_n <= 0:
             return []
 
         if screenshot_type == "all":
             screenshot_type = None
 
+        selected: list[Screenshot] = []
         with self._lock:
-            items = list(self._items)
+            plan, _ = self._plan_locked(
+                screenshot_type=screenshot_type,
+                session_id=session_id,
+                from_timestamp=from_timestamp,
+                has_error=has_error,
+            )
+            source = self._source_locked(
+                plan,
+                screenshot_type=screenshot_type,
+                session_id=session_id,
+                from_timestamp=from_timestamp,
+            )
+            if plan == "time":
+                # The timestamp view is not insertion ordered; restore store order first.
+                source = sorted(source, key=lambda shot: shot.seq)
+            for shot in reversed(source):
+                if not self._matches(
+                    shot,
+                    screenshot_type=screenshot_type,
+                    session_id=session_id,
+                    from_timestamp=from_timestamp,
+                    has_error=has_error,
+                ):
+                    continue
+                selected.append(shot)
+                if len(selected) >= last_n:
+                    break
+            selected.reverse()
+            captured = [self._capture_locked(shot) for shot in selected]
+        return self._to_dicts(captured, include_images=include_images)
 
-        filtered: list[Screenshot] = []
-        for shot in items:
-            if screenshot_type and shot.screenshot_type != screenshot_type:
-                continue
-            if session_id and shot.session_id != session_id:
-                continue
-            if from_timestamp is not None and shot.timestamp < from_timestamp:
-                continue
-            if has_error is not None and shot.has_error != has_error:
-                continue
-            filtered.append(shot)
+    def get_screenshots_since(
+        self,
+        since_seq: int,
+        *,
+        limit: int = 20,
+        screenshot_type: str | None = None,
+        session_id: str | None = None,
+        from_timestamp: float | None = None,
+        has_error: bool | None = None,
+        include_images: bool = True,
+    ) -> dict[str, Any]:
+        """Page forward through the store: matches with `seq > since_seq`, oldest first.
+
+        Returns `screenshots`, `next_seq` (pass it back as `since_seq` to continue), and
+        `has_more`. The start is found by binary search on the sequence index; when the page
+        is not full, `next_seq` advances past every non-matching shot that was scanned.
+        """
+
+        if screenshot_type == "all":
+            screenshot_type = None
+
+        since_seq = max(0, int(since_seq))
+        limit = max(0, int(limit))
+        selected: list[Screenshot] = []
+        with self._lock:
+            next_seq = min(since_seq, self._seq)
+            has_more = False
+            if limit:
+                items = self._items
+                by_seq = self._by_seq
+                start = bisect_left(by_seq, since_seq + 1, key=lambda shot: shot.seq)
+                for index in range(start, len(by_seq)):
+                    shot = by_seq[index]
+                    if shot.id not in items or not self._matches(
+                        shot,
+                        screenshot_type=screenshot_type,
+                        session_id=session_id,
+                        from_timestamp=from_timestamp,
+                        has_error=has_error,
+                    ):
+                        continue
+                    if len(selected) >= limit:
+                        has_more = True
+                        break
+                    selected.append(shot)
+                    next_seq = shot.seq
+                else:
+                    next_seq = self._seq
+            captured = [self._capture_locked(shot) for shot in selected]
+        return {
+            "screenshots": self._to_dicts(captured, include_images=include_images),
+            "next_seq": next_seq,
+            "has_more": has_more,
+        }
+
+    def close(self) -> None:
+        """Stop transcoding and release the spill tier (segment files are deleted).
+
+        In-RAM state is kept.
+        """
 
-        return [shot.to_dict(include_images=include_images) for shot in filtered[-last_n:]]
+        if self._transcoder is not None:
+            self._transcoder.close()
+        if self._compactor is not None:
+            self._compactor.shutdown(wait=True)
+        if self._spill is not None:
+            self._spill.close()
 
     def get_stats(self) -> dict[str, Any]:
         with self._lock:
             total = len(self._items)
             size_bytes = self.total_size_bytes
+            evictions_by_reason = dict(self._evictions_by_reason)
+            evictions_by_tier = dict(self._evictions_by_tier)
+            spilled_size_bytes = self.spilled_size_bytes
+            unique_images = len(self._blobs)
+            dedup_hits = self._dedup_hits
+            logical_size_bytes = self._logical_size_bytes
             current_session_id = self.current_session_id
             current_session_start = self.current_session_start
+            latest_seq = self._seq
 
         return {
             "total_screenshots": total,
+            "latest_seq": latest_seq,
             "max_screenshots": self._max_screenshots,
             "max_agent_step_per_session": self._max_agent_step_per_session,
+            "max_total_bytes": self._max_total_bytes,
             "total_size_bytes": size_bytes,
+            "spilled_size_bytes": spilled_size_bytes,
+            "dedup": {
+                "unique_images": unique_images,
+                "hits": dedup_hits,
+                "logical_size_bytes": logical_size_bytes,
+                "saved_bytes": max(0, logical_size_bytes - size_bytes - spilled_size_bytes),
+            },
+            "spill": self._spill.stats() if self._spill is not None else None,
+            "transcode": self._transcoder.stats() if self._transcoder is not None else None,
+            "evictions": {
+                "total": sum(evictions_by_reason.values()),
+                "by_reason": evictions_by_reason,
+                "by_tier": evictions_by_tier,
+            },
             "sampling_rate": self.SAMPLING_RATE,
             "stream_counter": self.stream_counter,
             "current_session_id": current_session_id,
@@ -0,0 +1,202 @@
+"""Append-only on-disk segments for screenshot image bytes that left the in-memory hot window.
+
+Only image bytes are spilled; screenshot metadata stays in RAM and keeps a `SpillRef` pointing
+at (segment, offset, length). Segments are read back through `mmap`, and sealed segments whose
+live ratio drops below a threshold are compacted (live records are rewritten into the active
+segment, refs are updated in place, and the old file is deleted).
+"""
+
+from __future__ import annotations
+
+import mmap
+import shutil
+import tempfile
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any, BinaryIO
+
+DEFAULT_MAX_SEGMENT_BYTES = 16 * 1024 * 1024
+DEFAULT_COMPACT_RATIO = 0.5
+
+
+class SpillRef:
+    """Location of one spilled payload; updated in place when its segment is compacted."""
+
+    __slots__ = ("segment_id", "offset", "length")
+
+    def __init__(self, *, segment_id: int, offset: int, length: int) -> None:
+        self.segment_id = segment_id
+        self.offset = offset
+        self.length = length
+
+
+@dataclass(eq=False)
+class _Segment:
+    segment_id: int
+    path: Path
+    size: int = 0
+    live_bytes: int = 0
+    refs: set[SpillRef] = field(default_factory=set)
+    mapping: mmap.mmap | None = None
+    mapped_size: int = 0
+
+    def unmap(self) -> None:
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+            self.mapped_size = 0
+
+
+def _remove_tree(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class SegmentSpillStore:
+    def __init__(
+        self,
+        *,
+        base_dir: str | Path | None = None,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+    ) -> None:
+        if base_dir is not None:
+            Path(base_dir).expanduser().mkdir(parents=True, exist_ok=True)
+        self._dir = Path(
+            tempfile.mkdtemp(
+                prefix="gsd-screenshots-",
+                dir=str(Path(base_dir).expanduser()) if base_dir is not None else None,
+            )
+        )
+        self._max_segment_bytes = max(1, int(max_segment_bytes))
+        self._compact_ratio = min(max(float(compact_ratio), 0.0), 1.0)
+        self._lock = Lock()
+        self._segments: dict[int, _Segment] = {}
+        self._next_segment_id = 0
+        self._active: _Segment | None = None
+        self._active_file: BinaryIO | None = None
+        self._compactions = 0
+        self._reclaimed_bytes = 0
+        self._closed = False
+        self._finalizer = weakref.finalize(self, _remove_tree, str(self._dir))
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    def _roll_locked(self) -> _Segment:
+        if self._active_file is not None:
+            self._active_file.close()
+        self._next_segment_id += 1
+        segment = _Segment(
+            segment_id=self._next_segment_id,
+            path=self._dir / f"segment-{self._next_segment_id:06d}.bin",
+        )
+        self._segments[segment.segment_id] = segment
+        self._active = segment
+        self._active_file = segment.path.open("ab")
+        return segment
+
+    def _append_locked(self, data: bytes, *, ref: SpillRef | None = None) -> SpillRef:
+        segment = self._active
+        if segment is None or (segment.size and segment.size + len(data) > self._max_segment_bytes):
+            segment = self._roll_locked()
+        handle = self._active_file
+        assert handle is not None
+        handle.write(data)
+        handle.flush()
+
+        if ref is None:
+            ref = SpillRef(segment_id=segment.segment_id, offset=segment.size, length=len(data))
+        else:
+            ref.segment_id = segment.segment_id
+            ref.offset = segment.size
+        segment.size += len(data)
+        segment.live_bytes += len(data)
+        segment.refs.add(ref)
+        return ref
+
+    def _read_locked(self, ref: SpillRef) -> bytes:
+        segment = self._segments.get(ref.segment_id)
+        if segment is None or ref not in segment.refs:
+            raise KeyError("spilled payload is no longer available")
+        if ref.length == 0:
+            return b""
+        end = ref.offset + ref.length
+        if segment.mapping is None or segment.mapped_size < end:
+            segment.unmap()
+            with segment.path.open("rb") as handle:
+                segment.mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            segment.mapped_size = len(segment.mapping)
+        return segment.mapping[ref.offset : end]
+
+    def append(self, data: bytes) -> SpillRef:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("spill store is closed")
+            return self._append_locked(data)
+
+    def read(self, ref: SpillRef) -> bytes:
+        with self._lock:
+            return self._read_locked(ref)
+
+    def release(self, ref: SpillRef) -> None:
+        with self._lock:
+            segment = self._segments.get(ref.segment_id)
+            if segment is None or ref not in segment.refs:
+                return
+            segment.refs.discard(ref)
+            segment.live_bytes = max(0, segment.live_bytes - ref.length)
+
+    def compact(self) -> int:
+        """Drop or rewrite sealed segments below the live ratio; returns reclaimed bytes."""
+
+        reclaimed = 0
+        with self._lock:
+            if self._closed:
+                return 0
+            candidates = [
+                segment
+                for segment in self._segments.values()
+                if segment is not self._active
+                and segment.size
+                and segment.live_bytes < segment.size * self._compact_ratio
+            ]
+            for segment in candidates:
+                for ref in sorted(segment.refs, key=lambda item: item.offset):
+                    data = self._read_locked(ref)
+                    segment.refs.discard(ref)
+                    self._append_locked(data, ref=ref)
+                segment.unmap()
+                segment.path.unlink(missing_ok=True)
+                del self._segments[segment.segment_id]
+                reclaimed += segment.size - segment.live_bytes
+                self._compactions += 1
+            self._reclaimed_bytes += reclaimed
+        return reclaimed
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": str(self._dir),
+                "segments": len(self._segments),
+                "file_bytes": sum(segment.size for segment in self._segments.values()),
+                "live_bytes": sum(segment.live_bytes for segment in self._segments.values()),
+                "compactions": self._compactions,
+                "reclaimed_bytes": self._reclaimed_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
+            for segment in self._segments.values():
+                segment.unmap()
+            self._segments.clear()
+            self._active = None
+        self._finalizer()
@@ -0,0 +1,146 @@
+"""Background re-encoding of stored screenshots to a compact image format.
+
+`ScreenshotTranscoder` runs jobs on a small thread pool so encoding never blocks the event
+loop. Each job reads the stored image, re-encodes it with Pillow, and hands the result to a
+callback that swaps it into the store. Results that are not smaller than the input are
+dropped. When Pillow is unavailable, every job counts as failed and the original is kept.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Any
+
+logger = logging.getLogger("gsd_browser.screenshots")
+
+TRANSCODE_MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+DEFAULT_TRANSCODE_QUALITY = 75
+
+
+def normalize_transcode_format(value: str | None) -> str | None:
+    if not value:
+        return None
+    normalized = value.strip().lower()
+    if normalized == "jpg":
+        normalized = "jpeg"
+    return normalized if normalized in TRANSCODE_MIME_TYPES else None
+
+
+def transcode_image(data: bytes, *, image_format: str, quality: int) -> bytes | None:
+    """Re-encode `data` as `image_format` ("jpeg" or "webp"); None if it cannot be done."""
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            converted = image if image.mode in ("RGB", "L") else image.convert("RGB")
+            output = io.BytesIO()
+            converted.save(output, format=image_format.upper(), quality=int(quality))
+            return output.getvalue()
+    except Exception:  # noqa: BLE001
+        logger.debug("Screenshot transcode failed", exc_info=True)
+        return None
+
+
+class ScreenshotTranscoder:
+    def __init__(
+        self,
+        *,
+        image_format: str,
+        quality: int = DEFAULT_TRANSCODE_QUALITY,
+        workers: int = 1,
+    ) -> None:
+        normalized = normalize_transcode_format(image_format)
+        if normalized is None:
+            raise ValueError(f"Unsupported transcode format: {image_format!r}")
+        self.image_format = normalized
+        self.mime_type = TRANSCODE_MIME_TYPES[normalized]
+        self.quality = min(max(int(quality), 1), 100)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(workers)), thread_name_prefix="gsd-screenshot-transcode"
+        )
+        self._lock = Lock()
+        self._pending: set[Future[None]] = set()
+        self._counts = {"queued": 0, "completed": 0, "skipped": 0, "failed": 0}
+        self._saved_bytes = 0
+        self._closed = False
+
+    def submit(
+        self,
+        read: Callable[[], bytes | None],
+        swap: Callable[[bytes, str], bool],
+    ) -> bool:
+        """Queue a job: `read()` supplies the input, `swap(encoded, mime)` installs the result.
+
+        `swap` returns False when the image no longer qualifies (evicted, spilled, pinned).
+        """
+
+        with self._lock:
+            if self._closed:
+                return False
+            self._counts["queued"] += 1
+            future = self._executor.submit(self._run, read, swap)
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return True
+
+    def _discard(self, future: Future[None]) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _note(self, outcome: str, *, saved_bytes: int = 0) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+            self._saved_bytes += saved_bytes
+
+    def _run(self, read: Callable[[], bytes | None], swap: Callable[[bytes, str], bool]) -> None:
+        try:
+            original = read()
+            if not original:
+                self._note("skipped")
+                return
+            encoded = transcode_image(
+                original, image_format=self.image_format, quality=self.quality
+            )
+            if encoded is None:
+                self._note("failed")
+                return
+            if len(encoded) >= len(original) or not swap(encoded, self.mime_type):
+                self._note("skipped")
+                return
+            self._note("completed", saved_bytes=len(original) - len(encoded))
+        except Exception:  # noqa: BLE001
+            logger.exception("Screenshot transcode job failed")
+            self._note("failed")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until queued jobs finish; returns False on timeout."""
+
+        with self._lock:
+            pending = set(self._pending)
+        if not pending:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "format": self.image_format,
+                "quality": self.quality,
+                "pending": len(self._pending),
+                **self._counts,
+                "saved_bytes": self._saved_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
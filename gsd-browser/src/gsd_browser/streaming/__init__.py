@@ -3,15 +3,19 @@
 from .env import (
     StreamingMode,
     StreamingQuality,
+    StreamingSampler,
     normalize_streaming_mode,
     normalize_streaming_quality,
+    normalize_streaming_sampler,
 )
 from .stats import StreamingStats
 
 __all__ = [
     "StreamingMode",
     "StreamingQuality",
+    "StreamingSampler",
     "StreamingStats",
     "normalize_streaming_mode",
     "normalize_streaming_quality",
+    "normalize_streaming_sampler",
 ]
@@ -18,6 +18,7 @@ import socketio
 
 from ..screenshot_manager import ScreenshotManager
 from .env import StreamingQuality
+from .frame_sampler import ChangeDetectionSampler
 from .stats import StreamingStats
 
 logger = logging.getLogger("gsd_browser.streaming")
@@ -51,6 +52,7 @@ class CdpScreencastStreamer:
         namespace: str,
         frame_queue_max: int,
         sample_every_n: int = 10,
+        change_sampler: ChangeDetectionSampler | None = None,
     ) -> None:
         self._sio = sio
         self._namespace = namespace
@@ -59,6 +61,8 @@ class CdpScreencastStreamer:
         self._quality = quality
         self._frame_queue: asyncio.Queue[CdpFrame] = asyncio.Queue(maxsize=frame_queue_max)
         self._sample_every_n = max(1, sample_every_n)
+        # Optional filter over the every-Nth candidates: unchanged frames are skipped.
+        self._change_sampler = change_sampler
 
         self._lifecycle_lock = asyncio.Lock()
         self._emit_loop: asyncio.AbstractEventLoop | None = None
@@ -85,6 +89,7 @@ class CdpScreencastStreamer:
             self._seq = 0
             self._active_run_session_id = session_id
             self._drain_queue()
+            self._reset_change_sampler()
             self._sender_task = asyncio.create_task(self._sender_loop(session_id=session_id))
 
             self._cdp_session = await page.context.new_cdp_session(page)
@@ -145,6 +150,7 @@ class CdpScreencastStreamer:
             self._running = True
             self._seq = 0
             self._drain_queue()
+            self._reset_change_sampler()
 
             self._stats.note_cdp_attached(run_session_id=session_id, cdp_session_id=cdp_session_id)
             self._sender_task = asyncio.create_task(self._sender_loop(session_id=session_id))
@@ -239,6 +245,10 @@ class CdpScreencastStreamer:
         except asyncio.QueueEmpty:
             return
 
+    def _reset_change_sampler(self) -> None:
+        if self._change_sampler is not None:
+            self._change_sampler.reset()
+
     async def _emit(self, *, event: str, payload: dict[str, Any]) -> None:
         coro = self._sio.emit(event, payload, namespace=self._namespace)
         target_loop = self._emit_loop
@@ -507,30 +517,59 @@ class CdpScreencastStreamer:
             )
             if should_sample:
                 self._stats.note_sampler_seen()
-                try:
-                    image_bytes = base64.b64decode(frame.data_base64)
-                except Exception:  # noqa: BLE001
-                    logger.exception("Failed to decode sampled frame", extra={"seq": frame.seq})
-                else:
-                    self._screenshot_manager.record_screenshot(
-                        screenshot_type="stream_sample",
-                        image_bytes=image_bytes,
-                        mime_type="image/jpeg",
-                        session_id=session_id,
-                        captured_at=emitted_ts,
-                        metadata={
-                            "seq": frame.seq,
-                            "latency_ms": latency_ms,
-                            "streaming_mode": "cdp",
-                        },
-                    )
-                    self._stats.note_sampler_stored()
+                await self._sample_frame(
+                    frame=frame,
+                    session_id=session_id,
+                    emitted_ts=emitted_ts,
+                    latency_ms=latency_ms,
+                )
 
             logger.debug(
                 "Emitted screencast frame",
                 extra={"seq": frame.seq, "latency_ms": latency_ms, "session_id": session_id},
             )
 
+    async def _sample_frame(
+        self, *, frame: CdpFrame, session_id: str, emitted_ts: float, latency_ms: float
+    ) -> None:
+        # The store keeps the base64 text as received; frames are only decoded when the
+        # change sampler needs pixels.
+        if len(frame.data_base64) % 4:
+            logger.warning("Discarding malformed sampled frame", extra={"seq": frame.seq})
+            return
+        change_sampler = self._change_sampler
+        if change_sampler is not None:
+            # Base64 and JPEG decoding are CPU bound; keep them off the event loop so frame
+            # emission is not stalled. Frames are sampled one at a time by this sender.
+            try:
+                store = await asyncio.to_thread(
+                    _should_store_frame, change_sampler, frame.data_base64, emitted_ts
+                )
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to decode sampled frame", extra={"seq": frame.seq})
+                return
+            if not store:
+                self._stats.note_sampler_skipped()
+                return
+
+        self._screenshot_manager.record_screenshot(
+            screenshot_type="stream_sample",
+            image_base64=frame.data_base64,
+            mime_type="image/jpeg",
+            session_id=session_id,
+            captured_at=emitted_ts,
+            metadata={
+                "seq": frame.seq,
+                "latency_ms": latency_ms,
+                "streaming_mode": "cdp",
+            },
+        )
+        self._stats.note_sampler_stored()
+
+
+def _should_store_frame(sampler: ChangeDetectionSampler, data_base64: str, now: float) -> bool:
+    return sampler.should_store(base64.b64decode(data_base64), now=now)
+
 
 def _truncate_cdp_error(exc: Exception) -> str:
     text = str(exc).strip()
@@ -63,11 +63,13 @@ function fmtTs(tsSeconds) {
 
 let streamSocket = null;
 let ctrlSocket = null;
+let eventsSocket = null;
 let ctrlSid = null;
 let authRequired = false;
 let lastFrameWallTs = null;
 let fpsCounter = { t0: nowMs(), frames: 0 };
 let sampleSeen = 0;
+const RUN_EVENTS_MAX = 100;
 let lastControlState = {
   holder_sid: null,
   held_since_ts: null,
@@ -111,6 +113,19 @@ async function connectSockets() {
     timeout: 5000
   });
 
+  eventsSocket = io('/events', {
+    transports: ['websocket'],
+    auth,
+    reconnection: true,
+    reconnectionAttempts: 10,
+    timeout: 5000
+  });
+
+  eventsSocket.on('connect', () => {
+    eventsSocket.emit('subscribe', { event_types: ['agent', 'console', 'network'] });
+  });
+  eventsSocket.on('run_events', (payload) => renderRunEvents(payload));
+
   streamSocket.on('connect', () => {
     setPill($('connStatus'), 'stream connected', 'pill-good');
   });
@@ -178,6 +193,19 @@ async function connectSockets() {
   });
 }
 
+function renderRunEvents(payload) {
+  const list = $('runEvents');
+  for (const event of payload?.events ?? []) {
+    const node = document.createElement('li');
+    node.className = event?.has_error ? 'error' : '';
+    node.textContent = `${fmtTs(event?.timestamp)} ${event?.event_type ?? '?'} ${event?.summary ?? ''}`;
+    node.title = event?.session_id ?? '';
+    list.prepend(node);
+  }
+  while (list.childElementCount > RUN_EVENTS_MAX) list.lastElementChild.remove();
+  $('runEventsDropped').textContent = String(payload?.dropped ?? 0);
+}
+
 function updateControlState(state) {
   lastControlState = {
     holder_sid: state?.holder_sid ?? null,
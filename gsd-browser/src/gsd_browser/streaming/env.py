@@ -6,6 +6,7 @@ from typing import Literal, cast
 
 StreamingMode = Literal["cdp", "screenshot"]
 StreamingQuality = Literal["low", "med", "high"]
+StreamingSampler = Literal["interval", "change"]
 
 
 def normalize_streaming_mode(value: str | None) -> StreamingMode:
@@ -24,3 +25,12 @@ def normalize_streaming_quality(value: str | None) -> StreamingQuality:
     if normalized in ("low", "med", "high"):
         return cast(StreamingQuality, normalized)
     return "med"
+
+
+def normalize_streaming_sampler(value: str | None) -> StreamingSampler:
+    if not value:
+        return "interval"
+    normalized = value.strip().lower()
+    if normalized in ("interval", "change"):
+        return cast(StreamingSampler, normalized)
+    return "interval"
@@ -0,0 +1,98 @@
+"""Change-detection sampling for screencast frames stored as `stream_sample` screenshots.
+
+Each candidate frame is reduced to a 16x16 grid of average luminance. A frame is stored only
+when at least `threshold` grid cells changed by more than `cell_tolerance` levels since the
+last stored sample, or when `max_interval_s` has elapsed since that sample. Frames that cannot
+be decoded (or when Pillow is unavailable) fall back to an exact byte comparison.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+from collections.abc import Callable
+
+DEFAULT_CHANGE_THRESHOLD = 1
+DEFAULT_CELL_TOLERANCE = 6
+DEFAULT_MAX_INTERVAL_S = 10.0
+
+_GRID_SIZE = 16
+
+
+def luminance_fingerprint(image_bytes: bytes) -> bytes | None:
+    """Return a 16x16 grayscale thumbnail of the frame, or None when it cannot be decoded."""
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            # JPEG draft mode decodes at a reduced DCT scale, which keeps this cheap.
+            image.draft("L", (_GRID_SIZE * 8, _GRID_SIZE * 8))
+            return (
+                image.convert("L").resize((_GRID_SIZE, _GRID_SIZE), Image.Resampling.BOX).tobytes()
+            )
+    except Exception:  # noqa: BLE001
+        return None
+
+
+class ChangeDetectionSampler:
+    def __init__(
+        self,
+        *,
+        threshold: int = DEFAULT_CHANGE_THRESHOLD,
+        cell_tolerance: int = DEFAULT_CELL_TOLERANCE,
+        max_interval_s: float = DEFAULT_MAX_INTERVAL_S,
+        fingerprint: Callable[[bytes], bytes | None] = luminance_fingerprint,
+    ) -> None:
+        self._threshold = max(1, int(threshold))
+        self._cell_tolerance = max(0, int(cell_tolerance))
+        self._max_interval_s = max(0.0, float(max_interval_s))
+        self._fingerprint = fingerprint
+        self._last_fingerprint: bytes | None = None
+        self._last_digest: bytes | None = None
+        self._last_stored_ts: float | None = None
+
+    def reset(self) -> None:
+        self._last_fingerprint = None
+        self._last_digest = None
+        self._last_stored_ts = None
+
+    def _changed_cells(self, current: bytes, previous: bytes) -> int:
+        if len(current) != len(previous):
+            return len(current)
+        tolerance = self._cell_tolerance
+        return sum(1 for a, b in zip(current, previous, strict=True) if abs(a - b) > tolerance)
+
+    def should_store(self, image_bytes: bytes, *, now: float) -> bool:
+        """Decide whether a candidate frame is stored; updates the reference sample if so."""
+
+        fingerprint = self._fingerprint(image_bytes)
+        digest = (
+            hashlib.blake2b(image_bytes, digest_size=16).digest() if fingerprint is None else None
+        )
+
+        if self._last_stored_ts is None:
+            changed = True
+        elif fingerprint is not None and self._last_fingerprint is not None:
+            changed = self._changed_cells(fingerprint, self._last_fingerprint) >= self._threshold
+        elif digest is not None and self._last_digest is not None:
+            changed = digest != self._last_digest
+        else:
+            # The previous sample used the other comparison mode; treat it as a change.
+            changed = True
+
+        interval_elapsed = (
+            self._last_stored_ts is not None
+            and self._max_interval_s > 0
+            and now - self._last_stored_ts >= self._max_interval_s
+        )
+        if not changed and not interval_elapsed:
+            return False
+
+        self._last_fingerprint = fingerprint
+        self._last_digest = digest
+        self._last_stored_ts = now
+        return True
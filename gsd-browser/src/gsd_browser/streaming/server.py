@@ -18,9 +18,16 @@ from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from ..config import Settings
+from ..run_event_store import BaseRunEventStore
+from ..run_event_subscriptions import RunEventSubscription
 from ..screenshot_manager import ScreenshotManager
 from .cdp_screencast import CdpScreencastStreamer
-from .env import normalize_streaming_mode, normalize_streaming_quality
+from .env import (
+    normalize_streaming_mode,
+    normalize_streaming_quality,
+    normalize_streaming_sampler,
+)
+from .frame_sampler import ChangeDetectionSampler
 from .security import (
     FixedWindowRateLimiter,
     NonceStore,
@@ -34,6 +41,8 @@ logger = logging.getLogger("gsd_browser.streaming")
 
 DEFAULT_STREAM_NAMESPACE = "/stream"
 DEFAULT_CTRL_NAMESPACE = "/ctrl"
+DEFAULT_EVENTS_NAMESPACE = "/events"
+RUN_EVENT_BATCH_MAX = 100
 
 
 @dataclass(frozen=True)
@@ -45,6 +54,7 @@ class StreamingRuntime:
     screenshots: ScreenshotManager
     cdp_streamer: CdpScreencastStreamer
     control_state: ControlState
+    run_events: BaseRunEventStore | None = None
 
     async def emit_browser_update(
         self,
@@ -56,17 +66,18 @@ class StreamingRuntime:
         metadata: dict[str, Any] | None = None,
     ) -> None:
         ts = timestamp if timestamp is not None else time.time()
+        image_base64 = base64.b64encode(image_bytes).decode("ascii")
         payload = {
             "session_id": session_id,
             "timestamp": ts,
             "mime_type": mime_type,
-            "image_base64": base64.b64encode(image_bytes).decode("ascii"),
+            "image_base64": image_base64,
             "metadata": dict(metadata or {}),
         }
         await self.sio.emit("browser_update", payload, namespace=DEFAULT_STREAM_NAMESPACE)
         self.screenshots.record_screenshot(
             screenshot_type="stream_sample",
-            image_bytes=image_bytes,
+            image_base64=image_base64,
             mime_type=mime_type,
             session_id=session_id,
             captured_at=ts,
@@ -245,9 +256,11 @@ def create_streaming_app(
     *,
     settings: Settings,
     screenshots: ScreenshotManager | None = None,
+    run_events: BaseRunEventStore | None = None,
 ) -> StreamingRuntime:
     streaming_mode = normalize_streaming_mode(settings.streaming_mode)
     streaming_quality = normalize_streaming_quality(settings.streaming_quality)
+    streaming_sampler = normalize_streaming_sampler(getattr(settings, "streaming_sampler", None))
 
     frame_queue_max = 2
     stats = StreamingStats(streaming_mode=streaming_mode, frame_queue_max=frame_queue_max)
@@ -275,6 +288,7 @@ def create_streaming_app(
         sample_every_n=10
         if streaming_quality == "med"
         else (15 if streaming_quality == "low" else 5),
+        change_sampler=ChangeDetectionSampler() if streaming_sampler == "change" else None,
     )
 
     api_app = FastAPI()
@@ -623,6 +637,85 @@ def create_streaming_app(
     async def input_type(sid: str, payload: Any) -> dict[str, Any]:
         return await _handle_ctrl_input_event(sid=sid, event="input_type", payload=payload)
 
+    # One live run event subscription per /events client, pumped by a background task.
+    event_subscriptions: dict[str, RunEventSubscription] = {}
+
+    def _close_event_subscription(sid: str) -> None:
+        subscription = event_subscriptions.pop(sid, None)
+        if subscription is not None:
+            subscription.close()
+
+    async def _pump_run_events(sid: str, subscription: RunEventSubscription) -> None:
+        while True:
+            events = await subscription.next_batch(RUN_EVENT_BATCH_MAX)
+            if not events:
+                return
+            await sio.emit(
+                "run_events",
+                {"events": events, "dropped": subscription.dropped},
+                namespace=DEFAULT_EVENTS_NAMESPACE,
+                to=sid,
+            )
+
+    async def connect_events(
+        sid: str, environ: dict[str, Any], auth: dict[str, Any] | None
+    ) -> None:
+        if not authorize_socket_connection(
+            config=auth_config,
+            nonce_store=nonce_store,
+            namespace=DEFAULT_EVENTS_NAMESPACE,
+            sid=sid,
+            environ=environ,
+            auth=auth,
+            connect_limiter=connect_limiter,
+        ):
+            raise ConnectionRefusedError("unauthorized")
+        logger.info("Client connected", extra={"sid": sid, "namespace": DEFAULT_EVENTS_NAMESPACE})
+
+    async def disconnect_events(sid: str, reason: Any = None) -> None:
+        logger.info(
+            "Client disconnected", extra={"sid": sid, "namespace": DEFAULT_EVENTS_NAMESPACE}
+        )
+        _close_event_subscription(sid)
+
+    async def subscribe_events(sid: str, payload: Any) -> dict[str, Any]:
+        if not event_limiter.allow(f"{DEFAULT_EVENTS_NAMESPACE}:{sid}"):
+            get_security_logger().info(
+                "rate_limited_event",
+                extra={"namespace": DEFAULT_EVENTS_NAMESPACE, "sid": sid, "event": "subscribe"},
+            )
+            return {"ok": False, "error": "rate_limited"}
+        if run_events is None:
+            return {"ok": False, "error": "run_events_unavailable"}
+        options = payload if isinstance(payload, dict) else {}
+        session_id = _normalize_str(options.get("session_id")) or None
+        raw_types = options.get("event_types")
+        event_types = (
+            [item for item in (_normalize_str(value) for value in raw_types) if item]
+            if isinstance(raw_types, list)
+            else None
+        )
+        _close_event_subscription(sid)
+        subscription = run_events.subscribe(session_id=session_id, event_types=event_types)
+        event_subscriptions[sid] = subscription
+        sio.start_background_task(_pump_run_events, sid, subscription)
+        return {"ok": True, **subscription.stats()}
+
+    async def unsubscribe_events(sid: str, _: Any) -> dict[str, Any]:
+        subscription = event_subscriptions.get(sid)
+        stats = subscription.stats() if subscription is not None else {}
+        _close_event_subscription(sid)
+        return {"ok": True, **stats}
+
+    # Registered by explicit event name: `@sio.event` would name them after the functions.
+    for event_name, handler in (
+        ("connect", connect_events),
+        ("disconnect", disconnect_events),
+        ("subscribe", subscribe_events),
+        ("unsubscribe", unsubscribe_events),
+    ):
+        sio.on(event_name, handler=handler, namespace=DEFAULT_EVENTS_NAMESPACE)
+
     asgi_app = socketio.ASGIApp(sio, other_asgi_app=api_app)
     return StreamingRuntime(
         asgi_app=asgi_app,
@@ -632,6 +725,7 @@ def create_streaming_app(
         screenshots=screenshot_manager,
         cdp_streamer=cdp_streamer,
         control_state=control_state,
+        run_events=run_events,
     )
 
 
@@ -30,6 +30,7 @@ class StreamingStats:
 
     sampler_frames_seen: int = 0
     sampler_frames_stored: int = 0
+    sampler_frames_skipped: int = 0
 
     _lock: Lock = field(default_factory=Lock, init=False, repr=False, compare=False)
 
@@ -57,6 +58,10 @@ class StreamingStats:
         with self._lock:
             self.sampler_frames_stored += 1
 
+    def note_sampler_skipped(self) -> None:
+        with self._lock:
+            self.sampler_frames_skipped += 1
+
     def note_cdp_attached(self, *, run_session_id: str, cdp_session_id: str) -> None:
         with self._lock:
             self.cdp_available = True
@@ -91,5 +96,6 @@ class StreamingStats:
                 "sampler_totals": {
                     "seen": self.sampler_frames_seen,
                     "stored": self.sampler_frames_stored,
+                    "skipped": self.sampler_frames_skipped,
                 },
             }
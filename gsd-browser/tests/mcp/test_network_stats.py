@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+from typing import Any
+
+import pytest
+
+from gsd_browser import mcp_server as mcp_server_mod
+from gsd_browser.capture_filter import CaptureFilterConfig, is_noise_network
+from gsd_browser.network_stats import QuantileSketch, RunNetworkStats
+from gsd_browser.run_event_capture import CDPRunEventCapture
+from gsd_browser.run_event_store import RunEventStore
+
+
+def test_quantile_sketch_stays_within_relative_accuracy_in_fixed_memory() -> None:
+    rng = random.Random(3)
+    values = [rng.lognormvariate(4.0, 1.2) for _ in range(20_000)]
+    sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=512)
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[math.ceil(q * len(ordered)) - 1]
+        estimate = sketch.quantile(q)
+        assert estimate is not None
+        assert abs(estimate - exact) <= 0.011 * exact
+    assert sketch.quantile(1.0) == max(values)
+
+    tiny = QuantileSketch(max_buckets=8)
+    for value in range(1, 10_000):
+        tiny.add(float(value))
+    assert len(tiny._buckets) <= 8
+    # Collapsing merges the low end; the tail is unaffected.
+    assert abs(tiny.quantile(0.999) - 9990) <= 0.011 * 9990
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_run_network_stats_groups_by_host_and_endpoint() -> None:
+    stats = RunNetworkStats(max_endpoints=3)
+    for index in range(10):
+        stats.record(
+            method="get", url="https://API.example.com/items", status=200, duration_ms=10.0 + index
+        )
+    stats.record(method="POST", url="https://api.example.com/items", status=503, duration_ms=900)
+    stats.record(method="GET", url="https://cdn.example.com/app.js", failed=True)
+    stats.record(method="GET", url="https://cdn.example.com/extra.css", status=200, duration_ms=1)
+
+    snapshot = stats.snapshot(top_n=5)
+    assert snapshot["totals"]["count"] == 13
+    assert snapshot["totals"]["errors"] == 2
+    assert snapshot["totals"]["untimed"] == 1
+    assert [row["host"] for row in snapshot["hosts"]] == ["api.example.com", "cdn.example.com"]
+    assert [row["endpoint"] for row in snapshot["endpoints"]] == [
+        "POST api.example.com/items",
+        "GET api.example.com/items",
+        "(other)",
+        # Failed before a duration was measured, so it has no percentiles and sorts last.
+        "GET cdn.example.com/app.js",
+    ]
+    slow = snapshot["endpoints"][0]
+    assert (slow["count"], slow["error_rate"], slow["statuses"]) == (1, 1.0, {"5xx": 1})
+    by_count = stats.snapshot(top_n=1, sort_by="count")
+    assert by_count["endpoints"][0]["endpoint"] == "GET api.example.com/items"
+    assert by_count["endpoints"][0]["p50_ms"] == pytest.approx(14.0, rel=0.02)
+
+
+def test_cdp_capture_updates_network_stats_and_get_run_stats(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    store = RunEventStore()
+    client = type("Client", (), {})()
+    client._event_registry = type("Registry", (), {"_handlers": {}})()
+    capture = CDPRunEventCapture(store=store, session_id="s-1")
+    capture.attach(client)
+    handlers: dict[str, Any] = client._event_registry._handlers
+
+    async def _exercise() -> None:
+        for index, (status, finished) in enumerate(((200, True), (500, True), (None, False))):
+            request_id = f"r-{index}"
+            await handlers["Network.requestWillBeSent"](
+                {
+                    "requestId": request_id,
+                    "timestamp": 100.0,
+                    "request": {"method": "GET", "url": f"https://example.com/api?q={index}"},
+                },
+                None,
+            )
+            if status is not None:
+                await handlers["Network.responseReceived"](
+                    {"requestId": request_id, "response": {"status": status}}, None
+                )
+            done = "Network.loadingFinished" if finished else "Network.loadingFailed"
+            await handlers[done](
+                {"requestId": request_id, "timestamp": 100.0 + 0.1 * (index + 1)}, None
+            )
+
+    asyncio.run(_exercise())
+
+    monkeypatch.setattr(
+        mcp_server_mod, "get_runtime", lambda: type("Runtime", (), {"run_events": store})()
+    )
+    response = asyncio.run(mcp_server_mod.get_run_stats(session_id="s-1", top_n=3))
+    payload = json.loads(response[0].text)
+    assert payload["version"] == "gsd.get_run_stats.v1"
+    assert payload["error"] is None
+    network = payload["network"]
+    assert (network["totals"]["count"], network["totals"]["errors"]) == (3, 2)
+    assert network["endpoints"][0]["endpoint"] == "GET example.com/api"
+    assert network["totals"]["p99_ms"] == pytest.approx(300.0, rel=0.02)
+
+    dev = mcp_server_mod._dev_run_event_excerpts(store, session_id="s-1", max_per_type=2)
+    assert dev["network_stats"]["totals"]["count"] == 3
+    assert dev["network_stats"]["slowest_endpoints"][0]["endpoint"] == "GET example.com/api"
+
+    missing = json.loads(asyncio.run(mcp_server_mod.get_run_stats(session_id="nope"))[0].text)
+    assert missing["network"] is None and "nope" in missing["error"]
+    invalid = json.loads(
+        asyncio.run(mcp_server_mod.get_run_stats(session_id="s-1", sort_by="speed"))[0].text
+    )
+    assert invalid["network"] is None and "sort_by" in invalid["error"]
+
+
+def test_cdp_capture_records_resource_timing_transfer_size_and_cache() -> None:
+    store = RunEventStore()
+    client = type("Client", (), {})()
+    client._event_registry = type("Registry", (), {"_handlers": {}})()
+    capture = CDPRunEventCapture(store=store, session_id="s-1")
+    capture.attach(client)
+    handlers: dict[str, Any] = client._event_registry._handlers
+    timing = {
+        "dnsStart": 0.5,
+        "dnsEnd": 4.5,
+        "connectStart": 4.5,
+        "connectEnd": 40.0,
+        "sslStart": 12.0,
+        "sslEnd": 40.0,
+        "sendStart": 40.5,
+        "sendEnd": 41.0,
+        "receiveHeadersEnd": 161.25,
+    }
+
+    async def _request(request_id: str, url: str, response: dict[str, Any], size: int) -> None:
+        await handlers["Network.requestWillBeSent"](
+            {"requestId": request_id, "timestamp": 10.0, "request": {"method": "GET", "url": url}},
+            None,
+        )
+        await handlers["Network.responseReceived"](
+            {"requestId": request_id, "response": response}, None
+        )
+        await handlers["Network.loadingFinished"](
+            {"requestId": request_id, "timestamp": 10.2, "encodedDataLength": size}, None
+        )
+
+    async def _exercise() -> None:
+        await _request(
+            "r-1",
+            "https://example.com/api?token=secret",
+            {"status": 200, "protocol": "h2", "timing": timing, "headers": {"x": "y"}},
+            2048,
+        )
+        # Reused connection: CDP reports -1 for the phases that did not happen.
+        reused = {key: -1.0 for key in timing} | {"sendEnd": 1.0, "receiveHeadersEnd": 3.0}
+        await _request("r-2", "https://example.com/app.js", {"status": 200, "timing": reused}, 0)
+        await _request(
+            "r-3", "https://example.com/logo.png", {"status": 200, "fromDiskCache": True}, 0
+        )
+
+    asyncio.run(_exercise())
+
+    events = store.get_events(
+        session_id="s-1", event_types=["network"], include_details=True, since_seq=0
+    )
+    first = events[0]["details"]
+    assert first["url"] == "https://example.com/api"
+    assert (first["protocol"], first["bytes"], first.get("cache")) == ("h2", 2048, None)
+    assert first["timing"] == {
+        "dns_ms": 4.0,
+        "connect_ms": 35.5,
+        "tls_ms": 28.0,
+        "ttfb_ms": 120.2,
+    }
+    assert "headers" not in json.dumps(events)
+    assert events[1]["details"]["timing"] == {"ttfb_ms": 2.0}
+    assert events[2]["details"]["cache"] == "disk"
+
+    totals = store.get_network_stats("s-1")["totals"]
+    assert (totals["bytes"], totals["cache_hits"]) == (2048, 1)
+    assert totals["cache_hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+    assert totals["max_ttfb_ms"] == 120.2
+    assert totals["slowest_ttfb_endpoint"] == "GET example.com/api"
+
+
+def test_cdp_capture_collapses_noise_and_repeated_polls_into_counters() -> None:
+    store = RunEventStore()
+    client = type("Client", (), {})()
+    client._event_registry = type("Registry", (), {"_handlers": {}})()
+    capture = CDPRunEventCapture(
+        store=store, session_id="s-1", capture_filter=CaptureFilterConfig(poll_threshold=2)
+    )
+    capture.attach(client)
+    handlers: dict[str, Any] = client._event_registry._handlers
+
+    async def _request(request_id: str, url: str, status: int) -> None:
+        await handlers["Network.requestWillBeSent"](
+            {"requestId": request_id, "timestamp": 1.0, "request": {"method": "GET", "url": url}},
+            None,
+        )
+        await handlers["Network.responseReceived"](
+            {"requestId": request_id, "response": {"status": status}}, None
+        )
+        await handlers["Network.loadingFinished"]({"requestId": request_id, "timestamp": 1.5}, None)
+
+    async def _exercise() -> None:
+        await _request("a-1", "https://www.google-analytics.com/g/collect?v=2", 204)
+        await _request("a-2", "https://example.com/cdn-cgi/rum", 204)
+        # Failures are never collapsed, even on noise paths.
+        await _request("a-3", "https://example.com/cdn-cgi/rum", 503)
+        # Noise paths match whole path segments anywhere in the path, not substrings.
+        await _request("c-1", "https://example.com/api/collections/42", 200)
+        await _request("c-2", "https://example.com/api/analytics", 200)
+        await _request("c-3", "https://example.com/reports/analytics-v2", 200)
+        for index in range(4):
+            await _request(f"p-{index}", f"https://example.com/api/status?n={index}", 200)
+        await _request("p-err", "https://example.com/api/status", 500)
+        await _request("other", "https://example.com/api/items", 200)
+
+    asyncio.run(_exercise())
+
+    events = store.get_events(session_id="s-1", event_types=["network"], since_seq=0)
+    assert [event["summary"] for event in events] == [
+        "GET https://example.com/cdn-cgi/rum",
+        "GET https://example.com/api/collections/42",
+        "GET https://example.com/reports/analytics-v2",
+        "GET https://example.com/api/status",
+        "GET https://example.com/api/status",
+        # A poll that starts failing is recorded.
+        "GET https://example.com/api/status",
+        "GET https://example.com/api/items",
+    ]
+    assert [event["has_error"] for event in events] == [
+        True,
+        False,
+        False,
+        False,
+        False,
+        True,
+        False,
+    ]
+
+    stats = store.get_network_stats("s-1")
+    assert stats["totals"]["count"] == 12
+    assert stats["collapsed_requests"] == 5
+    rows = {(row["reason"], row["host"], row["path"]): row for row in stats["collapsed"]}
+    assert rows[("poll", "example.com", "/api/status")]["count"] == 2
+    assert rows[("poll", "example.com", "/api/status")]["total_duration_ms"] == 1000.0
+    assert rows[("noise", "example.com", "/cdn-cgi/rum")]["count"] == 1
+    assert rows[("noise", "www.google-analytics.com", "/g/collect")]["count"] == 1
+    assert rows[("noise", "example.com", "/api/analytics")]["count"] == 1
+
+    capture.detach(client)
+    unfiltered = RunEventStore()
+    capture = CDPRunEventCapture(
+        store=unfiltered,
+        session_id="s-1",
+        capture_filter=CaptureFilterConfig(collapse_noise=False, poll_threshold=0),
+    )
+    capture.attach(client)
+    asyncio.run(_exercise())
+    assert unfiltered.get_counts("s-1")["network"] == 12
+
+
+def test_noise_paths_match_whole_segments_anywhere_in_the_path() -> None:
+    for url in (
+        "https://example.com/g/collect?v=2",
+        "https://example.com/api/analytics",
+        "https://example.com/tr/pixel/",
+        "https://example.com/collect/v2",
+        "https://example.com/static/cdn-cgi/beacon/expect-ct",
+    ):
+        assert is_noise_network(url=url, error=None), url
+    for url in (
+        "https://example.com/api/collections/42",
+        "https://example.com/reports/analytics-v2",
+        "https://example.com/pixels",
+        "https://example.com/cdn-cgi/beacons",
+        "https://example.com/?next=/collect",
+    ):
+        assert not is_noise_network(url=url, error=None), url
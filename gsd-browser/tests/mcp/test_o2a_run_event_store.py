@@ -28,6 +28,15 @@ def _load_run_event_store_class() -> type[Any] | None:
     return None
 
 
+@pytest.fixture(params=["memory", "sqlite"])
+def store_cls(request: pytest.FixtureRequest) -> type[Any] | None:
+    if request.param == "sqlite":
+        from gsd_browser.run_event_sqlite import SqliteRunEventStore
+
+        return SqliteRunEventStore
+    return _load_run_event_store_class()
+
+
 def _make_store(
     store_cls: type[Any],
 ) -> tuple[Any, int | None, int | None]:
@@ -168,8 +177,7 @@ def _o2a_mcp_integration_present() -> bool:
     )
 
 
-def test_o2a_event_store_enforces_per_session_per_type_caps() -> None:
-    store_cls = _load_run_event_store_class()
+def test_o2a_event_store_enforces_per_session_per_type_caps(store_cls: type[Any] | None) -> None:
     if store_cls is None:
         pytest.skip("O2a run event store not implemented in this branch yet")
 
@@ -193,8 +201,9 @@ def test_o2a_event_store_enforces_per_session_per_type_caps() -> None:
     assert all(_event_type(item) == "agent" for item in events)
 
 
-def test_o2a_event_store_truncates_string_fields_with_indicator() -> None:
-    store_cls = _load_run_event_store_class()
+def test_o2a_event_store_truncates_string_fields_with_indicator(
+    store_cls: type[Any] | None,
+) -> None:
     if store_cls is None:
         pytest.skip("O2a run event store not implemented in this branch yet")
 
@@ -228,8 +237,9 @@ def test_o2a_event_store_truncates_string_fields_with_indicator() -> None:
         assert len(details["message"]) == expected_max_len
 
 
-def test_o2a_event_store_filters_by_session_type_time_and_error() -> None:
-    store_cls = _load_run_event_store_class()
+def test_o2a_event_store_filters_by_session_type_time_and_error(
+    store_cls: type[Any] | None,
+) -> None:
     if store_cls is None:
         pytest.skip("O2a run event store not implemented in this branch yet")
 
@@ -278,12 +288,11 @@ def test_o2a_event_store_filters_by_session_type_time_and_error() -> None:
 
 
 def test_o2a_web_eval_agent_updates_run_event_artifact_counts(
-    monkeypatch: pytest.MonkeyPatch,
+    monkeypatch: pytest.MonkeyPatch, store_cls: type[Any] | None
 ) -> None:
     if not _o2a_mcp_integration_present():
         pytest.skip("O2a MCP integration not implemented in this branch yet")
 
-    store_cls = _load_run_event_store_class()
     if store_cls is None:
         pytest.skip("O2a run event store not implemented in this branch yet")
 
@@ -377,3 +386,212 @@ def test_o2a_web_eval_agent_updates_run_event_artifact_counts(
 
     events = _get_events(store, session_id=session_id, last_n=200, include_details=False)
     assert int(artifacts.get("run_events", 0)) == len(events)
+
+
+def test_o2a_event_store_merges_types_newest_first_with_out_of_order_events(
+    store_cls: type[Any],
+) -> None:
+    store = store_cls(max_events_per_type=4)
+    for ts in (1.0, 4.0, 7.0):
+        store.record_event(session_id="s-1", event_type="agent", timestamp=ts, summary=f"a{ts}")
+    for ts in (2.0, 6.0, 3.0):
+        store.record_event(session_id="s-1", event_type="console", timestamp=ts, summary=f"c{ts}")
+    for ts in (5.0, 8.0):
+        store.record_event(session_id="s-2", event_type="network", timestamp=ts, summary=f"n{ts}")
+
+    events = store.get_events(last_n=4)
+    assert [(item["summary"], item["session_id"]) for item in events] == [
+        ("n8.0", "s-2"),
+        ("a7.0", "s-1"),
+        ("c6.0", "s-1"),
+        ("n5.0", "s-2"),
+    ]
+    events = store.get_events(session_id="s-1", event_types=["console"], from_timestamp=2.5)
+    assert [item["summary"] for item in events] == ["c6.0", "c3.0"]
+
+    # Returned events are copies; evicting the out-of-order entry restores the fast path.
+    events[0]["summary"] = "mutated"
+    for ts in (9.0, 10.0, 11.0):
+        store.record_event(session_id="s-1", event_type="console", timestamp=ts, summary=f"c{ts}")
+    events = store.get_events(session_id="s-1", event_types=["console"], last_n=10)
+    assert [item["summary"] for item in events] == ["c11.0", "c10.0", "c9.0", "c3.0"]
+    store.record_event(session_id="s-1", event_type="console", timestamp=12.0, summary="c12.0")
+    assert [item["summary"] for item in store.get_events(session_id="s-1", last_n=3)] == [
+        "c12.0",
+        "c11.0",
+        "c10.0",
+    ]
+
+
+def test_o2a_event_store_keeps_compact_records_and_builds_dicts_on_read() -> None:
+    from gsd_browser.run_event_store import RunEventStore
+
+    store = RunEventStore()
+    url = "".join(["https://example.com/", "api"])
+    for ts in (1.0, 2.0):
+        store.record_network_event(
+            "s-1", captured_at=ts, method="".join(["GE", "T"]), url=url, status=500
+        )
+    store.record_console_event(
+        "s-1",
+        captured_at=3.0,
+        level="error",
+        message="boom",
+        location={"url": "https://example.com/app.js", "line": 7, "column": None},
+    )
+
+    console, second, first = store.get_events(session_id="s-1", include_details=True)
+    assert console == {
+        "seq": 3,
+        "event_type": "console",
+        "timestamp": 3.0,
+        "summary": "boom",
+        "has_error": True,
+        "details": {
+            "level": "error",
+            "location": {"url": "https://example.com/app.js", "line": 7},
+        },
+    }
+    assert first["summary"] == "GET https://example.com/api"
+    assert first["details"] == {"method": "GET", "url": url, "status": 500}
+    assert first["details"]["url"] is second["details"]["url"]
+    assert first["details"] is not second["details"]
+    assert "details" not in store.get_events(session_id="s-1", last_n=1)[0]
+
+    # Both requests failed, so they are kept in the session's error buffer.
+    stored = [
+        event for event in store._sessions["s-1"].error_events if event.event_type == "network"
+    ]
+    assert not hasattr(stored[0], "__dict__")
+    assert stored[0].summary is None
+    assert stored[0].details[0] is stored[1].details[0]
+    # Low-cardinality fields share one string; URLs are not added to the intern table.
+    assert stored[0].details[1] is stored[1].details[1] == "GET"
+    for ts in (4.0, 5.0):
+        store.record_network_event(
+            "s-1", captured_at=ts, method="GET", url="".join([url, "/v2"]), status=200
+        )
+    latest = list(store._sessions["s-1"].network_events)[-2:]
+    assert latest[0].details[2] == latest[1].details[2]
+    assert latest[0].details[2] is not latest[1].details[2]
+
+
+def test_o2a_event_store_prunes_least_recently_used_sessions(store_cls: type[Any]) -> None:
+    from gsd_browser.run_event_store import RunEventStoreConfig
+
+    store = store_cls(max_sessions=3)
+    for index, session_id in enumerate(("s-1", "s-2", "s-3")):
+        store.ensure_session(session_id, created_at=float(index))
+
+    # Inspecting s-1 keeps it alive although it started first; s-2 is pruned instead.
+    assert store.get_events(session_id="s-1") == []
+    store.ensure_session("s-4", created_at=3.0)
+    assert store.get_counts("s-2")["total"] == 0
+    store.record_event(session_id="s-3", event_type="agent", timestamp=4.0, summary="step")
+    store.ensure_session("s-5", created_at=5.0)
+    assert {event["session_id"] for event in store.get_events()} == {"s-3"}
+    assert list(store._sessions) == ["s-4", "s-3", "s-5"]
+
+    # Without read refresh, only writes count as use.
+    store = store_cls(config=RunEventStoreConfig(max_sessions=2, refresh_on_access=False))
+    store.ensure_session("s-1", created_at=0.0)
+    store.ensure_session("s-2", created_at=1.0)
+    store.get_events(session_id="s-1")
+    store.ensure_session("s-3", created_at=2.0)
+    assert list(store._sessions) == ["s-2", "s-3"]
+
+
+def test_o2a_event_store_keeps_errors_out_of_ring_eviction(store_cls: type[Any]) -> None:
+    from gsd_browser.run_event_store import RunEventStoreConfig
+
+    store = store_cls(config=RunEventStoreConfig(max_network_events=5, max_error_events=2))
+    store.record_network_event("s-1", captured_at=0.0, method="GET", url="/api", status=500)
+    for index in range(1, 101):
+        store.record_network_event(
+            "s-1", captured_at=float(index), method="GET", url="/ok", status=200
+        )
+
+    # The flood of successful requests only cycles the network ring; the 500 survives.
+    errors = store.get_events(session_id="s-1", has_error=True, include_details=True)
+    assert [(event["timestamp"], event["details"]["status"]) for event in errors] == [(0.0, 500)]
+    everything = store.get_events(session_id="s-1", last_n=0)
+    assert [event["timestamp"] for event in everything] == [100.0, 99.0, 98.0, 97.0, 96.0, 0.0]
+    assert store.get_counts("s-1") == {"agent": 0, "console": 0, "network": 6, "total": 6}
+
+    # Errors have a cap of their own.
+    store.record_console_event("s-1", captured_at=101.0, level="error", message="boom")
+    store.record_agent_event("s-1", captured_at=102.0, summary="failed", has_error=True)
+    errors = store.get_events(session_id="s-1", has_error=True)
+    assert [event["timestamp"] for event in errors] == [102.0, 101.0]
+    assert store.get_counts("s-1") == {"agent": 1, "console": 1, "network": 5, "total": 7}
+    assert all(not event["has_error"] for event in store.get_events(has_error=False, last_n=0))
+    assert len(store.get_events(has_error=False, last_n=0)) == 5
+
+
+def test_o2a_event_store_shards_locks_per_session() -> None:
+    import threading
+
+    from gsd_browser.run_event_store import RunEventStore, RunEventStoreConfig
+
+    store = RunEventStore(config=RunEventStoreConfig(max_network_events=1000))
+
+    def write(session_id: str) -> None:
+        for index in range(300):
+            store.record_network_event(
+                session_id,
+                captured_at=float(index),
+                method="GET",
+                url=f"/r/{index}",
+                status=500 if index % 10 == 0 else 200,
+            )
+
+    threads = [threading.Thread(target=write, args=(f"s-{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [store.get_counts(f"s-{n}")["network"] for n in range(4)] == [300] * 4
+    assert len({id(session.lock) for session in store._sessions.values()}) == 4
+
+    # A writer holding one session's lock does not block reads or writes of another session.
+    with store._sessions["s-0"].lock:
+        errors = store.get_events(session_id="s-1", has_error=True, last_n=3)
+        assert [event["timestamp"] for event in errors] == [290.0, 280.0, 270.0]
+        store.record_console_event("s-2", captured_at=1.0, level="log", message="hi")
+        assert store.get_counts("s-2")["console"] == 1
+
+    # Recency is kept by the session map itself: the least recently written session is first.
+    assert list(store._sessions)[-1] == "s-2"
+
+
+def test_o2a_event_store_tails_by_sequence_cursor(store_cls: type[Any]) -> None:
+    store = store_cls(max_events_per_type=3)
+    for index in range(5):
+        store.record_network_event(
+            "s-1", captured_at=float(index), method="GET", url=f"/r/{index}", status=200
+        )
+    store.record_console_event("s-1", captured_at=0.5, level="error", message="late")
+
+    # The ring kept seqs 3-5; the console error (seq 6) is older by timestamp but newer by seq.
+    first = store.get_events(session_id="s-1", since_seq=0, last_n=2)
+    assert [event["seq"] for event in first] == [3, 4]
+    rest = store.get_events(session_id="s-1", since_seq=4)
+    assert [(event["seq"], event["event_type"]) for event in rest] == [
+        (5, "network"),
+        (6, "console"),
+    ]
+    assert store.get_events(session_id="s-1", since_seq=6) == []
+
+    def seqs(**kwargs: Any) -> list[int]:
+        return [event["seq"] for event in store.get_events(session_id="s-1", **kwargs)]
+
+    store.record_agent_event("s-1", captured_at=9.0, summary="clicked")
+    assert seqs(since_seq=6) == [7]
+    assert seqs(since_seq=4, has_error=True) == [6]
+    # A cursor from before a restart (ahead of everything recorded) starts over.
+    assert seqs(since_seq=99) == [3, 4, 5, 6, 7]
+
+    dropped = {"agent": 0, "console": 0, "network": 2, "total": 2}
+    assert store.get_dropped("s-1") == dropped
+    assert store.get_dropped() == dropped
+    assert store.get_dropped("missing")["total"] == 0
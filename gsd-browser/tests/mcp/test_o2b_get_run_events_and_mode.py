@@ -156,6 +156,32 @@ def test_o2b_get_run_events_enforces_limits_and_filters(monkeypatch: pytest.Monk
     assert any("details" in item for item in payload["events"])
 
 
+def test_o2b_get_run_events_tails_with_since_seq(monkeypatch: pytest.MonkeyPatch) -> None:
+    store = RunEventStore(max_events_per_type=2)
+    for idx in range(3):
+        store.record_network_event(
+            "s-1", captured_at=float(idx), method="GET", url=f"/r/{idx}", status=200
+        )
+    monkeypatch.setattr(mcp_server_mod, "get_runtime", lambda: _DummyRuntime(run_events=store))
+
+    payload = _parse_single_text_payload(_run(mcp_server_mod.get_run_events(session_id="s-1")))
+    assert [item["seq"] for item in payload["events"]] == [3, 2]
+    assert payload["next_seq"] == 3
+    assert payload["dropped"] == {"agent": 0, "console": 0, "network": 1, "total": 1}
+
+    store.record_console_event("s-1", captured_at=5.0, level="error", message="boom")
+    store.record_agent_event("s-1", captured_at=6.0, summary="clicked")
+    payload = _parse_single_text_payload(
+        _run(mcp_server_mod.get_run_events(session_id="s-1", since_seq=payload["next_seq"]))
+    )
+    assert [item["seq"] for item in payload["events"]] == [4, 5]
+    assert payload["next_seq"] == 5
+    payload = _parse_single_text_payload(
+        _run(mcp_server_mod.get_run_events(session_id="s-1", since_seq=5))
+    )
+    assert (payload["events"], payload["next_seq"]) == ([], 5)
+
+
 @pytest.mark.parametrize(
     ("url", "expected"),
     [
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+
+from gsd_browser import mcp_server as mcp_server_mod
+from gsd_browser.page_metrics import PageMetricsCollector, summarize_page_metrics
+from gsd_browser.run_event_store import RunEventStore
+
+
+class _FakeCDPClient:
+    """cdp_use-style typed send surface: client.send.<Domain>.<command>(params, session_id)."""
+
+    def __init__(self, *, lcp_ms: float = 812.4, hang: bool = False) -> None:
+        self.calls: list[tuple[str, str | None]] = []
+        self.lcp_ms = lcp_ms
+        self.hang = hang
+        client = self
+
+        def _domain(name: str, commands: dict[str, Callable[[], Any]]) -> Any:
+            def _command(command: str, reply: Callable[[], Any]) -> Any:
+                async def _send(params: Any = None, session_id: str | None = None) -> Any:
+                    client.calls.append((f"{name}.{command}", session_id))
+                    if client.hang:
+                        await asyncio.sleep(10)
+                    return reply()
+
+                return _send
+
+            return type(
+                name, (), {key: staticmethod(_command(key, fn)) for key, fn in commands.items()}
+            )
+
+        self.send = type(
+            "Send",
+            (),
+            {
+                "Performance": _domain(
+                    "Performance",
+                    {
+                        "enable": dict,
+                        "getMetrics": lambda: {
+                            "metrics": [
+                                {"name": "JSHeapUsedSize", "value": 4_200_000.0},
+                                {"name": "Nodes", "value": 310.0},
+                                {"name": "TaskDuration", "value": 0.4321},
+                                {"name": "Timestamp", "value": 123.0},
+                            ]
+                        },
+                    },
+                ),
+                "Runtime": _domain(
+                    "Runtime",
+                    {
+                        "evaluate": lambda: {
+                            "result": {
+                                "type": "object",
+                                "value": {
+                                    "fcp_ms": 301.26,
+                                    "lcp_ms": client.lcp_ms,
+                                    "cls": 0.04271,
+                                    "long_tasks": 2,
+                                    "long_task_ms": 180.0,
+                                    "ttfb_ms": 42.9,
+                                    "load_ms": None,
+                                },
+                            }
+                        }
+                    },
+                ),
+            },
+        )()
+
+
+def test_page_metrics_collector_samples_vitals_and_performance_metrics() -> None:
+    client = _FakeCDPClient()
+    collector = PageMetricsCollector(timeout_s=1.0)
+
+    async def _exercise() -> list[dict[str, Any]]:
+        return [
+            await collector.collect(cdp_client=client, cdp_session_id="target-1"),
+            await collector.collect(cdp_client=client, cdp_session_id="target-1"),
+        ]
+
+    first, second = asyncio.run(_exercise())
+    assert (
+        first
+        == second
+        == {
+            "fcp_ms": 301.3,
+            "lcp_ms": 812.4,
+            "cls": 0.043,
+            "long_tasks": 2,
+            "long_task_ms": 180.0,
+            "ttfb_ms": 42.9,
+            "js_heap_used_bytes": 4_200_000,
+            "dom_nodes": 310,
+            "task_ms": 432.1,
+        }
+    )
+    # The Performance domain is enabled once per CDP session.
+    assert [call for call, _ in client.calls].count("Performance.enable") == 1
+    assert {session for _, session in client.calls} == {"target-1"}
+
+    slow = PageMetricsCollector(timeout_s=0.1)
+    assert asyncio.run(slow.collect(cdp_client=_FakeCDPClient(hang=True), cdp_session_id="t")) == {}
+    assert asyncio.run(slow.collect(cdp_client=None, cdp_session_id="t")) == {}
+
+    store = RunEventStore(max_events_per_type=2)
+    for step, lcp in ((1, 900.0), (2, 2500.0), (3, 1200.0)):
+        store.record_page_metrics(
+            "s-1",
+            captured_at=float(step),
+            step=step,
+            url="https://example.com/app",
+            metrics={"lcp_ms": lcp, "cls": 0.1 * step, "flag": True},
+        )
+    samples = store.get_page_metrics("s-1")
+    assert [sample["step"] for sample in samples] == [2, 3]
+    assert "flag" not in samples[0]
+    assert store.get_page_metrics("missing") == []
+    summary = summarize_page_metrics(samples)
+    assert summary["samples"] == 2
+    assert summary["worst"] == {"lcp_ms": 2500.0, "cls": pytest.approx(0.3)}
+    assert summary["worst_step"] == {"lcp_ms": 2, "cls": 3}
+
+    # Samples belong to the run session and are evicted with it.
+    small = RunEventStore(max_sessions=1)
+    small.record_page_metrics("s-1", captured_at=1.0, step=1, url=None, metrics={"lcp_ms": 1.0})
+    assert small.get_counts("s-1")["total"] == 0
+    small.record_agent_event("s-2", captured_at=2.0, step=1)
+    assert small.get_page_metrics("s-1") == []
+
+
+@dataclass
+class _StepInfo:
+    step: int
+    url: str
+    title: str
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class _DummyRuntime:
+    def __init__(self, *, run_events: RunEventStore) -> None:
+        self.run_events = run_events
+
+    def ensure_dashboard_running(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+class _DummyHistory:
+    history: list[object] = []
+
+    def final_result(self) -> str | None:
+        return "ok"
+
+    def has_errors(self) -> bool:
+        return False
+
+    def errors(self) -> list[object]:
+        return []
+
+
+class _DummyAgent:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._step_callback = kwargs.get("register_new_step_callback")
+
+    def register_new_step_callback(self, callback: Callable[..., Any]) -> None:
+        self._step_callback = callback
+
+    async def run(self, *args: Any, **kwargs: Any) -> _DummyHistory:
+        for step in (1, 2):
+            info = _StepInfo(step=step, url=f"http://localhost:3000/p{step}?t=1", title="App")
+            result = self._step_callback(info, None, step)
+            if inspect.isawaitable(result):
+                await result
+        return _DummyHistory()
+
+
+class _DummyBrowserSession:
+    client = _FakeCDPClient()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+    async def get_or_create_cdp_session(self) -> Any:
+        return type("_Session", (), {"cdp_client": self.client, "session_id": "target-1"})()
+
+
+def _run_web_eval_agent(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    store = RunEventStore()
+    monkeypatch.setattr(mcp_server_mod, "get_runtime", lambda: _DummyRuntime(run_events=store))
+    monkeypatch.setattr(mcp_server_mod, "load_settings", lambda *args, **kwargs: object())
+    monkeypatch.setattr(
+        mcp_server_mod,
+        "create_browser_use_llms",
+        lambda *args, **kwargs: type("DummyLLMs", (), {"primary": object(), "fallback": None})(),
+    )
+    monkeypatch.setattr(
+        mcp_server_mod, "_load_browser_use_classes", lambda: (_DummyAgent, _DummyBrowserSession)
+    )
+    response = asyncio.run(
+        mcp_server_mod.web_eval_agent(
+            url="http://localhost:3000", task="check the flow", ctx=object(), headless_browser=True
+        )
+    )
+    return json.loads(response[0].text)
+
+
+def test_web_eval_agent_reports_per_step_page_performance_when_enabled(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("GSD_PAGE_METRICS", raising=False)
+    assert "page_performance" not in _run_web_eval_agent(monkeypatch)
+
+    monkeypatch.setenv("GSD_PAGE_METRICS", "1")
+    payload = _run_web_eval_agent(monkeypatch)
+    performance = payload["page_performance"]
+    assert performance["samples"] == 2
+    assert performance["worst"]["lcp_ms"] == 812.4
+    assert [step["step"] for step in performance["steps"]] == [1, 2]
+    assert performance["steps"][0]["url"] == "http://localhost:3000/p1"
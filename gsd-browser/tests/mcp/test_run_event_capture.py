@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from gsd_browser.run_event_capture import CDPRunEventCapture
+from gsd_browser.run_event_store import RunEventStore
+
+
+def test_cdp_capture_records_in_bounded_batches_off_the_dispatch_path() -> None:
+    store = RunEventStore()
+    client = type("Client", (), {})()
+    client._event_registry = type("Registry", (), {"_handlers": {}})()
+    handlers: dict[str, Any] = client._event_registry._handlers
+
+    async def _exercise() -> None:
+        capture = CDPRunEventCapture(
+            store=store, session_id="s-1", flush_interval_s=0.01, max_batch=2, max_buffered=3
+        )
+        capture.attach(client)
+        for index in range(5):
+            await handlers["Runtime.consoleAPICalled"](
+                {"type": "log", "args": [{"value": f"m{index}"}]}, None
+            )
+
+        # Handlers only queue; the two oldest did not fit and were counted.
+        assert store.get_counts("s-1")["total"] == 0
+        assert capture.stats() == {"queued": 3, "recorded": 0, "dropped": 2, "batches": 0}
+
+        await asyncio.sleep(0.05)
+        events = store.get_events(session_id="s-1", since_seq=0)
+        assert [event["summary"] for event in events] == ["m2", "m3", "m4"]
+        assert capture.stats()["batches"] == 2
+
+        # Detaching records what is still queued.
+        await handlers["Runtime.exceptionThrown"]({"exceptionDetails": {"text": "Uncaught"}}, None)
+        capture.detach(client)
+        assert store.get_counts("s-1")["console"] == 4
+        assert capture.stats() == {"queued": 0, "recorded": 4, "dropped": 2, "batches": 3}
+
+        # close() stops the flusher and drains without the client (e.g. when it is gone).
+        closing = CDPRunEventCapture(store=store, session_id="s-2", flush_interval_s=60)
+        closing.attach(client)
+        await handlers["Runtime.consoleAPICalled"]({"type": "log", "args": []}, None)
+        closing.close()
+        assert closing._flusher is None
+        assert store.get_counts("s-2")["console"] == 1
+        closing.close()
+        closing.detach(client)
+
+    asyncio.run(_exercise())
+
+
+def test_cdp_capture_auto_attaches_related_targets_with_bounded_state() -> None:
+    store = RunEventStore()
+    sent: list[tuple[str, str]] = []
+
+    async def _send(method: str, params: dict[str, Any], session_id: str | None = None) -> dict:
+        sent.append((method, session_id or ""))
+        return {}
+
+    client = type("Client", (), {"send": staticmethod(_send)})()
+    client._event_registry = type("Registry", (), {"_handlers": {}})()
+    handlers: dict[str, Any] = client._event_registry._handlers
+
+    async def _request(session: str | None, request_id: str, url: str, *, done: bool) -> None:
+        await handlers["Network.requestWillBeSent"](
+            {"requestId": request_id, "timestamp": 1.0, "request": {"method": "GET", "url": url}},
+            session,
+        )
+        if done:
+            await handlers["Network.loadingFinished"](
+                {"requestId": request_id, "timestamp": 1.1}, session
+            )
+
+    async def _exercise() -> None:
+        capture = CDPRunEventCapture(
+            store=store, session_id="s-1", max_targets=2, max_pending_per_target=2
+        )
+        capture.attach(client)
+        assert await capture.enable_auto_attach("page-1")
+        assert sent == [("Target.setAutoAttach", "page-1")]
+
+        for session, target_type in (("frame-1", "iframe"), ("worker-1", "worker")):
+            await handlers["Target.attachedToTarget"](
+                {
+                    "sessionId": session,
+                    "targetInfo": {"targetId": session, "type": target_type},
+                    "waitingForDebugger": True,
+                },
+                "page-1",
+            )
+        # Over the target cap: not tracked, but still resumed.
+        await handlers["Target.attachedToTarget"](
+            {"sessionId": "frame-2", "targetInfo": {"type": "iframe"}, "waitingForDebugger": True},
+            "frame-1",
+        )
+        await asyncio.sleep(0)
+        assert capture.targets() == {"frame-1": "iframe", "worker-1": "worker"}
+        assert [method for method, session in sent if session == "frame-1"] == [
+            "Runtime.enable",
+            "Network.enable",
+            "Target.setAutoAttach",
+            "Runtime.runIfWaitingForDebugger",
+        ]
+        assert "Target.setAutoAttach" not in [m for m, s in sent if s == "worker-1"]
+        assert [m for m, s in sent if s == "frame-2"] == ["Runtime.runIfWaitingForDebugger"]
+
+        # Request ids are per target; the same id on two sessions is two requests.
+        await _request("page-1", "r-1", "https://app.example.com/", done=True)
+        await _request("frame-1", "r-1", "https://ads.example.net/frame", done=True)
+        await handlers["Runtime.exceptionThrown"](
+            {"exceptionDetails": {"text": "boom"}}, "worker-1"
+        )
+        for index in range(3):
+            await _request("frame-1", f"p-{index}", "https://ads.example.net/slow", done=False)
+        assert len(capture._pending["frame-1"]) == 2
+        # An unknown session never grows the pending maps past the target cap.
+        await _request("stray-1", "x-1", "https://app.example.com/x", done=False)
+        assert "stray-1" not in capture._pending
+
+        await handlers["Target.detachedFromTarget"]({"sessionId": "frame-1"}, "page-1")
+        assert capture.targets() == {"worker-1": "worker"}
+        assert "frame-1" not in capture._pending
+        capture.detach(client)
+
+    asyncio.run(_exercise())
+
+    events = store.get_events(session_id="s-1", include_details=True, since_seq=0)
+    assert [(event["summary"], event["details"].get("target")) for event in events] == [
+        ("GET https://app.example.com/", None),
+        ("GET https://ads.example.net/frame", "iframe"),
+        ("boom", "worker"),
+    ]
+
+
+def test_cdp_capture_chains_browser_use_target_handlers() -> None:
+    cdp_client_mod = pytest.importorskip("cdp_use.client")
+    client = cdp_client_mod.CDPClient("ws://127.0.0.1:9")
+    registry = client._event_registry
+    upstream: list[tuple[str, str | None]] = []
+
+    def _on_attached(event: Any, session_id: str | None = None) -> None:
+        upstream.append(("attached", event["sessionId"]))
+
+    def _on_detached(event: Any, session_id: str | None = None) -> None:
+        upstream.append(("detached", event["sessionId"]))
+
+    # What browser-use's SessionManager registers on the root client.
+    client.register.Target.attachedToTarget(_on_attached)
+    client.register.Target.detachedFromTarget(_on_detached)
+
+    async def _exercise() -> None:
+        capture = CDPRunEventCapture(store=RunEventStore(), session_id="s-1")
+        capture.attach(client)
+        # The client is not started, so target setup fails quietly; tracking still happens.
+        await registry.handle_event(
+            "Target.attachedToTarget",
+            {"sessionId": "frame-1", "targetInfo": {"type": "iframe"}},
+            "page-1",
+        )
+        assert capture.targets() == {"frame-1": "iframe"}
+        await registry.handle_event("Target.detachedFromTarget", {"sessionId": "frame-1"}, None)
+        assert capture.targets() == {}
+        assert upstream == [("attached", "frame-1"), ("detached", "frame-1")]
+        capture.detach(client)
+
+    asyncio.run(_exercise())
+
+    assert registry._handlers["Target.attachedToTarget"] is _on_attached
+    assert registry._handlers["Target.detachedFromTarget"] is _on_detached
+
+
+def test_cdp_capture_auto_attach_does_not_pause_targets_it_cannot_resume() -> None:
+    sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def _send(method: str, params: dict[str, Any], session_id: str | None = None) -> dict:
+        sent.append((method, params))
+        return {}
+
+    def _register(event: Any) -> None:
+        return None
+
+    # A register surface without a reachable event registry: Target events cannot be chained.
+    register_domain = type("Domain", (), {"__getattr__": lambda self, name: _register})
+    register = type("Register", (), {"Runtime": register_domain(), "Network": register_domain()})
+    client = type("Client", (), {"send": staticmethod(_send), "register": register()})()
+
+    capture = CDPRunEventCapture(store=RunEventStore(), session_id="s-1")
+    capture.attach(client)
+    assert asyncio.run(capture.enable_auto_attach("page-1"))
+    assert sent == [
+        (
+            "Target.setAutoAttach",
+            {"autoAttach": True, "waitForDebuggerOnStart": False, "flatten": True},
+        )
+    ]
+    capture.detach(client)
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from gsd_browser.run_event_store import (
+    RunEventStore,
+    RunEventStoreConfig,
+    load_run_event_store_config,
+)
+
+
+def _store(directory: Path, **overrides: object) -> RunEventStore:
+    return RunEventStore(config=RunEventStoreConfig(journal_dir=str(directory), **overrides))
+
+
+def test_run_event_journal_replays_sessions_lazily_after_restart(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.record_network_event(
+        "s-1", captured_at=1.0, method="GET", url="https://example.com/api", status=500
+    )
+    store.record_console_event(
+        "s-1", captured_at=2.0, level="error", message="boom", location={"line": 3}
+    )
+    store.record_agent_event("s-2", captured_at=3.0, step=1, summary="clicked")
+    expected = store.get_events(session_id="s-1", include_details=True)
+    store.close()
+    assert len(list(tmp_path.glob("events-*.jsonl"))) == 1
+    (sidecar,) = tmp_path.glob("events-*.sessions")
+    assert sorted(sidecar.read_text().split()) == ["s-1", "s-2"]
+
+    restarted = _store(tmp_path)
+    # Nothing is loaded up front; a session-scoped lookup replays just that session.
+    assert restarted.get_events() == []
+    assert restarted.get_events(session_id="s-1", include_details=True) == expected
+    assert restarted.get_counts("s-1")["total"] == 2
+    assert {event["session_id"] for event in restarted.get_events()} == {"s-1"}
+    assert restarted.get_counts("s-2")["agent"] == 1
+    assert restarted.get_events(session_id="missing") == []
+
+    # A restart keeps appending to the newest segment, and new sessions are indexed too.
+    restarted.record_agent_event("s-3", captured_at=4.0, step=1, summary="typed")
+    assert restarted.flush(timeout=5.0)
+    restarted.close()
+    assert len(list(tmp_path.glob("events-*.jsonl"))) == 1
+    assert sorted(sidecar.read_text().split()) == ["s-1", "s-2", "s-3"]
+    again = _store(tmp_path)
+    again.load_session("s-3")
+    assert [event["summary"] for event in again.get_events(session_id="s-3")] == ["typed"]
+    again.close()
+
+
+def test_run_event_journal_indexes_segments_without_a_sidecar(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.record_agent_event("s-1", captured_at=1.0, step=1, summary="clicked")
+    store.close()
+    for sidecar in tmp_path.glob("events-*.sessions"):
+        sidecar.unlink()
+
+    restarted = _store(tmp_path)
+    assert restarted.get_counts("s-1")["agent"] == 1
+    assert [path.read_text() for path in tmp_path.glob("events-*.sessions")] == ["s-1\n"]
+    restarted.close()
+
+
+def test_run_event_journal_rotates_and_drops_old_segments(tmp_path: Path) -> None:
+    # Each event (~120 bytes) fills a segment; the size cap is checked when a segment starts.
+    store = _store(tmp_path, journal_segment_bytes=1, journal_max_bytes=250)
+    for index in range(4):
+        store.record_agent_event(f"s-{index}", captured_at=float(index), step=index)
+        assert store.flush(timeout=5.0)
+    stats = store.journal_stats()
+    assert stats is not None
+    assert (stats["written"], stats["rotations"], stats["segments"]) == (4, 4, 3)
+    assert len(list(tmp_path.glob("events-*.sessions"))) == 3
+    store.close()
+
+    restarted = _store(tmp_path)
+    assert restarted.get_events(session_id="s-0") == []
+    assert restarted.get_counts("s-3")["agent"] == 1
+    assert restarted._journal is not None and sorted(restarted._journal._index) == [
+        "s-1",
+        "s-2",
+        "s-3",
+    ]
+    restarted.close()
+
+    # Segments past the age limit are deleted on the next write, however few there are.
+    for segment in tmp_path.glob("events-*.jsonl"):
+        os.utime(segment, (0, 0))
+    aged = _store(tmp_path, journal_segment_bytes=1, journal_max_age_s=3600.0)
+    aged.load_session("missing")  # loads the session index of the old segments
+    aged.record_agent_event("s-4", captured_at=4.0, step=4)
+    assert aged.flush(timeout=5.0)
+    # Sessions whose last segment was deleted leave the index.
+    assert aged._journal is not None and list(aged._journal._index) == ["s-4"]
+    assert aged.get_events(session_id="s-3") == []
+    assert [path.name for path in tmp_path.glob("events-*.jsonl")] == ["events-00000005.jsonl"]
+    aged.close()
+
+
+def test_load_run_event_store_config_reads_journal_env(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.delenv("GSD_RUN_EVENTS_JOURNAL", raising=False)
+    assert load_run_event_store_config().journal_dir is None
+
+    monkeypatch.setenv("GSD_RUN_EVENTS_JOURNAL", "1")
+    monkeypatch.setenv("GSD_CONFIG_DIR", str(tmp_path))
+    monkeypatch.setenv("GSD_RUN_EVENTS_JOURNAL_FSYNC_MS", "250")
+    monkeypatch.setenv("GSD_RUN_EVENTS_JOURNAL_MAX_AGE_HOURS", "24")
+    config = load_run_event_store_config()
+    assert config.journal_dir == str(tmp_path / "run_events")
+    assert config.journal_fsync_interval_s == 0.25
+    assert config.journal_max_age_s == 86400.0
+
+    monkeypatch.setenv("GSD_RUN_EVENTS_JOURNAL_DIR", str(tmp_path / "custom"))
+    assert load_run_event_store_config().journal_dir == str(tmp_path / "custom")
+
+
+def test_load_run_event_store_config_reads_error_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("GSD_RUN_EVENTS_MAX_ERROR_EVENTS", "25")
+    assert load_run_event_store_config().max_error_events == 25
+    monkeypatch.setenv("GSD_RUN_EVENTS_MAX_ERROR_EVENTS", "lots")
+    assert load_run_event_store_config().max_error_events == RunEventStoreConfig().max_error_events
+
+    # A cap of 0 would silently drop every error; it is raised to 1.
+    monkeypatch.setenv("GSD_RUN_EVENTS_MAX_ERROR_EVENTS", "0")
+    assert load_run_event_store_config().max_error_events == 1
+    store = RunEventStore(config=RunEventStoreConfig(max_error_events=0))
+    for index in range(2):
+        store.record_console_event(
+            "s-1", captured_at=float(index), level="error", message=f"boom {index}"
+        )
+    assert [event["summary"] for event in store.get_events(has_error=True)] == ["boom 1"]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from gsd_browser.run_event_sqlite import SqliteRunEventStore
+from gsd_browser.run_event_store import (
+    RunEventStore,
+    RunEventStoreConfig,
+    create_run_event_store,
+    load_run_event_store_config,
+)
+
+
+def test_sqlite_run_event_store_persists_sessions_caps_and_recency(tmp_path: Path) -> None:
+    path = tmp_path / "events.sqlite3"
+    store = SqliteRunEventStore(path=path, max_sessions=2, max_events_per_type=2)
+    for index in range(3):
+        store.record_network_event(
+            "s-1", captured_at=float(index), method="GET", url=f"https://x.test/{index}", status=500
+        )
+    store.record_agent_event("s-2", captured_at=5.0, step=1, summary="clicked")
+    store.get_counts("s-1")
+    store.close()
+
+    restarted = SqliteRunEventStore(path=path, max_sessions=2, max_events_per_type=2)
+    assert restarted.get_counts("s-1") == {"agent": 0, "console": 0, "network": 2, "total": 2}
+    assert [event["summary"] for event in restarted.get_events(session_id="s-1")] == [
+        "GET https://x.test/2",
+        "GET https://x.test/1",
+    ]
+    # s-1 was read last before the restart, so the new session evicts s-2.
+    restarted.ensure_session("s-3", created_at=6.0)
+    assert restarted.get_counts("s-2")["total"] == 0
+    assert {event["session_id"] for event in restarted.get_events()} == {"s-1"}
+    restarted.close()
+
+
+def test_sqlite_run_event_store_batches_inserts_and_pushes_filters_down() -> None:
+    store = SqliteRunEventStore(batch_size=4, flush_interval_s=60.0)
+    conn = store._conn
+    assert conn is not None
+    for index in range(3):
+        store.record_console_event("s-1", captured_at=float(index), level="error", message="boom")
+    assert conn.execute("SELECT COUNT(*) FROM run_events").fetchone() == (0,)
+    # A full batch is inserted by the background flusher, not by the recording call.
+    store.record_console_event("s-1", captured_at=3.0, level="info", message="ok")
+    assert _wait_for_rows(store, 4)
+
+    plan = " ".join(
+        str(row[-1])
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM run_events WHERE session_id = ? AND has_error = ?"
+            " ORDER BY timestamp DESC",
+            ("s-1", 1),
+        )
+    )
+    assert "run_events_error" in plan
+    events = store.get_events(session_id="s-1", has_error=True, from_timestamp=1.0, last_n=0)
+    assert [event["timestamp"] for event in events] == [2.0, 1.0]
+    store.close()
+    store.record_agent_event("s-1", captured_at=9.0)
+    assert store.get_events() == []
+
+
+def test_sqlite_run_event_store_persists_page_metrics_with_sessions(tmp_path: Path) -> None:
+    path = tmp_path / "events.sqlite3"
+    store = SqliteRunEventStore(path=path, max_sessions=2, max_events_per_type=2)
+    for step in (1, 2, 3):
+        store.record_page_metrics(
+            "s-1", captured_at=float(step), step=step, url="https://x.test/", metrics={"cls": 0.1}
+        )
+    store.close()
+
+    restarted = SqliteRunEventStore(path=path, max_sessions=2, max_events_per_type=2)
+    assert [sample["step"] for sample in restarted.get_page_metrics("s-1")] == [2, 3]
+    assert restarted.get_page_metrics("s-1")[0] == {
+        "step": 2,
+        "timestamp": 2.0,
+        "url": "https://x.test/",
+        "cls": 0.1,
+    }
+    # Pruning the session deletes its samples too.
+    restarted.ensure_session("s-2", created_at=4.0)
+    restarted.ensure_session("s-3", created_at=5.0)
+    assert restarted.get_page_metrics("s-1") == []
+    assert restarted.flush()
+    conn = restarted._conn
+    assert conn is not None
+    assert conn.execute("SELECT COUNT(*) FROM run_page_metrics").fetchone() == (0,)
+    restarted.close()
+
+
+def _wait_for_rows(store: SqliteRunEventStore, expected: int, timeout: float = 5.0) -> bool:
+    conn = store._conn
+    assert conn is not None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with store._db_lock:
+            if conn.execute("SELECT COUNT(*) FROM run_events").fetchone() == (expected,):
+                return True
+        time.sleep(0.01)
+    return False
+
+
+def test_sqlite_run_event_store_writes_idle_batches_in_the_background() -> None:
+    store = SqliteRunEventStore(batch_size=1000, flush_interval_s=0.05)
+    store.record_agent_event("s-1", captured_at=1.0, step=1)
+    # Nothing else is recorded or read, yet the partial batch is written.
+    assert _wait_for_rows(store, 1)
+    store.close()
+
+
+def test_run_event_backend_is_selected_from_env(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.delenv("GSD_RUN_EVENTS_BACKEND", raising=False)
+    assert isinstance(create_run_event_store(load_run_event_store_config()), RunEventStore)
+
+    monkeypatch.setenv("GSD_CONFIG_DIR", str(tmp_path))
+    monkeypatch.setenv("GSD_RUN_EVENTS_BACKEND", "SQLite")
+    config = load_run_event_store_config()
+    assert (config.backend, config.sqlite_path) == ("sqlite", str(tmp_path / "run_events.sqlite3"))
+    store = create_run_event_store(config)
+    assert isinstance(store, SqliteRunEventStore)
+    assert store.path == config.sqlite_path
+    store.close()
+
+    with pytest.raises(ValueError):
+        create_run_event_store(RunEventStoreConfig(backend="redis"))
+
+
+def test_sqlite_run_event_store_never_reuses_sequence_numbers(tmp_path: Path) -> None:
+    path = tmp_path / "events.sqlite3"
+    store = SqliteRunEventStore(path=path, max_sessions=2)
+    store.record_agent_event("s-1", captured_at=1.0)
+    store.record_agent_event("s-2", captured_at=2.0)
+    store.get_counts("s-1")
+    # s-2 holds the newest row (seq 2) and is pruned with it.
+    store.ensure_session("s-3", created_at=3.0)
+    store.close()
+
+    restarted = SqliteRunEventStore(path=path, max_sessions=2)
+    restarted.record_agent_event("s-3", captured_at=4.0)
+    assert [event["seq"] for event in restarted.get_events(since_seq=0)] == [1, 3]
+    restarted.close()
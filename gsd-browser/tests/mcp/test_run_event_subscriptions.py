@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from gsd_browser.run_event_store import RunEventStore
+
+
+def test_run_event_subscription_streams_filtered_events_as_recorded() -> None:
+    async def _exercise() -> None:
+        store = RunEventStore()
+        subscription = store.subscribe(session_id="s-1", event_types=["console", "network"])
+        everything = store.subscribe()
+
+        def _record() -> None:
+            store.record_agent_event("s-1", captured_at=1.0, summary="clicked")
+            store.record_console_event("s-2", captured_at=2.0, level="error", message="other")
+            store.record_console_event("s-1", captured_at=3.0, level="error", message="boom")
+            store.record_network_event(
+                "s-1", captured_at=4.0, method="GET", url="https://x.test/", status=200
+            )
+
+        # Events are published from the recording thread and consumed on the loop.
+        thread = threading.Thread(target=_record)
+        thread.start()
+        received = [await asyncio.wait_for(anext(subscription), 5.0) for _ in range(2)]
+        thread.join()
+        assert [(item["session_id"], item["summary"]) for item in received] == [
+            ("s-1", "boom"),
+            ("s-1", "GET https://x.test/"),
+        ]
+        assert received[0]["has_error"] is True
+        assert received[0]["details"] == {"level": "error"}
+        assert len(everything.drain()) == 4
+
+        subscription.close()
+        assert [item async for item in subscription] == []
+        store.record_console_event("s-1", captured_at=5.0, level="info", message="late")
+        assert subscription.drain() == []
+        assert [item["session_id"] for item in store.subscription_stats()] == [None]
+
+    asyncio.run(_exercise())
+
+
+def test_run_event_subscription_drops_oldest_when_consumer_falls_behind() -> None:
+    async def _exercise() -> None:
+        store = RunEventStore()
+        async with store.subscribe(max_queue=3) as subscription:
+            for index in range(10):
+                store.record_agent_event("s-1", captured_at=float(index), step=index)
+            batch = await subscription.next_batch(10)
+            assert [item["details"]["step"] for item in batch] == [7, 8, 9]
+            assert subscription.stats()["dropped"] == 7
+            assert subscription.stats()["delivered"] == 3
+        assert subscription.closed
+        assert store.subscription_stats() == []
+
+    asyncio.run(_exercise())
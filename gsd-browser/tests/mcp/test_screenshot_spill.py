@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import base64
+from pathlib import Path
+
+from gsd_browser.screenshot_manager import ScreenshotManager, ScreenshotManagerConfig
+from gsd_browser.screenshot_spill import SegmentSpillStore
+
+
+def _payload(i: int, *, size: int = 100) -> bytes:
+    return bytes([i % 256]) * size
+
+
+def test_segment_spill_store_roundtrip_release_and_compaction(tmp_path: Path) -> None:
+    store = SegmentSpillStore(base_dir=tmp_path, max_segment_bytes=250, compact_ratio=0.75)
+    refs = [store.append(_payload(i)) for i in range(6)]
+    assert [store.read(ref) for ref in refs] == [_payload(i) for i in range(6)]
+    assert store.stats()["segments"] == 3
+
+    # Fully dead sealed segments are dropped; the active segment is never compacted.
+    store.release(refs[0])
+    store.release(refs[1])
+    store.release(refs[5])
+    assert store.compact() == 200
+    assert store.stats()["segments"] == 2
+
+    # Sealed segments below the live ratio are rewritten; survivors stay readable.
+    store.release(refs[2])
+    assert store.compact() == 100
+    assert [store.read(ref) for ref in (refs[3], refs[4])] == [_payload(3), _payload(4)]
+    stats = store.stats()
+    assert stats["live_bytes"] == 200
+    assert stats["compactions"] == 2
+
+    directory = store.directory
+    assert directory.exists()
+    store.close()
+    assert not directory.exists()
+
+
+def test_screenshot_manager_spills_images_beyond_hot_window(tmp_path: Path) -> None:
+    manager = ScreenshotManager(
+        config=ScreenshotManagerConfig(
+            max_screenshots=8,
+            spill_dir=str(tmp_path),
+            hot_window=2,
+            spill_segment_bytes=300,
+        )
+    )
+    for i in range(8):
+        manager.record_screenshot(
+            screenshot_type="agent_step",
+            image_bytes=_payload(i),
+            mime_type="image/png",
+            session_id="s",
+            captured_at=float(i),
+            step=i,
+        )
+
+    # Spilled images are stored in their base64 form (136 bytes for a 100-byte payload).
+    stats = manager.get_stats()
+    assert stats["total_size_bytes"] == 200
+    assert stats["spilled_size_bytes"] == 6 * 136
+    assert stats["spill"]["live_bytes"] == 6 * 136
+
+    shots = manager.get_screenshots(session_id="s", last_n=8, include_images=True)
+    assert [base64.b64decode(shot["image_data"]) for shot in shots] == [
+        _payload(i) for i in range(8)
+    ]
+
+    # Evicting spilled shots (the middle steps of session "s") compacts their segments.
+    for i in range(8, 14):
+        manager.record_screenshot(
+            screenshot_type="agent_step",
+            image_bytes=_payload(i),
+            mime_type="image/png",
+            session_id="t",
+            captured_at=float(i),
+            step=i,
+        )
+    # Compaction runs on a worker thread, outside the manager lock.
+    assert manager.wait_for_compaction(timeout=5.0)
+    stats = manager.get_stats()
+    assert stats["total_screenshots"] == 8
+    assert stats["spill"]["compactions"] >= 1
+    assert stats["spill"]["live_bytes"] == stats["spilled_size_bytes"]
+    shots = manager.get_screenshots(screenshot_type="all", last_n=8, include_images=True)
+    assert [shot["step"] for shot in shots] == [0, 7, 8, 9, 10, 11, 12, 13]
+    assert [base64.b64decode(shot["image_data"]) for shot in shots] == [
+        _payload(i) for i in (0, 7, 8, 9, 10, 11, 12, 13)
+    ]
+
+    manager.close()
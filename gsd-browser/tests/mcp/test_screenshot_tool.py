@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import inspect
 import re
 from typing import Any
@@ -97,6 +98,292 @@ def test_screenshot_manager_get_screenshots_include_images_false_is_metadata_onl
     )
 
 
+def test_screenshot_manager_indexes_track_eviction_and_counts() -> None:
+    manager = ScreenshotManager(max_screenshots=6, max_agent_step_per_session=2)
+    for i in range(4):
+        _add(manager, screenshot_type="agent_step", session_id="a", timestamp=float(100 + i))
+    for i in range(4):
+        _add(
+            manager,
+            screenshot_type="stream_sample",
+            session_id="b",
+            timestamp=float(50 + i),
+            has_error=i == 3,
+        )
+
+    # Session cap keeps the two newest agent_steps.
+    assert manager.count_screenshots() == 6
+    assert manager.count_screenshots(session_id="a") == 2
+    assert manager.count_screenshots(screenshot_type="stream_sample") == 4
+    assert manager.count_screenshots(has_error=True) == 1
+    assert manager.count_screenshots(has_error=False) == 5
+    assert manager.count_screenshots(from_timestamp=100.0) == 2
+    assert manager.count_screenshots(session_id="b", from_timestamp=52.0, has_error=False) == 1
+
+    results = manager.get_screenshots(session_id="a", last_n=10)
+    assert [shot["timestamp"] for shot in results] == [102.0, 103.0]
+
+    # Timestamp-driven lookups keep insertion order even when captured_at is not monotonic.
+    results = manager.get_screenshots(from_timestamp=51.0, last_n=4)
+    assert [shot["timestamp"] for shot in results] == [103.0, 51.0, 52.0, 53.0]
+
+    for i in range(6):
+        _add(manager, screenshot_type="stream_sample", session_id="c", timestamp=float(200 + i))
+    assert manager.count_screenshots(session_id="a") == 2
+    assert manager.count_screenshots(session_id="b") == 1
+    assert manager.count_screenshots(session_id="c") == 3
+    assert manager.count_screenshots(has_error=True) == 1
+    assert [shot["timestamp"] for shot in manager.get_screenshots(session_id="b")] == [53.0]
+    assert manager.count_screenshots(from_timestamp=0.0) == 6
+
+    # Evicted entries not yet swept from the timestamp index are not counted.
+    small = ScreenshotManager(max_screenshots=3)
+    for timestamp in (1.0, 2.0):
+        _add(small, screenshot_type="agent_step", session_id="a", timestamp=timestamp)
+    for timestamp in (3.0, 4.0):
+        _add(small, screenshot_type="stream_sample", session_id="a", timestamp=timestamp)
+    assert len(small.get_screenshots(from_timestamp=2.0, last_n=10)) == 2
+    assert small.count_screenshots(from_timestamp=2.0) == 2
+
+
+def test_screenshot_manager_byte_budget_evicts_by_priority() -> None:
+    manager = ScreenshotManager(max_total_bytes=10 * 100)
+
+    def _shot(kind: str, session_id: str, ts: float, *, has_error: bool = False) -> None:
+        manager.record_screenshot(
+            screenshot_type=kind,
+            image_bytes=f"{kind}:{session_id}:{ts}".encode().ljust(100, b"x"),
+            mime_type="image/png",
+            session_id=session_id,
+            captured_at=ts,
+            has_error=has_error,
+            step=int(ts) if kind == "agent_step" else None,
+        )
+
+    for i in range(6):
+        _shot("agent_step", "a", float(i + 1), has_error=i == 2)
+    for i in range(4):
+        _shot("stream_sample", "a", float(100 + i))
+    assert manager.get_stats()["total_size_bytes"] == 1000
+
+    # Stream samples go first.
+    _shot("stream_sample", "a", 200.0)
+    _shot("agent_step", "b", 1.0)
+    stats = manager.get_stats()
+    assert stats["total_size_bytes"] <= 1000
+    assert manager.count_screenshots(screenshot_type="stream_sample") == 3
+    assert stats["evictions"]["by_reason"]["max_total_bytes"] == 2
+    assert stats["evictions"]["by_tier"]["stream_sample"] == 2
+
+    # Then ordinary agent steps; errors and the first/final steps of a session survive.
+    for ts in (2.0, 3.0, 4.0, 5.0, 6.0, 7.0):
+        _shot("agent_step", "b", ts)
+    steps_a = manager.get_screenshots(session_id="a", screenshot_type="agent_step", last_n=10)
+    assert [shot["step"] for shot in steps_a] == [1, 3, 6]
+    assert manager.count_screenshots(has_error=True) == 1
+    stats = manager.get_stats()
+    assert manager.count_screenshots(screenshot_type="stream_sample") == 0
+    assert stats["evictions"]["by_tier"]["stream_sample"] == 5
+    assert stats["evictions"]["by_tier"]["agent_step"] == 3
+    assert stats["evictions"]["by_tier"]["protected"] == 0
+    assert stats["max_total_bytes"] == 1000
+
+
+def test_screenshot_manager_dedups_identical_images() -> None:
+    manager = ScreenshotManager(max_screenshots=4)
+    frame = b"f" * 100
+    for i in range(3):
+        _add(
+            manager,
+            screenshot_type="stream_sample",
+            session_id="a",
+            timestamp=float(i),
+            image_bytes=frame,
+        )
+    _add(manager, screenshot_type="agent_step", session_id="a", timestamp=3.0, image_bytes=b"s")
+
+    stats = manager.get_stats()
+    assert stats["total_size_bytes"] == 101
+    assert stats["dedup"] == {
+        "unique_images": 2,
+        "hits": 2,
+        "logical_size_bytes": 301,
+        "saved_bytes": 200,
+    }
+    shots = manager.get_screenshots(screenshot_type="stream_sample", last_n=3)
+    assert {shot["image_data"] for shot in shots} == {base64.b64encode(frame).decode("ascii")}
+
+    # Shared bytes are released only with their last screenshot.
+    for i in range(4, 7):
+        _add(
+            manager,
+            screenshot_type="agent_step",
+            session_id="b",
+            timestamp=float(i),
+            image_bytes=bytes([i]),
+        )
+    assert manager.count_screenshots(screenshot_type="stream_sample") == 0
+    stats = manager.get_stats()
+    assert stats["total_size_bytes"] == 4
+    assert stats["dedup"]["unique_images"] == 4
+
+
+def test_screenshot_manager_converts_base64_lazily_and_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = ScreenshotManager()
+    frame_b64 = base64.b64encode(b"frame" * 20).decode("ascii")
+    _run(manager.add_key_screenshot(frame_b64, "https://example.com", 1, "a"))
+    manager.record_screenshot(
+        screenshot_type="agent_step", image_bytes=b"raw" * 10, session_id="a", step=2
+    )
+    assert manager.get_stats()["total_size_bytes"] == len(frame_b64) + 30
+
+    encodes: list[bytes] = []
+    real_b64encode = base64.b64encode
+
+    def _counting_b64encode(data: bytes) -> bytes:
+        encodes.append(data)
+        return real_b64encode(data)
+
+    monkeypatch.setattr(base64, "b64encode", _counting_b64encode)
+    first = manager.get_screenshots(session_id="a", last_n=2)
+    second = manager.get_screenshots(session_id="a", last_n=2)
+
+    # Base64 input is served as received; raw bytes are encoded once and memoized.
+    assert first[0]["image_data"] is frame_b64
+    assert encodes == [b"raw" * 10]
+    assert first[1]["image_data"] == second[1]["image_data"] == real_b64encode(b"raw" * 10).decode()
+    assert manager.get_stats()["total_size_bytes"] == len(frame_b64) + 30 + 40
+
+    # The memo is only kept while it fits in the byte budget; reads never evict.
+    tight = ScreenshotManager(max_total_bytes=40)
+    tight.record_screenshot(
+        screenshot_type="agent_step", image_bytes=b"raw" * 10, session_id="a", step=1
+    )
+    for _ in range(2):
+        shots = tight.get_screenshots(session_id="a")
+        assert shots[0]["image_data"] == real_b64encode(b"raw" * 10).decode()
+    assert tight.get_stats()["total_size_bytes"] == 30
+    assert encodes[-2:] == [b"raw" * 10, b"raw" * 10]
+
+
+def test_normalize_base64_image_rejects_non_base64_payloads() -> None:
+    frame_b64 = base64.b64encode(b"frame" * 20).decode("ascii")
+    normalize = mcp_server_mod._normalize_base64_image
+
+    assert normalize(f" data:image/png;base64,{frame_b64} ") == frame_b64
+    assert normalize("") is None
+    assert normalize(frame_b64[:-1]) is None
+    # Right length, wrong alphabet or misplaced padding.
+    assert normalize("ab$d" * 4) is None
+    assert normalize("a=bc") is None
+    assert normalize("a-_b") is None
+
+
+def test_screenshot_records_are_slotted_with_interned_fields() -> None:
+    manager = ScreenshotManager()
+    for i in range(2):
+        manager.record_screenshot(
+            screenshot_type="".join(["agent", "_step"]),
+            image_bytes=None,
+            mime_type="".join(["image/", "png"]),
+            session_id="".join(["sess", "-1"]),
+            metadata={"".join(["ti", "tle"]): "".join(["Exam", "ple"]), "n": i},
+            step=i,
+        )
+
+    first, second = list(manager.key_screenshots)
+    assert not hasattr(first, "__dict__")
+    assert first.session_id is second.session_id
+    assert first.mime_type is second.mime_type
+    assert first.packed_metadata is not None and second.packed_metadata is not None
+    assert first.packed_metadata[0] is second.packed_metadata[0]
+    assert first.metadata["title"] is second.metadata["title"]
+
+    payload = manager.get_screenshots(session_id="sess-1", last_n=1, include_images=False)[0]
+    assert payload["metadata"] == {"title": "Example", "n": 1}
+    assert set(payload) == {
+        "id",
+        "seq",
+        "timestamp",
+        "captured_at",
+        "type",
+        "source",
+        "session_id",
+        "has_error",
+        "metadata",
+        "mime_type",
+        "url",
+        "step",
+    }
+
+
+def test_screenshot_manager_caps_interleaved_sessions() -> None:
+    manager = ScreenshotManager(max_screenshots=40, max_agent_step_per_session=3)
+    for ts in range(200):
+        session_id = f"s{ts % 10}"
+        _add(manager, screenshot_type="agent_step", session_id=session_id, timestamp=float(ts))
+        if ts % 7 == 0:
+            _add(manager, screenshot_type="stream_sample", session_id=session_id, timestamp=ts)
+
+    # Each session keeps its newest three steps; stream samples fill the remaining slots.
+    stats = manager.get_stats()
+    assert stats["total_screenshots"] == 40
+    for index in range(10):
+        steps = manager.get_screenshots(
+            session_id=f"s{index}", screenshot_type="agent_step", last_n=10
+        )
+        assert [shot["metadata"]["ts"] for shot in steps] == [
+            170 + index + 10 * i for i in range(3)
+        ]
+    assert stats["evictions"]["by_reason"]["max_agent_step_per_session"] == 170
+
+    # Evicted entries linger in the timestamp index until swept, but never surface.
+    assert manager.count_screenshots(from_timestamp=0.0) == 40
+    assert manager.count_screenshots(from_timestamp=185.0) == 17
+    shots = manager.get_screenshots(screenshot_type="all", from_timestamp=0.0, last_n=20)
+    assert len(shots) == 20
+    assert len(manager.key_screenshots) == 40
+
+
+def test_screenshot_manager_pages_forward_by_sequence_cursor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = ScreenshotManager(max_screenshots=6)
+    for i in range(5):
+        _add(manager, screenshot_type="agent_step", session_id="a", timestamp=float(i))
+    _add(manager, screenshot_type="stream_sample", session_id="a", timestamp=5.0)
+
+    page = manager.get_screenshots_since(0, limit=2, include_images=False)
+    assert [shot["seq"] for shot in page["screenshots"]] == [1, 2]
+    assert (page["next_seq"], page["has_more"]) == (2, True)
+    assert [shot["seq"] for shot in manager.get_screenshots(since_seq=2, last_n=3)] == [3, 4, 5]
+
+    # Non-matching shots are skipped once: the cursor moves past them when the page is short.
+    page = manager.get_screenshots_since(2, limit=10, screenshot_type="stream_sample")
+    assert [shot["seq"] for shot in page["screenshots"]] == [6]
+    page = manager.get_screenshots_since(2, limit=10, session_id="missing")
+    assert (page["screenshots"], page["next_seq"], page["has_more"]) == ([], 6, False)
+
+    # Evicted shots vanish from later pages; new ones continue the sequence.
+    for i in range(3):
+        _add(manager, screenshot_type="agent_step", session_id="b", timestamp=float(10 + i))
+    page = manager.get_screenshots_since(0, limit=20, include_images=False)
+    assert [shot["seq"] for shot in page["screenshots"]] == [1, 4, 5, 7, 8, 9]
+    assert page["next_seq"] == manager.get_stats()["latest_seq"] == 9
+
+    class DummyRuntime:
+        def __init__(self, screenshots: ScreenshotManager) -> None:
+            self.screenshots = screenshots
+
+    monkeypatch.setattr(mcp_server_mod, "get_runtime", lambda: DummyRuntime(manager))
+    result = _run(mcp_get_screenshots(screenshot_type="all", since_seq=6, include_images=False))
+    assert "Retrieved 3 screenshots" in result[0].text
+    assert "next_seq: 9, has_more: False" in result[0].text
+    assert result[1].text.splitlines()[0].startswith("#7 [agent_step]")
+
+
 def test_mcp_get_screenshots_enforces_last_n_max_20_and_metadata_only_mode(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import base64
+import io
+import random
+
+import pytest
+
+from gsd_browser.screenshot_manager import ScreenshotManager, ScreenshotManagerConfig
+
+
+def _png(seed: int) -> bytes:
+    image_mod = pytest.importorskip("PIL.Image")
+    rng = random.Random(seed)
+    image = image_mod.new("RGB", (160, 120))
+    image.putdata(
+        [
+            ((x + y) % 256, (x * 3) % 256, (rng.randint(0, 40) + y) % 256)
+            for y in range(120)
+            for x in range(160)
+        ]
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _record(manager: ScreenshotManager, png: bytes, *, step: int, has_error: bool = False) -> None:
+    manager.record_screenshot(
+        screenshot_type="agent_step",
+        image_base64=base64.b64encode(png).decode("ascii"),
+        mime_type="image/png",
+        session_id="s",
+        has_error=has_error,
+        step=step,
+    )
+
+
+def test_agent_step_pngs_are_transcoded_in_background_and_error_originals_kept() -> None:
+    manager = ScreenshotManager(
+        config=ScreenshotManagerConfig(transcode_format="jpeg", transcode_quality=70)
+    )
+    step_png, error_png = _png(1), _png(2)
+    try:
+        _record(manager, step_png, step=1)
+        _record(manager, error_png, step=2, has_error=True)
+        assert manager.wait_for_transcodes(timeout=5.0)
+
+        # An error screenshot matching an already transcoded blob gets its own original.
+        _record(manager, step_png, step=3, has_error=True)
+        assert manager.wait_for_transcodes(timeout=5.0)
+
+        shots = manager.get_screenshots(session_id="s", last_n=3)
+        assert [shot["mime_type"] for shot in shots] == ["image/jpeg", "image/png", "image/png"]
+        transcoded = base64.b64decode(shots[0]["image_data"])
+        assert transcoded.startswith(b"\xff\xd8") and len(transcoded) < len(step_png)
+        assert base64.b64decode(shots[1]["image_data"]) == error_png
+        assert base64.b64decode(shots[2]["image_data"]) == step_png
+
+        stats = manager.get_stats()
+        assert stats["transcode"]["queued"] == 1
+        assert stats["transcode"]["completed"] == 1
+        assert stats["transcode"]["pending"] == 0
+        assert stats["total_size_bytes"] < 3 * len(step_png)
+        assert stats["dedup"]["logical_size_bytes"] == (
+            len(transcoded) + len(error_png) + len(step_png)
+        )
+    finally:
+        manager.close()
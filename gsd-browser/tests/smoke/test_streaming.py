@@ -82,6 +82,13 @@ def test_streaming_env_defaults_and_invalid_input_fallback() -> None:
     settings = load_settings(env={**base_env, "STREAMING_QUALITY": "nope"}, env_file=None)
     assert settings.streaming_quality == default_quality
 
+    # Change-detection sampling is opt-in.
+    assert load_settings(env=base_env, env_file=None).streaming_sampler == "interval"
+    settings = load_settings(env={**base_env, "STREAMING_SAMPLER": " Change "}, env_file=None)
+    assert settings.streaming_sampler == "change"
+    settings = load_settings(env={**base_env, "STREAMING_SAMPLER": "nope"}, env_file=None)
+    assert settings.streaming_sampler == "interval"
+
 
 def test_screenshot_manager_get_screenshots_filters() -> None:
     cls = _get_screenshot_manager_class()
@@ -3,12 +3,16 @@ from __future__ import annotations
 import asyncio
 import base64
 import inspect
+import io
 import time
 from collections.abc import Callable
 from typing import Any
 
+import pytest
+
 from gsd_browser.screenshot_manager import ScreenshotManager
 from gsd_browser.streaming.cdp_screencast import CdpScreencastStreamer
+from gsd_browser.streaming.frame_sampler import ChangeDetectionSampler, luminance_fingerprint
 from gsd_browser.streaming.server import DEFAULT_STREAM_NAMESPACE, ControlState, StreamingRuntime
 from gsd_browser.streaming.stats import StreamingStats
 
@@ -248,6 +252,90 @@ def test_cdp_sampler_seen_increments_even_on_decode_failure() -> None:
     _run(_exercise())
 
 
+def _jpeg(*, dark_left: bool = False) -> bytes:
+    image_mod = pytest.importorskip("PIL.Image")
+    image = image_mod.new("L", (160, 120), color=240)
+    if dark_left:
+        image.paste(20, (0, 0, 80, 120))
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=60)
+    return buffer.getvalue()
+
+
+def test_change_detection_sampler_threshold_and_max_interval() -> None:
+    idle, changed = _jpeg(), _jpeg(dark_left=True)
+    assert luminance_fingerprint(idle) is not None
+    assert luminance_fingerprint(b"not-a-real-jpeg") is None
+
+    sampler = ChangeDetectionSampler(max_interval_s=5.0)
+    assert sampler.should_store(idle, now=0.0)
+    assert not sampler.should_store(idle, now=1.0)
+    assert sampler.should_store(changed, now=2.0)
+    assert not sampler.should_store(changed, now=6.0)
+    assert sampler.should_store(changed, now=7.0)
+
+    # Undecodable frames fall back to an exact byte comparison.
+    sampler.reset()
+    assert sampler.should_store(b"raw", now=0.0)
+    assert not sampler.should_store(b"raw", now=1.0)
+    assert sampler.should_store(b"raw-2", now=1.0)
+
+
+def test_cdp_sender_skips_unchanged_frames_with_change_sampler() -> None:
+    async def _exercise() -> None:
+        sio = FakeAsyncServer()
+        stats = StreamingStats(streaming_mode="cdp", frame_queue_max=2)
+        screenshots = ScreenshotManager()
+        session = FakeCdpSession()
+
+        streamer = CdpScreencastStreamer(
+            sio=sio,  # type: ignore[arg-type]
+            stats=stats,
+            screenshot_manager=screenshots,
+            quality="med",
+            namespace=DEFAULT_STREAM_NAMESPACE,
+            frame_queue_max=2,
+            sample_every_n=1,
+            change_sampler=ChangeDetectionSampler(max_interval_s=0),
+        )
+        streamer._running = True
+        streamer._cdp_session = session
+
+        sender_task = asyncio.create_task(streamer._sender_loop(session_id="sess-1"))
+        try:
+            frames = [_jpeg(), _jpeg(), _jpeg(), _jpeg(dark_left=True)]
+            for index, image_bytes in enumerate(frames, start=1):
+                await streamer._on_frame(
+                    params={
+                        "data": base64.b64encode(image_bytes).decode("ascii"),
+                        "metadata": {},
+                        "sessionId": f"ack-{index}",
+                    },
+                    session_id="sess-1",
+                )
+                # Sampled frames are decoded in a worker thread after the frame is emitted.
+                await _wait_for(
+                    lambda index=index: (
+                        stats.sampler_frames_stored + stats.sampler_frames_skipped == index
+                    )
+                )
+
+            assert stats.sampler_frames_seen == 4
+            assert stats.sampler_frames_stored == 2
+            assert stats.sampler_frames_skipped == 2
+            assert stats.snapshot()["sampler_totals"] == {"seen": 4, "stored": 2, "skipped": 2}
+            stored = screenshots.get_screenshots(last_n=5, screenshot_type="stream_sample")
+            assert [shot["metadata"]["seq"] for shot in stored] == [1, 4]
+        finally:
+            sender_task.cancel()
+            try:
+                await sender_task
+            except asyncio.CancelledError:
+                pass
+
+    _run(_exercise())
+
+
 def test_emit_browser_update_emits_and_records_stream_sample() -> None:
     async def _exercise() -> None:
         sio = FakeAsyncServer()
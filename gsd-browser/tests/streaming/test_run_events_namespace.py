@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import pytest
+
+from gsd_browser.config import Settings
+from gsd_browser.run_event_store import RunEventStore
+from gsd_browser.streaming.server import DEFAULT_EVENTS_NAMESPACE, create_streaming_app
+
+
+class _EmitCapture:
+    def __init__(self) -> None:
+        self.emits: list[dict[str, Any]] = []
+
+    async def emit(
+        self,
+        event: str,
+        payload: dict[str, Any],
+        *,
+        namespace: str | None = None,
+        to: str | None = None,
+        **_: Any,
+    ) -> None:
+        self.emits.append({"event": event, "payload": payload, "namespace": namespace, "to": to})
+
+
+async def _yield_loop(*, ticks: int = 5) -> None:
+    for _ in range(ticks):
+        await asyncio.sleep(0)
+
+
+def test_events_namespace_pushes_filtered_run_events(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def _exercise() -> None:
+        monkeypatch.setattr(
+            "gsd_browser.streaming.server.get_security_logger",
+            lambda: logging.getLogger("test.security"),
+        )
+        authorized: list[str] = []
+
+        def _authorize(**kwargs: Any) -> bool:
+            authorized.append(kwargs["namespace"])
+            return kwargs["sid"] != "sid-denied"
+
+        monkeypatch.setattr("gsd_browser.streaming.server.authorize_socket_connection", _authorize)
+        store = RunEventStore()
+        runtime = create_streaming_app(settings=Settings(), run_events=store)
+        capture = _EmitCapture()
+        monkeypatch.setattr(runtime.sio, "emit", capture.emit)
+        handlers = runtime.sio.handlers[DEFAULT_EVENTS_NAMESPACE]
+
+        sio = runtime.sio
+        # Dispatch through the server's event routing, as a real client connect does.
+        with pytest.raises(ConnectionRefusedError):
+            await sio._trigger_event("connect", DEFAULT_EVENTS_NAMESPACE, "sid-denied", {}, None)
+        await sio._trigger_event("connect", DEFAULT_EVENTS_NAMESPACE, "sid-1", {}, None)
+        assert authorized == [DEFAULT_EVENTS_NAMESPACE, DEFAULT_EVENTS_NAMESPACE]
+        ack = await handlers["subscribe"](
+            "sid-1", {"session_id": "s-1", "event_types": ["console"]}
+        )
+        assert ack["ok"] is True
+        assert (ack["session_id"], ack["event_types"]) == ("s-1", ["console"])
+
+        store.record_agent_event("s-1", captured_at=1.0, summary="clicked")
+        store.record_console_event("s-2", captured_at=2.0, level="error", message="elsewhere")
+        store.record_console_event("s-1", captured_at=3.0, level="error", message="boom")
+        await _yield_loop()
+        assert len(capture.emits) == 1
+        emitted = capture.emits[0]
+        assert (emitted["event"], emitted["namespace"], emitted["to"]) == (
+            "run_events",
+            DEFAULT_EVENTS_NAMESPACE,
+            "sid-1",
+        )
+        assert [item["summary"] for item in emitted["payload"]["events"]] == ["boom"]
+        assert emitted["payload"]["dropped"] == 0
+
+        await sio._trigger_event(
+            "disconnect", DEFAULT_EVENTS_NAMESPACE, "sid-1", "client disconnect"
+        )
+        store.record_console_event("s-1", captured_at=4.0, level="error", message="after")
+        await _yield_loop()
+        assert len(capture.emits) == 1
+        assert store.subscription_stats() == []
+
+    asyncio.run(_exercise())
+
+
+def test_events_namespace_reports_missing_store() -> None:
+    async def _exercise() -> None:
+        runtime = create_streaming_app(settings=Settings())
+        handlers = runtime.sio.handlers[DEFAULT_EVENTS_NAMESPACE]
+        assert await handlers["subscribe"]("sid-1", {}) == {
+            "ok": False,
+            "error": "run_events_unavailable",
+        }
+
+    asyncio.run(_exercise())